@@ -1,3 +1,4 @@
 from neuro.base.api import NeuroBase
+from neuro.base.async_api import AsyncNeuroBase
 
-__all__ = ["NeuroBase"]
+__all__ = ["NeuroBase", "AsyncNeuroBase"]
@@ -1,28 +1,44 @@
+import logging
+import time
+
 from neuro.core import Node
+from neuro.core.data.list import ListUtils
 from neuro.base.accessors import Accessor
 from neuro.base import nfx
-from neuro.base.schema import Metarelationships, Violations
+from neuro.base.schema import OntologySnapshot, Violations
 from neuro.utils import exceptions
 
 
+GET_QUERY = """
+MATCH (ion:OntologyNode {label:"Node"})
+MATCH (on)-[:SUBCLASS_OF*0..]->(ion)
+WITH on.label as node_label
+
+MATCH (n)
+WHERE node_label in labels(n) AND n.`neuro.id` = $neuro_id
+RETURN properties(n) as properties, labels(n) as labels;
+"""
+
+
+def _node_from_data(data, neuro_id):
+    if not data:
+        raise ValueError(f"No node found with neuro.id: {neuro_id}")
+    if len(data) > 1:
+        raise ValueError(f"Multiple nodes found with neuro.id: {neuro_id}")
+    return Node(labels=data[0]["labels"], properties=data[0]["properties"])
+
+
+def _node_from_entry(entry):
+    properties = entry.get("properties", {})
+    properties["neuro.id"] = entry["nid"]
+    return Node(labels=entry["labels"], properties=properties)
+
+
 class NodeAccessor(Accessor):
 
     def get(self, neuro_id):
-        query = """
-        MATCH (ion:OntologyNode {label:"Node"})
-        MATCH (on)-[:SUBCLASS_OF*0..]->(ion)
-        WITH on.label as node_label
-
-        MATCH (n)
-        WHERE node_label in labels(n) AND n.`neuro.id` = $neuro_id
-        RETURN properties(n) as properties, labels(n) as labels;
-        """
-        data = self._nb.get_data(query, {"neuro_id": neuro_id})
-        if not data:
-            raise ValueError(f"No node found with neuro.id: {neuro_id}")
-        if len(data) > 1:
-            raise ValueError(f"Multiple nodes found with neuro.id: {neuro_id}")
-        return Node(labels=data[0]["labels"], properties=data[0]["properties"])
+        data = self._nb.get_data(GET_QUERY, {"neuro_id": neuro_id})
+        return _node_from_data(data, neuro_id)
 
     def put(self, node):
         """
@@ -32,54 +48,117 @@ class NodeAccessor(Accessor):
         """
         self._nb.objects.put(node, identifier_key="neuro.id")
 
-    def import_nfx(self, path, dependency_nids=None, validate=True):
+    def import_nfx(self, path, dependency_nids=None, validate=True, bulk=False, chunk_size=1000):
         """
         Import nodes and relationships from an NFX file.
         Nodes are merged on neuro.id; relationships are merged between them.
-        Validates referential integrity and jurisdiction before import.
-        """
-        data = nfx.read(path)
+        Validates referential integrity, jurisdiction and the ontology before import.
 
-        if validate:
-            violations = nfx.validate(data, dependency_nids)
-            if violations["unresolved"] or violations["foreign"]:
-                msgs = []
-                for rel in violations["unresolved"]:
-                    msgs.append(f"  unresolved: {rel['from']} -> {rel['to']} ({rel['type']})")
-                for rel in violations["foreign"]:
-                    msgs.append(f"  foreign: {rel['from']} -> {rel['to']} ({rel['type']})")
-                raise exceptions.NfxViolation(
-                    f"NFX validation failed for {path}:\n" + "\n".join(msgs)
-                )
-
-        for entry in data.get("nodes", []):
-            properties = entry.get("properties", {})
-            properties["neuro.id"] = entry["nid"]
-            node = Node(
-                labels=entry["labels"],
-                properties=properties,
-            )
-            if validate:
-                self.put(node)
-            else:
-                self._nb.objects.put(node, identifier_key="neuro.id", validate=False)
+        The file is streamed with `nfx.NfxReader`, `chunk_size` records at a
+        time: a first pass validates every node and relationship, a second one
+        writes them, so nothing is written if validation fails.
 
+        With bulk=True, nodes are grouped by label set and relationships by type,
+        and written as `UNWIND` statements of `chunk_size` rows, one transaction
+        per chunk.
+
+        Returns a dict with counts, elapsed seconds and nodes per second.
+        """
+        start = time.perf_counter()
         if validate:
-            # Build label lookup from imported nodes for relationship validation
-            nid_labels = {}
-            for entry in data.get("nodes", []):
+            self._validate_nfx(path, dependency_nids)
+
+        nids = set()
+        node_count = 0
+        relationship_count = 0
+        with self._nb.session(), nfx.NfxReader(path) as reader:
+            for entries in ListUtils.chunks(reader.nodes(), chunk_size):
+                nodes = [_node_from_entry(entry) for entry in entries]
+                nids.update(entry["nid"] for entry in entries)
+                if bulk:
+                    self._nb.objects.put_batch(
+                        nodes, identifier_key="neuro.id", validate=False, chunk_size=chunk_size
+                    )
+                else:
+                    for node in nodes:
+                        self._nb.objects.put(node, identifier_key="neuro.id", validate=False)
+                node_count += len(nodes)
+
+            for relationships in ListUtils.chunks(reader.relationships(), chunk_size):
+                if bulk:
+                    groups = nfx.group_relationships(relationships, nids)
+                    for (rel_type, from_local, to_local), rows in groups.items():
+                        match_a = "MATCH" if from_local else "MERGE"
+                        match_b = "MATCH" if to_local else "MERGE"
+                        query = f"""
+                        UNWIND $rows AS row
+                        {match_a} (a {{`neuro.id`: row.from}})
+                        {match_b} (b {{`neuro.id`: row.to}})
+                        MERGE (a)-[r:{rel_type}]->(b)
+                        SET r += row.properties
+                        """
+                        self._nb.run_batched(query, rows, chunk_size=chunk_size)
+                else:
+                    for rel in relationships:
+                        rel_type = rel["type"]
+                        match_a = "MERGE" if rel["from"] not in nids else "MATCH"
+                        match_b = "MERGE" if rel["to"] not in nids else "MATCH"
+                        query = f"""
+                        {match_a} (a {{`neuro.id`: $from_id}})
+                        {match_b} (b {{`neuro.id`: $to_id}})
+                        MERGE (a)-[r:{rel_type}]->(b)
+                        SET r += $properties
+                        """
+                        params = {
+                            "from_id": rel["from"],
+                            "to_id": rel["to"],
+                            "properties": rel.get("properties", {}),
+                        }
+                        self._nb.run_query(query, params)
+                relationship_count += len(relationships)
+
+        elapsed = time.perf_counter() - start
+        report = {
+            "nodes": node_count,
+            "relationships": relationship_count,
+            "seconds": elapsed,
+            "nodes_per_sec": node_count / elapsed if elapsed else 0.0,
+        }
+        logging.info(
+            f"Imported {report['nodes']} nodes and {report['relationships']} relationships "
+            f"from {path} in {elapsed:.2f} s ({report['nodes_per_sec']:.0f} nodes/s)"
+        )
+        return report
+
+    def _validate_nfx(self, path, dependency_nids=None):
+        """
+        Stream an NFX file and raise if any node or relationship would be rejected.
+        Only the nid and labels of each node are kept in memory.
+        """
+        nid_labels = {}
+        with nfx.NfxReader(path) as reader:
+            for entry in reader.nodes():
                 nid_labels[entry["nid"]] = entry["labels"]
+                self._nb.objects.validate(_node_from_entry(entry))
 
+            local_nids = set(nid_labels)
+            valid_nids = local_nids | (dependency_nids or set())
+            msgs = []
+            snapshot = OntologySnapshot.get(self._nb)
             violations = Violations()
-            for rel in data.get("relationships", []):
+            for rel in reader.relationships():
+                problem = nfx.check_relationship(rel, local_nids, valid_nids)
+                if problem:
+                    msgs.append(f"  {problem}: {rel['from']} -> {rel['to']} ({rel['type']})")
+                    continue
+
+                # Validate against the source node's metarelationships
                 rel_type = rel["type"]
                 from_labels = nid_labels.get(rel["from"], [])
                 to_labels = nid_labels.get(rel["to"], [])
-
-                # Validate against the source node's metarelationships
                 validated = False
                 for label in from_labels:
-                    mrs = Metarelationships.from_ontology(self._nb, label)
+                    mrs = snapshot.metarelationships(label)
                     key = f"{rel_type}:outgoing"
                     if key in mrs:
                         mr = mrs[key]
@@ -94,29 +173,14 @@ class NodeAccessor(Accessor):
                         (rel_type, "outgoing", to_labels)
                     )
 
-            if violations:
-                raise exceptions.NfxViolation(
-                    f"Relationship validation failed for {path}:\n{violations}"
-                )
-
-        nids = {entry["nid"] for entry in data.get("nodes", [])}
-
-        for rel in data.get("relationships", []):
-            rel_type = rel["type"]
-            match_a = "MERGE" if rel["from"] not in nids else "MATCH"
-            match_b = "MERGE" if rel["to"] not in nids else "MATCH"
-            query = f"""
-            {match_a} (a {{`neuro.id`: $from_id}})
-            {match_b} (b {{`neuro.id`: $to_id}})
-            MERGE (a)-[r:{rel_type}]->(b)
-            SET r += $properties
-            """
-            params = {
-                "from_id": rel["from"],
-                "to_id": rel["to"],
-                "properties": rel.get("properties", {}),
-            }
-            self._nb.run_query(query, params)
+        if msgs:
+            raise exceptions.NfxViolation(
+                f"NFX validation failed for {path}:\n" + "\n".join(msgs)
+            )
+        if violations:
+            raise exceptions.NfxViolation(
+                f"Relationship validation failed for {path}:\n{violations}"
+            )
 
     def export_nfx(self, path, label=None, name="", description="", version="",
                    query=None, query_params=None, **properties):
@@ -127,6 +191,10 @@ class NodeAccessor(Accessor):
         - query=<cypher>: custom Cypher returning nid, labels, properties columns;
           use query_params for parameterized queries
         - default: filter by label and/or property kwargs
+
+        Records are streamed from the database into an `nfx.NfxWriter`; only
+        the exported neuro.ids are kept in memory.
+        Returns a dict with the number of nodes and relationships written.
         """
         params = {}
 
@@ -146,8 +214,12 @@ class NodeAccessor(Accessor):
             RETURN n.`neuro.id` as nid, labels(n) as labels, properties(n) as properties
             """
 
-        nodes = self._nb.get_data(node_query, params)
-        ids = [n["nid"] for n in nodes]
+        ids = []
+
+        def nodes():
+            for record in self._nb.stream(node_query, params):
+                ids.append(record["nid"])
+                yield record
 
         rel_query = """
         MATCH (a)-[r]->(b)
@@ -155,6 +227,26 @@ class NodeAccessor(Accessor):
         RETURN a.`neuro.id` as from, b.`neuro.id` as to,
                type(r) as type, properties(r) as properties
         """
-        relationships = self._nb.get_data(rel_query, {"ids": ids})
+        with self._nb.session(), nfx.NfxWriter(
+                path, name=name, description=description, version=version) as writer:
+            writer.nodes(nodes())
+            writer.relationships(self._nb.stream(rel_query, {"ids": ids}))
+        return dict(writer.counts)
+
+
+class AsyncNodeAccessor(Accessor):
+
+    async def get(self, neuro_id):
+        """Async counterpart of `NodeAccessor.get`."""
+        data = await self._nb.get_data(GET_QUERY, {"neuro_id": neuro_id})
+        return _node_from_data(data, neuro_id)
+
+    async def put(self, node):
+        """Async counterpart of `NodeAccessor.put`."""
+        await self._nb.objects.put(node, identifier_key="neuro.id")
 
-        return nfx.write(path, nodes, relationships, name=name, description=description, version=version)
+    async def put_many(self, nodes, validate=True, concurrency=None):
+        """Save many Nodes concurrently, merged on neuro.id (see `AsyncObjectAccessor.put_many`)."""
+        await self._nb.objects.put_many(
+            nodes, identifier_key="neuro.id", validate=validate, concurrency=concurrency
+        )
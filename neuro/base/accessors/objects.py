@@ -1,9 +1,70 @@
+import asyncio
+
 from neuro.base.accessors import Accessor
 from neuro.base.ontology import ObjectValidator
+from neuro.base.schema import OntologySnapshot
+
+
+def _check(validator):
+    violations = validator.get_violations()
+    if violations:
+        raise ValueError(f"Object validation failed: {violations}")
+
+
+def put_query(obj, identifier_key=None):
+    """Return the (query, parameters) pair that saves a single Object."""
+    labels_str = ":".join(obj.labels)
+
+    if identifier_key:
+        param_name = identifier_key.replace(".", "_")
+        query = f"""
+        MERGE (n:{labels_str} {{`{identifier_key}`: ${param_name}}})
+        SET n += $properties
+        RETURN n
+        """
+        parameters = {
+            param_name: obj.properties[identifier_key],
+            "properties": obj.properties,
+        }
+    else:
+        query = f"""
+        CREATE (n:{labels_str})
+        SET n += $properties
+        RETURN n
+        """
+        parameters = {"properties": obj.properties}
+    return query, parameters
+
+
+def batch_queries(objects, identifier_key=None):
+    """Group Objects by label set and yield one (`UNWIND $rows` query, rows) pair per group."""
+    groups = {}
+    for obj in objects:
+        groups.setdefault(tuple(sorted(obj.labels)), []).append(obj.properties)
+
+    for labels, rows in groups.items():
+        labels_str = ":".join(labels)
+        if identifier_key:
+            query = f"""
+            UNWIND $rows AS properties
+            MERGE (n:{labels_str} {{`{identifier_key}`: properties.`{identifier_key}`}})
+            SET n += properties
+            """
+        else:
+            query = f"""
+            UNWIND $rows AS properties
+            CREATE (n:{labels_str})
+            SET n += properties
+            """
+        yield query, rows
 
 
 class ObjectAccessor(Accessor):
 
+    def validate(self, obj):
+        """Raise ValueError if the Object violates the ontology."""
+        _check(ObjectValidator(self._nb, obj))
+
     def put(self, obj, identifier_key=None, validate=True):
         """
         Save an Object to the database. Validates against the ontology before insertion.
@@ -14,30 +75,74 @@ class ObjectAccessor(Accessor):
         :param validate: if False, skip ontology validation.
         """
         if validate:
-            validator = ObjectValidator(self._nb, obj)
-            violations = validator.get_violations()
-            if violations:
-                raise ValueError(f"Object validation failed: {violations}")
+            self.validate(obj)
 
-        labels_str = ":".join(obj.labels)
+        query, parameters = put_query(obj, identifier_key)
+        self._nb.run_query(query, parameters=parameters)
 
-        if identifier_key:
-            param_name = identifier_key.replace(".", "_")
-            query = f"""
-            MERGE (n:{labels_str} {{`{identifier_key}`: ${param_name}}})
-            SET n += $properties
-            RETURN n
-            """
-            parameters = {
-                param_name: obj.properties[identifier_key],
-                "properties": obj.properties,
-            }
-        else:
-            query = f"""
-            CREATE (n:{labels_str})
-            SET n += $properties
-            RETURN n
-            """
-            parameters = {"properties": obj.properties}
+    def put_batch(self, objects, identifier_key=None, validate=True, chunk_size=1000):
+        """
+        Save many Objects with batched `UNWIND` statements.
 
-        self._nb.run_query(query, parameters=parameters)
+        Objects are grouped by label set; every group is written in chunks of
+        `chunk_size`, each chunk in one transaction. All objects are validated
+        before anything is written.
+
+        :param objects: iterable of Objects with .labels and .properties
+        :param identifier_key: property key used as MERGE key (see `put`).
+        :param validate: if False, skip ontology validation.
+        :param chunk_size: rows per transaction.
+        :return: number of objects written
+        """
+        objects = list(objects)
+        if validate:
+            for obj in objects:
+                self.validate(obj)
+
+        written = 0
+        for query, rows in batch_queries(objects, identifier_key):
+            written += self._nb.run_batched(query, rows, chunk_size=chunk_size)
+        return written
+
+
+class AsyncObjectAccessor(Accessor):
+
+    async def validate(self, obj):
+        """Async counterpart of `ObjectAccessor.validate`."""
+        snapshot = await OntologySnapshot.aget(self._nb)
+        _check(ObjectValidator(self._nb, obj, snapshot=snapshot))
+
+    async def put(self, obj, identifier_key=None, validate=True):
+        """Async counterpart of `ObjectAccessor.put`."""
+        if validate:
+            await self.validate(obj)
+
+        query, parameters = put_query(obj, identifier_key)
+        await self._nb.run_query(query, parameters=parameters)
+
+    async def put_batch(self, objects, identifier_key=None, validate=True, chunk_size=1000):
+        """Async counterpart of `ObjectAccessor.put_batch`."""
+        objects = list(objects)
+        if validate:
+            for obj in objects:
+                await self.validate(obj)
+
+        written = 0
+        for query, rows in batch_queries(objects, identifier_key):
+            written += await self._nb.run_batched(query, rows, chunk_size=chunk_size)
+        return written
+
+    async def put_many(self, objects, identifier_key=None, validate=True, concurrency=None):
+        """
+        Save many Objects with individual `put` calls, at most `concurrency`
+        of them in flight at once (default: `AsyncNeuroBase.concurrency`).
+        Each call runs in its own session from the driver pool.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self._nb.concurrency)
+
+        async def put(obj):
+            async with semaphore:
+                with self._nb.isolated():
+                    await self.put(obj, identifier_key=identifier_key, validate=validate)
+
+        await asyncio.gather(*(put(obj) for obj in objects))
@@ -1,23 +1,81 @@
 from neuro.base.accessors import Accessor
 
 
+ALL_FIELDS_QUERY = """
+MATCH (t:Tiddler)
+RETURN t {
+    .*,
+    created: toString(t.created),
+    modified: toString(t.modified)
+} as properties;
+"""
+
+STAMPS_QUERY = """
+MATCH (t:Tiddler)
+RETURN t.title AS title, toString(t.modified) AS modified;
+"""
+
+FIELDS_BY_TITLE_QUERY = """
+UNWIND $titles AS title
+MATCH (t:Tiddler {title: title})
+RETURN t {
+    .*,
+    created: toString(t.created),
+    modified: toString(t.modified)
+} as properties;
+"""
+
+
 class TiddlerAccessor(Accessor):
 
     def all_fields(self):
-        query = """
-        MATCH (t:Tiddler)
-        RETURN t {
-            .*,
-            created: toString(t.created),
-            modified: toString(t.modified)
-        } as properties;
-        """
         try:
             self._nb.driver.verify_connectivity()
-            result = self._nb.get_data(query)
-            fields_list = [next(iter(record.values())) for record in result]
+            fields_list = list(self.iter_fields())
         except Exception as e:
             print(f"Error connecting to Neo4j: {e}")
             return None
 
         return fields_list
+
+    def iter_fields(self):
+        """
+        Lazily yield the fields of every tiddler, without holding them all in memory.
+        """
+        for record in self._nb.stream(ALL_FIELDS_QUERY):
+            yield record["properties"]
+
+    def stamps(self):
+        """
+        Return the title and `modified` stamp of every tiddler.
+        :return: lod
+        """
+        return self._nb.get_data(STAMPS_QUERY)
+
+    def iter_fields_by_title(self, titles):
+        """
+        Lazily yield the fields of the tiddlers with the given titles.
+        """
+        for record in self._nb.stream(FIELDS_BY_TITLE_QUERY, {"titles": list(titles)}):
+            yield record["properties"]
+
+
+class AsyncTiddlerAccessor(Accessor):
+
+    async def all_fields(self):
+        """Async counterpart of `TiddlerAccessor.all_fields`."""
+        return [fields async for fields in self.iter_fields()]
+
+    async def iter_fields(self):
+        """Async counterpart of `TiddlerAccessor.iter_fields`."""
+        async for record in self._nb.stream(ALL_FIELDS_QUERY):
+            yield record["properties"]
+
+    async def stamps(self):
+        """Async counterpart of `TiddlerAccessor.stamps`."""
+        return await self._nb.get_data(STAMPS_QUERY)
+
+    async def iter_fields_by_title(self, titles):
+        """Async counterpart of `TiddlerAccessor.iter_fields_by_title`."""
+        async for record in self._nb.stream(FIELDS_BY_TITLE_QUERY, {"titles": list(titles)}):
+            yield record["properties"]
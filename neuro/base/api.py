@@ -1,27 +1,52 @@
+import contextlib
 import os
 import sys
 import logging
+import threading
 
 import neo4j
 
+from neuro.core.data.list import ListUtils
 from neuro.utils import terminal_style
 from neuro.base.accessors.nodes import NodeAccessor
 from neuro.base.accessors.objects import ObjectAccessor
 from neuro.base.accessors.tiddlers import TiddlerAccessor
 from neuro.base.metaontology import Metaontology
 from neuro.base.ontology import Ontology
+from neuro.base.schema import OntologySnapshot
+
+
+FULLTEXT_INDEX = "tiddler_fulltext"
+FULLTEXT_PROPERTIES = ("title", "text", "caption", "neuro.role")
+SCHEMA_TARGETS = (("OntologyNode", "label"), ("OntologyMetadata", "neuro.id"))
 
 
 class NeuroBase:
     """
     Simple, reusable Neo4j client wrapper.
+
+    Every statement runs in its own session unless a `session()` or
+    `transaction()` block is open, in which case it is reused.
     """
-    def __init__(self, neo4j_uri=None, neo4j_user=None, neo4j_password=None):
+    _schema_ensured = set()
+
+    def __init__(self, neo4j_uri=None, neo4j_user=None, neo4j_password=None,
+                 max_connection_pool_size=None, fetch_size=None):
         uri = neo4j_uri or os.getenv("NEO4J_URI")
         user = neo4j_user or os.getenv("NEO4J_USER")
         password = neo4j_password or os.getenv("NEO4J_PASSWORD")
+        self.uri = uri
+        self._local = threading.local()
+
+        driver_config = {}
+        pool_size = max_connection_pool_size or os.getenv("NEO4J_POOL_SIZE")
+        if pool_size:
+            driver_config["max_connection_pool_size"] = int(pool_size)
+        fetch_size = fetch_size or os.getenv("NEO4J_FETCH_SIZE")
+        if fetch_size:
+            driver_config["fetch_size"] = int(fetch_size)
         try:
-            self.driver = neo4j.GraphDatabase.driver(uri, auth=(user, password))
+            self.driver = neo4j.GraphDatabase.driver(uri, auth=(user, password), **driver_config)
         except neo4j.exceptions.ConfigurationError:
             logging.error(f"Incorrect Neo4j parameters: {uri}")
             return
@@ -33,37 +58,161 @@ class NeuroBase:
         self.nodes = NodeAccessor(self)
         self.tiddlers = TiddlerAccessor(self)
 
+        if os.getenv("NEO4J_ENSURE_SCHEMA", "").lower() in ("1", "true", "yes") and uri not in self._schema_ensured:
+            try:
+                states = self.ensure_schema()
+            except BaseException:
+                self.close()
+                raise
+            self._schema_ensured.add(uri)
+            for (label, key), state in states.items():
+                logging.info(f"Schema {label}.{key}: {state}")
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def run_query(self, query, parameters=None):
+    def _unavailable(self):
+        print(f"{terminal_style.FAIL} Neo4j unavailable at {self.driver._pool.address}")
+        sys.exit(1)
+
+    @contextlib.contextmanager
+    def session(self, **config):
         """
-        Run a Cypher query and return the result.
+        Keep one driver session open for the duration of the block.
+        Statements run through this NeuroBase inside the block share it.
+        Nested calls reuse the outer session.
         """
+        current = getattr(self._local, "session", None)
+        if current is not None:
+            yield current
+            return
         try:
+            with self.driver.session(**config) as s:
+                self._local.session = s
+                try:
+                    yield s
+                finally:
+                    self._local.session = None
+        except neo4j.exceptions.ServiceUnavailable:
+            self._unavailable()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Run the block in one explicit transaction, committed on success and
+        rolled back on error. Nested calls join the outer transaction.
+        """
+        current = getattr(self._local, "tx", None)
+        if current is not None:
+            yield current
+            return
+        with self.session() as s:
+            tx = s.begin_transaction()
+            self._local.tx = tx
+            try:
+                yield tx
+                tx.commit()
+            finally:
+                self._local.tx = None
+                tx.close()
+
+    def execute_read(self, work, *args, **kwargs):
+        """
+        Run `work(tx, *args, **kwargs)` in a managed read transaction, retried on transient errors.
+        """
+        with self.session() as s:
+            return s.execute_read(work, *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        """
+        Run `work(tx, *args, **kwargs)` in a managed write transaction, retried on transient errors.
+        Queries run through this NeuroBase inside `work` join the transaction.
+        """
+        def joined(tx, *a, **kw):
+            previous, self._local.tx = getattr(self._local, "tx", None), tx
+            try:
+                return work(tx, *a, **kw)
+            finally:
+                self._local.tx = previous
+
+        with self.session() as s:
+            return s.execute_write(joined, *args, **kwargs)
+
+    def _run(self, query, parameters, handle):
+        runner = getattr(self._local, "tx", None) or getattr(self._local, "session", None)
+        try:
+            if runner is not None:
+                return handle(runner.run(query, parameters or {}))
             with self.driver.session() as session:
-                result = session.run(query, parameters or {})
-                return result
+                return handle(session.run(query, parameters or {}))
         except neo4j.exceptions.ServiceUnavailable:
-            print(f"{terminal_style.FAIL} Neo4j unavailable at {self.driver._pool.address}")
-            sys.exit(1)
+            self._unavailable()
+
+    def run_query(self, query, parameters=None):
+        """
+        Run a Cypher query and return its summary.
+        """
+        return self._run(query, parameters, lambda result: result.consume())
 
     def get_data(self, query, parameters=None):
         """
         Run a Cypher query and return the data as a list of records.
         """
         logging.debug(f"NeuroBase.get_data query: {query}")
+        return self._run(query, parameters, lambda result: [record.data() for record in result])
+
+    def stream(self, query, parameters=None, batch_size=None):
+        """
+        Run a Cypher query and lazily yield its records as dicts.
+        With `batch_size`, yield lists of up to `batch_size` records instead.
+        Records are pulled from the server in `fetch_size` chunks, so memory
+        use does not grow with the size of the result.
+        """
+        logging.debug(f"NeuroBase.stream query: {query}")
+        runner = getattr(self._local, "tx", None) or getattr(self._local, "session", None)
         try:
-            with self.driver.session() as session:
-                result = session.run(query, parameters or {})
-                records = [record.data() for record in result]
-                return records
+            with contextlib.ExitStack() as stack:
+                if runner is None:
+                    runner = stack.enter_context(self.driver.session())
+                result = runner.run(query, parameters or {})
+                if not batch_size:
+                    for record in result:
+                        yield record.data()
+                    return
+                batch = []
+                for record in result:
+                    batch.append(record.data())
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
         except neo4j.exceptions.ServiceUnavailable:
-            print(f"{terminal_style.FAIL} Neo4j unavailable at {self.driver._pool.address}")
-            sys.exit(1)
+            self._unavailable()
+
+    def run_batched(self, query, rows, chunk_size=1000):
+        """
+        Run an `UNWIND $rows` write query over `rows` in chunks.
+        Each chunk is committed in its own explicit transaction, unless a
+        `transaction()` block is open, in which case all chunks join it.
+        Returns the number of rows written.
+        """
+        logging.debug(f"NeuroBase.run_batched query ({len(rows)} rows): {query}")
+        tx = getattr(self._local, "tx", None)
+        try:
+            if tx is not None:
+                for chunk in ListUtils.chunks(rows, chunk_size):
+                    tx.run(query, rows=chunk).consume()
+            else:
+                with self.session() as session:
+                    for chunk in ListUtils.chunks(rows, chunk_size):
+                        session.execute_write(lambda t, c=chunk: t.run(query, rows=c).consume())
+        except neo4j.exceptions.ServiceUnavailable:
+            self._unavailable()
+        return len(rows)
 
     def count(self, label=None, **properties):
         """
@@ -81,6 +230,105 @@ class NeuroBase:
         result = self.get_data(query, params)
         return result[0]["count"]
 
+    def ensure_fulltext_index(self, name=FULLTEXT_INDEX, label="Tiddler", properties=FULLTEXT_PROPERTIES,
+                              timeout=300):
+        """
+        Create the full-text index `name` over the `properties` of `label` nodes,
+        recreating it if it exists with another definition, and wait until it is online.
+        Neo4j keeps the index up to date as nodes change.
+        Returns "created", "recreated" or "existing".
+        """
+        existing = self.get_data(
+            "SHOW FULLTEXT INDEXES YIELD name, labelsOrTypes, properties WHERE name = $name",
+            {"name": name},
+        )
+        if existing and existing[0]["labelsOrTypes"] == [label] and sorted(existing[0]["properties"]) == sorted(properties):
+            state = "existing"
+        else:
+            if existing:
+                self.drop_fulltext_index(name)
+            on_each = ", ".join(f"n.`{p}`" for p in properties)
+            self.run_query(f"CREATE FULLTEXT INDEX `{name}` FOR (n:`{label}`) ON EACH [{on_each}]")
+            state = "recreated" if existing else "created"
+        self.run_query("CALL db.awaitIndex($name, $timeout)", {"name": name, "timeout": timeout})
+        return state
+
+    def drop_fulltext_index(self, name=FULLTEXT_INDEX):
+        self.run_query(f"DROP INDEX `{name}` IF EXISTS")
+
+    def fulltext_search(self, query, name=FULLTEXT_INDEX, skip=0, limit=20):
+        """
+        Query a full-text index with Lucene syntax through `db.index.fulltext.queryNodes`.
+        Only the requested page of nodes leaves the server.
+        Returns a list of {"properties": ..., "score": ...}, best match first.
+        """
+        return self.get_data(
+            """
+            CALL db.index.fulltext.queryNodes($name, $query, {skip: $skip, limit: $limit})
+            YIELD node, score
+            RETURN node {
+                .*,
+                created: toString(node.created),
+                modified: toString(node.modified)
+            } AS properties, score
+            """,
+            {"name": name, "query": query, "skip": skip, "limit": limit},
+        )
+
+    def schema_targets(self):
+        """
+        Return the (label, property) pairs that lookups match on: `neuro.id`
+        of every label defined in the ontology, with `SCHEMA_TARGETS`.
+        """
+        labels = sorted(label for label in OntologySnapshot.get(self).labels if label)
+        return [(label, "neuro.id") for label in labels] + list(SCHEMA_TARGETS)
+
+    def ensure_schema(self, targets=None, timeout=300):
+        """
+        Ensure a uniqueness constraint, and so a range index, on every target.
+        Where a constraint cannot be created, because of duplicate values or an
+        existing plain index, a range index is ensured instead.
+        :param targets: (label, property) pairs, default `schema_targets()`
+        :param timeout: seconds to wait for new indexes to come online
+        :return: dict of (label, property) to "existing", "created", "indexed" or "index created"
+        """
+        targets = self.schema_targets() if targets is None else targets
+        constraints = {
+            (record["labelsOrTypes"][0], record["properties"][0])
+            for record in self.get_data(
+                "SHOW CONSTRAINTS YIELD type, entityType, labelsOrTypes, properties "
+                "WHERE entityType = 'NODE' AND type CONTAINS 'UNIQUENESS' AND size(properties) = 1"
+            )
+        }
+        indexes = {
+            (record["labelsOrTypes"][0], record["properties"][0])
+            for record in self.get_data(
+                "SHOW RANGE INDEXES YIELD entityType, labelsOrTypes, properties "
+                "WHERE entityType = 'NODE' AND size(properties) = 1"
+            )
+        }
+
+        states = dict()
+        for label, key in targets:
+            name = f"{label}_{key}".replace(".", "_")
+            if (label, key) in constraints:
+                states[(label, key)] = "existing"
+                continue
+            try:
+                self.run_query(f"CREATE CONSTRAINT `unique_{name}` IF NOT EXISTS "
+                               f"FOR (n:`{label}`) REQUIRE n.`{key}` IS UNIQUE")
+                states[(label, key)] = "created"
+            except neo4j.exceptions.ClientError as e:
+                logging.warning(f"No uniqueness constraint on {label}.{key}: {e.message}")
+                if (label, key) in indexes:
+                    states[(label, key)] = "indexed"
+                else:
+                    self.run_query(f"CREATE RANGE INDEX `index_{name}` IF NOT EXISTS FOR (n:`{label}`) ON (n.`{key}`)")
+                    states[(label, key)] = "index created"
+        if any(state != "existing" for state in states.values()):
+            self.run_query("CALL db.awaitIndexes($timeout)", {"timeout": timeout})
+        return states
+
     def clear(self, confirm=False):
         if not confirm:
             raise ValueError("Refusing to clear database without confirm=True")
@@ -90,6 +338,7 @@ class NeuroBase:
         DETACH DELETE o;
         """
         self.run_query(query)
+        OntologySnapshot.invalidate()
 
     def close(self):
         """
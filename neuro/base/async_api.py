@@ -0,0 +1,276 @@
+import asyncio
+import contextlib
+import contextvars
+import os
+import sys
+import logging
+
+import neo4j
+
+from neuro.core.data.list import ListUtils
+from neuro.utils import terminal_style
+from neuro.base.accessors.nodes import AsyncNodeAccessor
+from neuro.base.accessors.objects import AsyncObjectAccessor
+from neuro.base.accessors.tiddlers import AsyncTiddlerAccessor
+from neuro.base.schema import OntologySnapshot
+
+
+# Sessions and transactions opened by `session()` / `transaction()`, keyed by
+# AsyncNeuroBase instance. Context variables keep them local to the running task.
+_SESSIONS = contextvars.ContextVar("async_neurobase_sessions", default=None)
+_TRANSACTIONS = contextvars.ContextVar("async_neurobase_transactions", default=None)
+
+
+def _active(var, nb):
+    return (var.get() or {}).get(id(nb))
+
+
+@contextlib.contextmanager
+def _bind(var, nb, value):
+    token = var.set({**(var.get() or {}), id(nb): value})
+    try:
+        yield
+    finally:
+        var.reset(token)
+
+
+class _ThreadedAccessor:
+    """Expose a synchronous accessor's methods as coroutines run in a worker thread."""
+
+    def __init__(self, accessor):
+        self._accessor = accessor
+
+    def __getattr__(self, name):
+        attribute = getattr(self._accessor, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attribute, *args, **kwargs)
+        return call
+
+
+class AsyncNeuroBase:
+    """
+    Asynchronous counterpart of `NeuroBase` on `neo4j.AsyncGraphDatabase`.
+
+    The `objects`, `nodes` and `tiddlers` accessors are native coroutines.
+    `ontology` and `metaontology` run the synchronous implementations in a
+    worker thread so they do not block the event loop.
+    """
+    def __init__(self, neo4j_uri=None, neo4j_user=None, neo4j_password=None,
+                 max_connection_pool_size=None, fetch_size=None, concurrency=None):
+        uri = neo4j_uri or os.getenv("NEO4J_URI")
+        user = neo4j_user or os.getenv("NEO4J_USER")
+        password = neo4j_password or os.getenv("NEO4J_PASSWORD")
+        self.uri = uri
+        self._credentials = (uri, user, password)
+        self._sync = None
+        self.concurrency = int(concurrency or os.getenv("NEO4J_CONCURRENCY", 8))
+
+        self._driver_config = {}
+        pool_size = max_connection_pool_size or os.getenv("NEO4J_POOL_SIZE")
+        if pool_size:
+            self._driver_config["max_connection_pool_size"] = int(pool_size)
+        fetch_size = fetch_size or os.getenv("NEO4J_FETCH_SIZE")
+        if fetch_size:
+            self._driver_config["fetch_size"] = int(fetch_size)
+        try:
+            self.driver = neo4j.AsyncGraphDatabase.driver(uri, auth=(user, password), **self._driver_config)
+        except neo4j.exceptions.ConfigurationError:
+            logging.error(f"Incorrect Neo4j parameters: {uri}")
+            return
+
+        # Accessors
+        self.objects = AsyncObjectAccessor(self)
+        self.nodes = AsyncNodeAccessor(self)
+        self.tiddlers = AsyncTiddlerAccessor(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def sync(self):
+        """A synchronous `NeuroBase` on the same database, created on first use."""
+        if self._sync is None:
+            from neuro.base.api import NeuroBase
+            self._sync = NeuroBase(*self._credentials, **self._driver_config)
+        return self._sync
+
+    @property
+    def ontology(self):
+        return _ThreadedAccessor(self.sync.ontology)
+
+    @property
+    def metaontology(self):
+        return _ThreadedAccessor(self.sync.metaontology)
+
+    def _unavailable(self):
+        print(f"{terminal_style.FAIL} Neo4j unavailable at {self.uri}")
+        sys.exit(1)
+
+    @contextlib.asynccontextmanager
+    async def session(self, **config):
+        """
+        Keep one driver session open for the duration of the block.
+        Statements awaited in the same task inside the block share it.
+        """
+        current = _active(_SESSIONS, self)
+        if current is not None:
+            yield current
+            return
+        try:
+            async with self.driver.session(**config) as s:
+                with _bind(_SESSIONS, self, s):
+                    yield s
+        except neo4j.exceptions.ServiceUnavailable:
+            self._unavailable()
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """
+        Run the block in one explicit transaction, committed on success and
+        rolled back on error. Nested calls join the outer transaction.
+        """
+        current = _active(_TRANSACTIONS, self)
+        if current is not None:
+            yield current
+            return
+        async with self.session() as s:
+            tx = await s.begin_transaction()
+            try:
+                with _bind(_TRANSACTIONS, self, tx):
+                    yield tx
+                await tx.commit()
+            finally:
+                await tx.close()
+
+    @contextlib.contextmanager
+    def isolated(self):
+        """Detach the current task from any open session or transaction of this instance."""
+        with _bind(_SESSIONS, self, None), _bind(_TRANSACTIONS, self, None):
+            yield
+
+    async def execute_read(self, work, *args, **kwargs):
+        """
+        Await `work(tx, *args, **kwargs)` in a managed read transaction, retried on transient errors.
+        """
+        async with self.session() as s:
+            return await s.execute_read(work, *args, **kwargs)
+
+    async def execute_write(self, work, *args, **kwargs):
+        """
+        Await `work(tx, *args, **kwargs)` in a managed write transaction, retried on transient errors.
+        """
+        async with self.session() as s:
+            return await s.execute_write(work, *args, **kwargs)
+
+    async def _run(self, query, parameters, handle):
+        runner = _active(_TRANSACTIONS, self) or _active(_SESSIONS, self)
+        try:
+            if runner is not None:
+                return await handle(await runner.run(query, parameters or {}))
+            async with self.driver.session() as session:
+                return await handle(await session.run(query, parameters or {}))
+        except neo4j.exceptions.ServiceUnavailable:
+            self._unavailable()
+
+    async def run_query(self, query, parameters=None):
+        """
+        Run a Cypher query and return its summary.
+        """
+        return await self._run(query, parameters, lambda result: result.consume())
+
+    async def get_data(self, query, parameters=None):
+        """
+        Run a Cypher query and return the data as a list of records.
+        """
+        logging.debug(f"AsyncNeuroBase.get_data query: {query}")
+        return await self._run(query, parameters, lambda result: result.data())
+
+    async def stream(self, query, parameters=None, batch_size=None):
+        """
+        Run a Cypher query and lazily yield its records as dicts, or as lists
+        of up to `batch_size` records.
+        """
+        logging.debug(f"AsyncNeuroBase.stream query: {query}")
+        runner = _active(_TRANSACTIONS, self) or _active(_SESSIONS, self)
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                if runner is None:
+                    runner = await stack.enter_async_context(self.driver.session())
+                result = await runner.run(query, parameters or {})
+                batch = []
+                async for record in result:
+                    if not batch_size:
+                        yield record.data()
+                        continue
+                    batch.append(record.data())
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+        except neo4j.exceptions.ServiceUnavailable:
+            self._unavailable()
+
+    async def run_batched(self, query, rows, chunk_size=1000):
+        """
+        Run an `UNWIND $rows` write query over `rows` in chunks, one
+        transaction per chunk unless a `transaction()` block is open.
+        Returns the number of rows written.
+        """
+        logging.debug(f"AsyncNeuroBase.run_batched query ({len(rows)} rows): {query}")
+        tx = _active(_TRANSACTIONS, self)
+        try:
+            if tx is not None:
+                for chunk in ListUtils.chunks(rows, chunk_size):
+                    await (await tx.run(query, rows=chunk)).consume()
+            else:
+                async def work(t, chunk):
+                    await (await t.run(query, rows=chunk)).consume()
+                async with self.session() as session:
+                    for chunk in ListUtils.chunks(rows, chunk_size):
+                        await session.execute_write(work, chunk)
+        except neo4j.exceptions.ServiceUnavailable:
+            self._unavailable()
+        return len(rows)
+
+    async def count(self, label=None, **properties):
+        """
+        Count nodes in the database, optionally filtered by label and properties.
+        """
+        node = f"(n:{label})" if label else "(n)"
+        conditions = []
+        params = {}
+        for key, value in properties.items():
+            param_name = key.replace(".", "_")
+            conditions.append(f"n.`{key}` = ${param_name}")
+            params[param_name] = value
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        query = f"MATCH {node}{where} RETURN count(n) AS count"
+        result = await self.get_data(query, params)
+        return result[0]["count"]
+
+    async def clear(self, confirm=False):
+        if not confirm:
+            raise ValueError("Refusing to clear database without confirm=True")
+
+        query = """
+        MATCH (o)
+        DETACH DELETE o;
+        """
+        await self.run_query(query)
+        OntologySnapshot.invalidate()
+
+    async def close(self):
+        """
+        Close the driver, and the synchronous companion if one was created.
+        """
+        if self._sync is not None:
+            await asyncio.to_thread(self._sync.close)
+        if self.driver:
+            await self.driver.close()
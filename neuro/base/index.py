@@ -2,37 +2,109 @@
 Ontology file discovery and indexing.
 """
 
+import json
+import logging
 import os
 from pathlib import Path
 
 from neuro.base import nfx
-from neuro.utils import internal_utils
+from neuro.utils import exceptions, internal_utils
+
+
+HEADER_FIELDS = ("nid", "name", "version", "dependencies")
+
+
+class HeaderCache:
+    """Persistent cache of NFX headers, keyed by path and invalidated by mtime and size.
+
+    Stored as JSON under `NF_CACHE`. Only the fields in `HEADER_FIELDS` are kept.
+    """
+    FILENAME = "ontology-index.json"
+    FORMAT = 1
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("format") == self.FORMAT:
+                    self._entries = data.get("files", {})
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable ontology index cache {path}: {e}")
+
+    @classmethod
+    def default(cls):
+        """Return the cache under `NF_CACHE`, or an in-memory cache if it is not configured."""
+        try:
+            return cls(internal_utils.get_path("cache", create_if_missing=True) / cls.FILENAME)
+        except (KeyError, exceptions.InternalError, exceptions.InvalidPath, OSError):
+            return cls()
+
+    def header(self, path):
+        """Return the cached header of an NFX file, reading only its metadata on a miss."""
+        key = str(path)
+        stat = os.stat(path)
+        entry = self._entries.get(key)
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["header"]
+        data = nfx.read_header(path)
+        header = {field: data[field] for field in HEADER_FIELDS if field in data}
+        self._entries[key] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "header": header}
+        self._dirty = True
+        return header
+
+    def prune(self, dirs, seen):
+        """Forget entries under `dirs` that were not `seen` in the latest scan."""
+        prefixes = tuple(os.path.join(str(d), "") for d in dirs)
+        stale = [k for k in self._entries if k.startswith(prefixes) and k not in seen]
+        for key in stale:
+            del self._entries[key]
+        self._dirty = self._dirty or bool(stale)
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"format": self.FORMAT, "files": self._entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logging.warning(f"Could not write ontology index cache {self.path}: {e}")
 
 
 class OntologyIndex:
     """Index of .nfx ontology files discovered from directory search paths.
 
-    Pure file-level discovery — no database access.
+    Pure file-level discovery — no database access. File headers are read
+    through a `HeaderCache`, so unchanged files are not parsed again.
     """
 
-    def __init__(self, *dirs):
+    def __init__(self, *dirs, cache=None):
         self._index = {}
+        self._cache = cache if cache is not None else HeaderCache.default()
         self._metaontology_path = internal_utils.get_path("assets") / "ontology" / "metaontology.nfx"
         self._scan(dirs)
 
     def _scan(self, dirs):
         # Pin metaontology to the canonical path.
-        data = nfx.read(self._metaontology_path)
+        data = self.header(self._metaontology_path)
         for key in (data.get("nid", ""), data.get("name", ""), self._metaontology_path.stem, self._metaontology_path.name):
             if key:
                 self._index[key] = self._metaontology_path
+        seen = set()
         for d in dirs:
             for root, _, files in os.walk(d, followlinks=True):
                 for fname in files:
                     if not fname.endswith(".nfx"):
                         continue
                     path = Path(root) / fname
-                    data = nfx.read(path)
+                    seen.add(str(path))
+                    data = self.header(path)
                     nid = data.get("nid", "")
                     if nid:
                         self._index.setdefault(nid, path)
@@ -41,6 +113,12 @@ class OntologyIndex:
                         self._index.setdefault(name, path)
                     self._index.setdefault(path.stem, path)
                     self._index.setdefault(path.name, path)
+        self._cache.prune(dirs, seen)
+        self._cache.save()
+
+    def header(self, path):
+        """Return the nid, name, version and dependencies of an NFX file."""
+        return self._cache.header(path)
 
     def resolve(self, key):
         """Resolve a name, nid, stem, filename, or file path to a Path."""
@@ -53,14 +131,67 @@ class OntologyIndex:
         """Return deduplicated, sorted list of all indexed ontology paths."""
         targets = sorted(
             p for p in self._index.values()
-            if not exclude_nid or nfx.read(p).get("nid") != exclude_nid
+            if not exclude_nid or self.header(p).get("nid") != exclude_nid
         )
         seen = set()
         return [p for p in targets if str(p) not in seen and not seen.add(str(p))]
 
+    def import_layers(self, *targets):
+        """Topologically sort the dependency closure of `targets` (names, nids or paths).
+
+        Returns a list of layers, each a sorted list of paths whose dependencies
+        all lie in earlier layers, so the ontologies of one layer can be imported
+        concurrently. Dependencies missing from the index are left out.
+        Raises `NfxCycle` with the nids involved if the graph has a cycle.
+        """
+        paths = {}
+        dependencies = {}
+        stack = []
+        for target in targets:
+            path = self.resolve(target)
+            if not path:
+                raise exceptions.NfxViolation(f"Ontology {target} not found in index")
+            stack.append(Path(path))
+        while stack:
+            path = stack.pop()
+            header = self.header(path)
+            nid = header.get("nid") or str(path)
+            if nid in paths:
+                continue
+            paths[nid] = path
+            dependencies[nid] = set()
+            for dep in header.get("dependencies", []):
+                dep_nid = dep.partition("@")[0]
+                dep_path = self._index.get(dep_nid)
+                if dep_path:
+                    dependencies[nid].add(dep_nid)
+                    stack.append(dep_path)
+
+        # Kahn's algorithm, one layer per round.
+        pending = {nid: len(deps) for nid, deps in dependencies.items()}
+        dependents = {nid: [] for nid in dependencies}
+        for nid, deps in dependencies.items():
+            for dep_nid in deps:
+                dependents[dep_nid].append(nid)
+        layer = [nid for nid, count in pending.items() if not count]
+        layers = []
+        while layer:
+            layers.append(sorted(paths[nid] for nid in layer))
+            following = []
+            for nid in layer:
+                del pending[nid]
+                for dependent in dependents[nid]:
+                    pending[dependent] -= 1
+                    if not pending[dependent]:
+                        following.append(dependent)
+            layer = following
+        if pending:
+            raise exceptions.NfxCycle(sorted(pending))
+        return layers
+
     def check_dependency_versions(self, path):
         """Check that all dependencies have exact version match. Returns list of error strings."""
-        data = nfx.read(path)
+        data = self.header(path)
         errors = []
         for dep in data.get("dependencies", []):
             dep_nid, _, required_version = dep.partition("@")
@@ -70,7 +201,7 @@ class OntologyIndex:
                 continue
             if not required_version:
                 continue
-            dep_data = nfx.read(dep_path)
+            dep_data = self.header(dep_path)
             actual_version = dep_data.get("version", "")
             if actual_version != required_version:
                 dep_name = dep_data.get("name", dep_path.stem)
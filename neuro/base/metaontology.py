@@ -1,53 +1,54 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from neuro.base import nfx
-from neuro.base.schema import Metaproperties, Violations
+from neuro.base.schema import OntologySnapshot, Violations
+from neuro.core.components import components
 from neuro.utils import exceptions, terminal_style
 
 
 class OntologyValidator:
-    """Validate ontology structure against the metaontology definition."""
+    """Validate ontology structure against the metaontology definition.
 
-    def __init__(self, nb):
+    Instances and metaproperties come from one freshly loaded
+    `OntologySnapshot`, so validation runs in process and costs the same
+    two queries whatever the size of the ontology.
+    """
+
+    def __init__(self, nb, snapshot=None):
         self._nb = nb
+        self.snapshot = snapshot or OntologySnapshot.load(nb)
         self.instances = {}
         self._fetch_data()
 
     def _fetch_instances(self, kind):
         """Fetch all instances of an ontology kind via SUBCLASS_OF hierarchy."""
-        query = """
-        MATCH (root:OntologyNode {label: $kind})
-        MATCH (type)-[:SUBCLASS_OF*0..]->(root)
-        MATCH (n)
-        WHERE type.label IN labels(n)
-        RETURN n.label as label, type.label as ontology_object_type, labels(n) as labels,
-               properties(n) as properties
-        """
-        data = self._nb.get_data(query, {"kind": kind})
-        return [dict(record) for record in data]
+        return self.snapshot.instances(kind)
 
     def _fetch_data(self):
         for kind in json.loads(os.environ["ONTOLOGY_OBJECTS"]):
             self.instances[kind] = self._fetch_instances(kind)
 
+    def components(self):
+        """
+        Connected components of the ontology graph, ignoring direction and
+        leaving out OntologyMetadata. Union-find runs over the snapshot's
+        edge list, so the check needs no further queries and no APOC.
+        :return: list of components as sorted member labels, largest first
+        """
+        nodes = {node_id: node for node_id, node in self.snapshot.nodes.items()
+                 if "OntologyMetadata" not in node["labels"]}
+        edges = ((rel["source"], rel["target"]) for rel in self.snapshot.relationships)
+        return [
+            sorted(str(nodes[node_id]["properties"].get("label") or nodes[node_id]["properties"].get("neuro.id")
+                       or node_id) for node_id in group)
+            for group in components(nodes, edges).groups()
+        ]
+
     def _is_connected(self):
         """Check if the ontology graph is a single connected component."""
-        structural = json.loads(os.environ["ONTOLOGY_OBJECTS"])
-        query = f"""
-        MATCH (root:OntologyNode)
-        WHERE root.label IN {structural}
-        MATCH (root)<-[:SUBCLASS_OF*0..]-(type)
-        MATCH (n)
-        WHERE type.label IN labels(n) AND NOT n:OntologyMetadata
-        WITH collect(DISTINCT n) AS ontology_nodes
-        WITH ontology_nodes, ontology_nodes[0] AS start
-        CALL apoc.path.subgraphNodes(start, {{whitelistNodes: ontology_nodes}}) YIELD node
-        WITH count(node) AS reachable, size(ontology_nodes) AS total
-        RETURN reachable = total AS connected
-        """
-        data = self._nb.get_data(query)
-        return data[0]["connected"]
+        return len(self.components()) <= 1
 
     def validate(self):
         """Run all validation checks. Returns an OntologyViolations instance."""
@@ -59,7 +60,7 @@ class OntologyValidator:
                 ontology_object_type = instance["ontology_object_type"]
                 props = instance["properties"]
 
-                metaproperties = Metaproperties.from_ontology(self._nb, ontology_object_type)
+                metaproperties = self.snapshot.metaproperties(ontology_object_type)
                 v = metaproperties.validate_properties(props)
 
                 if v:
@@ -74,7 +75,9 @@ class OntologyValidator:
                 - specific
             )
 
-        ontology_violations.disconnected = not self._is_connected()
+        ontology_components = self.components()
+        ontology_violations.disconnected = len(ontology_components) > 1
+        ontology_violations.detached = ontology_components[1:]
 
         return ontology_violations
 
@@ -85,6 +88,7 @@ class OntologyViolations:
     def __init__(self):
         self.violations: list[tuple[str, str, Violations]] = []
         self.disconnected: bool = False
+        self.detached: list[list[str]] = []
         self.redundant_labels: list[str] = []
         self.redundant_relationships: list[str] = []
         self.redundant_properties: list[str] = []
@@ -126,7 +130,9 @@ class OntologyViolations:
             lines.append(repr(v))
 
         if self.disconnected:
-            lines.append("Disconnected: ontology graph is not fully connected")
+            lines.append(f"Disconnected: ontology graph has {len(self.detached) + 1} components")
+            for component in self.detached:
+                lines.append(f"  detached: {', '.join(component)}")
         if self.redundant_labels:
             lines.append(f"Redundant labels: {self.redundant_labels}")
         if self.redundant_relationships:
@@ -153,15 +159,24 @@ class Metaontology:
         """Parse a version string like '2.1' into a comparable tuple (2, 1)."""
         return tuple(int(x) for x in version_str.split("."))
 
+    @classmethod
+    def _is_current(cls, stored, version):
+        """Whether a stored version is at least the file version."""
+        if stored is None or version is None:
+            return stored == version
+        return cls._version_tuple(stored) >= cls._version_tuple(version)
+
     def _import_dependencies(self, dependencies, index=None, on_import=None):
         """Ensure dependencies are in the DB. Import from index if missing or below minimum.
 
         Version pins are treated as minimum versions (Go-style): @2.1 means >=2.1.
         The resolver keeps the highest version already loaded if it satisfies the minimum.
+        Missing dependencies are imported together through `import_all`.
 
         on_import(name, imported): callback for each dependency.
             imported=True if freshly imported, False if already loaded.
         """
+        missing = []
         for dep in dependencies:
             dep_nid, _, dep_version = dep.partition("@")
             data = self._nb.get_data(
@@ -181,10 +196,48 @@ class Metaontology:
             dep_path = index.resolve(dep_nid)
             if not dep_path:
                 raise exceptions.NfxViolation(f"Dependency {dep} not found in index")
-            self.import_nfx(dep_path, index=index)
-            dep_name = nfx.read(dep_path).get("name", dep_path.stem)
-            if on_import:
-                on_import(dep_name, imported=True)
+            missing.append(dep_path)
+        if missing:
+            self.import_all(missing, index, on_import=on_import)
+
+    def import_all(self, targets, index, on_import=None, concurrency=None):
+        """Import ontologies and their whole dependency closure from the index.
+
+        The closure is sorted into layers with `OntologyIndex.import_layers`;
+        the ontologies of a layer are imported concurrently, each in its own
+        session. Ontologies already stored at the version of their file or a
+        newer one are skipped.
+
+        on_import(name, imported): optional callback for each ontology.
+        concurrency: worker threads, default NEO4J_CONCURRENCY or 8.
+        """
+        try:
+            layers = index.import_layers(*targets)
+        except exceptions.NfxCycle as e:
+            raise exceptions.NfxViolation(f"Dependency cycle among: {', '.join(e.args[0])}")
+
+        loaded = {
+            row["nid"]: row["version"] for row in self._nb.get_data(
+                "MATCH (m:OntologyMetadata) RETURN m.`neuro.id` as nid, m.version as version"
+            )
+        }
+        workers = int(concurrency or os.getenv("NEO4J_CONCURRENCY", 8))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for layer in layers:
+                futures = []
+                for path in layer:
+                    header = index.header(path)
+                    name = header.get("name", path.stem)
+                    nid = header.get("nid")
+                    if nid in loaded and self._is_current(loaded[nid], header.get("version")):
+                        if on_import:
+                            on_import(name, imported=False)
+                        continue
+                    futures.append((name, executor.submit(self.import_nfx, path, index=index)))
+                for name, future in futures:
+                    future.result()
+                    if on_import:
+                        on_import(name, imported=True)
 
     def _resolver(self, index=None):
         """Return a dep-resolver for `nfx.dependency_node_nids`: index file, fallback to DB."""
@@ -214,38 +267,47 @@ class Metaontology:
     def import_nfx(self, path, index=None, on_import=None):
         """Import an ontology from an NFX file.
 
-        Clears and rewrites this ontology's nodes. Dependencies are checked
-        in the DB; if missing or version mismatch, imported via the index.
+        Clears and rewrites this ontology's nodes in one managed transaction,
+        retried on transient errors, with batched `UNWIND` statements. Dependencies are checked in the DB; if
+        missing or version mismatch, imported via the index (see `import_all`).
 
         on_import(name, imported): optional callback for dependency status.
         """
-        data = nfx.read(path)
-        nid = data.get("nid")
-        name = data.get("name")
-        dependencies = data.get("dependencies", [])
+        with self._nb.session():
+            data = nfx.read(path)
+            dependencies = data.get("dependencies", [])
+
+            # Ensure dependencies are present in the DB.
+            self._import_dependencies(dependencies, index, on_import)
+
+            # Validate referential integrity.
+            try:
+                dependency_nids = nfx.dependency_node_nids(data, self._resolver(index))
+            except exceptions.NfxCycle as e:
+                raise exceptions.NfxViolation(
+                    f"Dependency cycle for {path}: {' -> '.join(e.args[0])}"
+                )
+            violations = nfx.validate(data, dependency_nids)
+            if violations["unresolved"] or violations["foreign"]:
+                msgs = []
+                for rel in violations["unresolved"]:
+                    msgs.append(f"  unresolved: {rel['from']} -> {rel['to']} ({rel['type']})")
+                for rel in violations["foreign"]:
+                    msgs.append(f"  foreign: {rel['from']} -> {rel['to']} ({rel['type']})")
+                raise exceptions.NfxViolation(
+                    f"NFX validation failed for {path}:\n" + "\n".join(msgs)
+                )
 
-        # Ensure dependencies are present in the DB.
-        self._import_dependencies(dependencies, index, on_import)
+            # Clear and rewrite this ontology's nodes, retried on deadlocks
+            # with ontologies imported concurrently.
+            self._nb.execute_write(lambda tx: self._write(data))
 
-        # Validate referential integrity.
-        try:
-            dependency_nids = nfx.dependency_node_nids(data, self._resolver(index))
-        except exceptions.NfxCycle as e:
-            raise exceptions.NfxViolation(
-                f"Dependency cycle for {path}: {' -> '.join(e.args[0])}"
-            )
-        violations = nfx.validate(data, dependency_nids)
-        if violations["unresolved"] or violations["foreign"]:
-            msgs = []
-            for rel in violations["unresolved"]:
-                msgs.append(f"  unresolved: {rel['from']} -> {rel['to']} ({rel['type']})")
-            for rel in violations["foreign"]:
-                msgs.append(f"  foreign: {rel['from']} -> {rel['to']} ({rel['type']})")
-            raise exceptions.NfxViolation(
-                f"NFX validation failed for {path}:\n" + "\n".join(msgs)
-            )
+        OntologySnapshot.invalidate()
 
-        # Clear and rewrite this ontology's nodes.
+    def _write(self, data, chunk_size=1000):
+        """Write an ontology's metadata, nodes and relationships as batched `UNWIND` statements."""
+        nid = data.get("nid")
+        name = data.get("name")
         if nid and name:
             self._nb.run_query(
                 """
@@ -259,43 +321,49 @@ class Metaontology:
                 "MERGE (m:OntologyMetadata {`neuro.id`: $nid}) SET m += $props",
                 {"nid": nid, "props": properties},
             )
-            for dep in dependencies:
-                dep_nid = dep.split("@")[0]
-                self._nb.run_query(
-                    """
-                    MATCH (m:OntologyMetadata {`neuro.id`: $nid})
-                    MATCH (d:OntologyMetadata {`neuro.id`: $dep_nid})
-                    MERGE (m)-[:DEPENDS_ON]->(d)
-                    """,
-                    {"nid": nid, "dep_nid": dep_nid},
-                )
+            self._nb.run_batched(
+                """
+                UNWIND $rows AS row
+                MATCH (m:OntologyMetadata {`neuro.id`: row.nid})
+                MATCH (d:OntologyMetadata {`neuro.id`: row.dep_nid})
+                MERGE (m)-[:DEPENDS_ON]->(d)
+                """,
+                [{"nid": nid, "dep_nid": dep.split("@")[0]} for dep in data.get("dependencies", [])],
+                chunk_size=chunk_size,
+            )
 
+        groups = {}
         for entry in data.get("nodes", []):
-            labels_str = ":".join(entry["labels"])
-            self._nb.run_query(
-                f"MERGE (n:{labels_str} {{`neuro.id`: $nid}}) SET n += $props",
-                {"nid": entry["nid"], "props": entry.get("properties", {})},
+            groups.setdefault(":".join(entry["labels"]), []).append(
+                {"nid": entry["nid"], "props": entry.get("properties", {}), "ontology": nid}
+            )
+        for labels_str, rows in groups.items():
+            self._nb.run_batched(
+                f"""
+                UNWIND $rows AS row
+                MERGE (n:{labels_str} {{`neuro.id`: row.nid}})
+                SET n += row.props
+                WITH n, row
+                WHERE row.ontology IS NOT NULL
+                MATCH (m:OntologyMetadata {{`neuro.id`: row.ontology}})
+                MERGE (m)-[:DEFINES]->(n)
+                """,
+                rows,
+                chunk_size=chunk_size,
             )
-            if nid:
-                self._nb.run_query(
-                    f"""
-                    MATCH (m:OntologyMetadata {{`neuro.id`: $ontology_nid}})
-                    MATCH (n:{labels_str} {{`neuro.id`: $node_nid}})
-                    MERGE (m)-[:DEFINES]->(n)
-                    """,
-                    {"ontology_nid": nid, "node_nid": entry["nid"]},
-                )
 
-        for rel in data.get("relationships", []):
-            self._nb.run_query(
+        groups = nfx.group_relationships(data.get("relationships", []), set())
+        for (rel_type, _, _), rows in groups.items():
+            self._nb.run_batched(
                 f"""
-                MATCH (:OntologyMetadata)-[:DEFINES]->(a {{`neuro.id`: $from_id}})
-                MATCH (:OntologyMetadata)-[:DEFINES]->(b {{`neuro.id`: $to_id}})
-                MERGE (a)-[r:{rel["type"]}]->(b)
-                SET r += $props
+                UNWIND $rows AS row
+                MATCH (:OntologyMetadata)-[:DEFINES]->(a {{`neuro.id`: row.from}})
+                MATCH (:OntologyMetadata)-[:DEFINES]->(b {{`neuro.id`: row.to}})
+                MERGE (a)-[r:{rel_type}]->(b)
+                SET r += row.properties
                 """,
-                {"from_id": rel["from"], "to_id": rel["to"],
-                 "props": rel.get("properties", {})},
+                rows,
+                chunk_size=chunk_size,
             )
 
     def is_ontology_valid(self):
@@ -1,12 +1,13 @@
 """
 NFX format helpers — pure functions over NFX-shaped dicts.
 
-Covers read/write, referential-integrity validation, and dependency-graph
-traversal. No filesystem discovery and no database access; callers supply
+Covers read/write (whole-document and streaming), referential-integrity
+validation, and dependency-graph traversal. No filesystem discovery and no database access; callers supply
 any required resolution (e.g. via `OntologyIndex` or a DB query).
 """
 
 import json
+import os
 
 from neuro.core.data.str import Uuid
 from neuro.utils.exceptions import NfxCycle
@@ -24,23 +25,35 @@ def validate(data, dependency_nids=None):
     local_nids = {n["nid"] for n in data.get("nodes", [])}
     valid_nids = local_nids | (dependency_nids or set())
 
-    all_nids = {n["nid"] for n in data.get("nodes", [])}
-    for rel in data.get("relationships", []):
-        all_nids.add(rel["from"])
-        all_nids.add(rel["to"])
-    invalid_nids = sorted(nid for nid in all_nids if not Uuid.is_valid_uuid_v4(nid))
-
+    all_nids = set(local_nids)
     unresolved = []
     foreign = []
     for rel in data.get("relationships", []):
-        from_nid, to_nid = rel["from"], rel["to"]
-        if from_nid not in valid_nids or to_nid not in valid_nids:
+        all_nids.add(rel["from"])
+        all_nids.add(rel["to"])
+        problem = check_relationship(rel, local_nids, valid_nids)
+        if problem == "unresolved":
             unresolved.append(rel)
-        elif from_nid not in local_nids and to_nid not in local_nids:
+        elif problem == "foreign":
             foreign.append(rel)
+    invalid_nids = sorted(nid for nid in all_nids if not Uuid.is_valid_uuid_v4(nid))
     return {"unresolved": unresolved, "foreign": foreign, "invalid_nids": invalid_nids}
 
 
+def check_relationship(rel, local_nids, valid_nids):
+    """Classify one relationship for `validate`.
+
+    Returns "unresolved" if an endpoint is neither local nor in `valid_nids`,
+    "foreign" if neither endpoint is local, and None otherwise.
+    """
+    from_nid, to_nid = rel["from"], rel["to"]
+    if from_nid not in valid_nids or to_nid not in valid_nids:
+        return "unresolved"
+    if from_nid not in local_nids and to_nid not in local_nids:
+        return "foreign"
+    return None
+
+
 def dependency_node_nids(data, resolve):
     """Collect nids of all nodes defined by direct and transitive dependencies.
 
@@ -73,28 +86,61 @@ def dependency_node_nids(data, resolve):
     return collected
 
 
+def group_relationships(relationships, local_nids):
+    """Group NFX relationships by type and endpoint locality for batched writes.
+
+    Returns a dict mapping `(type, from_local, to_local)` to a list of
+    `{"from", "to", "properties"}` rows. Endpoints that are not in `local_nids`
+    must be MERGEd rather than MATCHed, so they form separate groups.
+    """
+    groups = {}
+    for rel in relationships:
+        key = (rel["type"], rel["from"] in local_nids, rel["to"] in local_nids)
+        groups.setdefault(key, []).append({
+            "from": rel["from"],
+            "to": rel["to"],
+            "properties": rel.get("properties", {}),
+        })
+    return groups
+
+
 def read(path):
     """Read an NFX file and return its full contents as a dict."""
     with open(path) as f:
         return json.load(f)
 
 
-def write(path, nodes, relationships, nid="", name="", description="", version="",
-          dependencies=None):
-    """Write nodes and relationships to an NFX file.
+HEADER_KEYS = ("nid", "name", "version")
 
-    Strips `neuro.id` from node properties (it is stored as top-level `nid` on each node).
-    Omits empty `properties` dicts and empty relationship `properties`.
+
+def read_header(path, required=HEADER_KEYS):
+    """Read only the top-level metadata of an NFX file (everything but nodes and relationships).
+
+    Parsing stops at the first section when the metadata before it has every
+    key in `required`, so for files written by `write` or `NfxWriter` the cost
+    does not depend on the number of nodes. Otherwise the sections are skipped
+    to collect metadata written after them.
     """
-    for n in nodes:
-        n["properties"].pop("neuro.id", None)
-        if not n["properties"]:
-            del n["properties"]
+    with NfxReader(path) as reader:
+        if not all(key in reader.header for key in required):
+            reader.skip_sections()
+        return reader.header
 
-    for r in relationships:
-        if not r.get("properties"):
-            r.pop("properties", None)
 
+def _strip_node(node):
+    node.get("properties", {}).pop("neuro.id", None)
+    if "properties" in node and not node["properties"]:
+        del node["properties"]
+    return node
+
+
+def _strip_relationship(rel):
+    if not rel.get("properties"):
+        rel.pop("properties", None)
+    return rel
+
+
+def _header(nid="", name="", description="", version="", dependencies=None):
     data = {}
     if nid:
         data["nid"] = nid
@@ -106,9 +152,260 @@ def write(path, nodes, relationships, nid="", name="", description="", version="
         data["version"] = version
     if dependencies:
         data["dependencies"] = dependencies
+    return data
+
+
+def write(path, nodes, relationships, nid="", name="", description="", version="",
+          dependencies=None):
+    """Write nodes and relationships to an NFX file.
+
+    Strips `neuro.id` from node properties (it is stored as top-level `nid` on each node).
+    Omits empty `properties` dicts and empty relationship `properties`.
+    """
+    for n in nodes:
+        _strip_node(n)
+    for r in relationships:
+        _strip_relationship(r)
+
+    data = _header(nid, name, description, version, dependencies)
     data["nodes"] = nodes
     data["relationships"] = relationships
     with open(path, "w") as f:
         json.dump(data, f, default=str)
 
     return data
+
+
+SECTIONS = ("nodes", "relationships")
+
+
+class NfxReader:
+    """Incremental NFX reader.
+
+    Parses the file in `chunk_size` pieces and yields one node or relationship
+    at a time, so memory use is bounded by the largest single record::
+
+        with NfxReader(path) as reader:
+            reader.header          # nid, name, version, dependencies, ...
+            for node in reader.nodes(): ...
+            for rel in reader.relationships(): ...
+
+    Sections are read in file order. Asking for `relationships()` before
+    `nodes()` is exhausted discards the remaining nodes; if a file stores
+    relationships first, they are buffered until requested. Metadata keys
+    that appear after a section are added to `header` when reached, or at
+    once by `skip_sections`.
+    """
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, path, chunk_size=1 << 16):
+        self.path = path
+        self._chunk_size = chunk_size
+        self._file = open(path)
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._header = {}
+        self._started = False
+        self._pending = None
+        self._open = None
+        self._buffered = {}
+        self._done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def header(self):
+        if not self._started:
+            self._pending = self._next_section()
+        return self._header
+
+    def skip_sections(self):
+        """Skip the remaining sections, so that `header` holds all metadata of the file."""
+        if not self._started:
+            self._pending = self._next_section()
+        section = self._pending or self._next_section()
+        self._pending = None
+        self._buffered.clear()
+        while section is not None:
+            for _ in self._items():
+                pass
+            section = self._next_section()
+
+    def nodes(self):
+        """Yield NFX node dicts."""
+        return self._section("nodes")
+
+    def relationships(self):
+        """Yield NFX relationship dicts."""
+        return self._section("relationships")
+
+    def _section(self, name):
+        if name in self._buffered:
+            yield from self._buffered.pop(name)
+            return
+        while True:
+            section = self._pending if self._pending else self._next_section()
+            self._pending = None
+            if section is None:
+                return
+            if section == name:
+                # Not `yield from`: closing this generator early must leave
+                # the section open so the next one can drain it.
+                self._open = self._items()
+                for item in self._open:
+                    yield item
+                return
+            self._buffered[section] = list(self._items())
+
+    # Tokenizer
+
+    def _fill(self):
+        # Grow geometrically so a record spanning many chunks is not re-decoded chunk by chunk
+        chunk = self._file.read(max(self._chunk_size, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, *chars):
+        c = self._peek()
+        if c not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self._buffer, self._pos)
+        self._pos += 1
+        return c
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof or not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _next_section(self):
+        """Advance to the next section array, collecting metadata on the way.
+
+        Returns the section name, positioned after its `[`, or None at the end
+        of the document.
+        """
+        if self._open is not None:
+            for _ in self._open:
+                pass
+            self._open = None
+        if self._done:
+            return None
+        if not self._started:
+            self._expect("{")
+            self._started = True
+            if self._peek() == "}":
+                self._pos += 1
+                self._done = True
+                return None
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key in SECTIONS and self._peek() == "[":
+                self._pos += 1
+                return key
+            self._header[key] = self._value()
+            if self._expect(",", "}") == "}":
+                self._done = True
+                return None
+
+    def _items(self):
+        if self._peek() == "]":
+            self._pos += 1
+        else:
+            while True:
+                yield self._value()
+                if self._expect(",", "]") == "]":
+                    break
+        if self._expect(",", "}") == "}":
+            self._done = True
+
+
+class NfxWriter:
+    """Incremental NFX writer, the streaming counterpart of `write`.
+
+    Nodes and relationships are serialized as they arrive; the output is
+    identical to `write` for the same records. A partially written file is
+    removed if the block raises::
+
+        with NfxWriter(path, name="...", version="...") as writer:
+            writer.nodes(iter_nodes)
+            writer.relationships(iter_relationships)
+    """
+
+    def __init__(self, path, nid="", name="", description="", version="", dependencies=None):
+        self.path = path
+        self.header = _header(nid, name, description, version, dependencies)
+        self.counts = {"nodes": 0, "relationships": 0}
+        self._written = []
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "w")
+        header = json.dumps(self.header, default=str)[:-1]
+        self._file.write(header + (", " if self.header else ""))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            for section in SECTIONS:
+                if section not in self._written:
+                    self._section(section, [], None)
+            self._file.write("}")
+        self._file.close()
+        if exc_type is not None:
+            os.remove(self.path)
+
+    def nodes(self, nodes):
+        """Write node dicts with `nid`, `labels` and `properties`. Returns the count."""
+        return self._section("nodes", nodes, _strip_node)
+
+    def relationships(self, relationships):
+        """Write relationship dicts with `from`, `to`, `type` and `properties`. Returns the count."""
+        return self._section("relationships", relationships, _strip_relationship)
+
+    def _section(self, name, records, strip):
+        expected = SECTIONS[len(self._written)] if len(self._written) < len(SECTIONS) else None
+        if name != expected:
+            raise ValueError(f"NFX section {name!r} written out of order")
+        separator = ", " if self._written else ""
+        self._file.write(f'{separator}"{name}": [')
+        count = 0
+        for record in records:
+            if count:
+                self._file.write(", ")
+            self._file.write(json.dumps(strip(record) if strip else record, default=str))
+            count += 1
+        self._file.write("]")
+        self._written.append(name)
+        self.counts[name] = count
+        return count
@@ -2,6 +2,7 @@
 Neuro Query Language - NQL
 """
 
+import json
 import os
 
 import neo4j
@@ -11,6 +12,12 @@ from prompt_toolkit.history import FileHistory
 from neuro.base import NeuroBase
 import neuro.base.nql.handlers as handlers
 from neuro.base.nql.components import NqlParser
+from neuro.base.schema import OntologySnapshot
+from neuro.core.data.list import ListUtils
+from neuro.utils import terminal_style
+
+
+COMMENT_PREFIX = "#"
 
 
 def dispatch(nb, query, parser):
@@ -31,6 +38,158 @@ def dispatch(nb, query, parser):
     handler.handler(nb, tree)
 
 
+class ScriptReport:
+    """
+    Outcome of `run_script`, by line. Truthy when the script was committed.
+    """
+    def __init__(self):
+        self.statements = 0
+        self.errors = dict()
+        self.messages = dict()
+        self.committed = False
+
+    def __bool__(self):
+        return self.committed
+
+    def __repr__(self):
+        lines = [f"{terminal_style.FAIL} line {line}: {message}" for line, message in sorted(self.errors.items())]
+        lines += [f"{terminal_style.WARN} line {line}: {message}" for line, message in sorted(self.messages.items())]
+        if self.committed:
+            lines.append(f"{terminal_style.SUCCESS} {self.statements} statements committed")
+        else:
+            lines.append(f"{terminal_style.FAIL} Nothing written: {len(self.errors)} errors")
+        return "\n".join(lines)
+
+
+def _compile_script(text, parser, report):
+    """
+    Parse and compile every statement, one per line. Blank lines and lines
+    starting with `COMMENT_PREFIX` are skipped.
+    :return: list of (handler, tree, CompiledStatement or None)
+    """
+    compiled = list()
+    for line, query in enumerate(text.splitlines(), start=1):
+        query = query.strip()
+        if not query or query.startswith(COMMENT_PREFIX):
+            continue
+        try:
+            tree = parser.parse(query)
+        except Exception as e:
+            report.errors[line] = f"Syntax Error: {e}"
+            continue
+        handler = getattr(handlers, f"{tree.data}_handler", None)
+        if handler is None or not hasattr(handler, "compile_tree"):
+            report.errors[line] = f"No batch handler available for statement '{tree.data}'"
+            continue
+        try:
+            compiled.append((handler, tree, handler.compile_tree(tree, line=line)))
+        except ValueError as e:
+            report.errors[line] = str(e)
+    return compiled
+
+
+class _Replayed(Exception):
+    """Rolls back the transaction of `_locate_error`."""
+
+
+def _locate_error(nb, written, failed, error, report):
+    """
+    Find the line of the statement a chunk failed on. The chunks written
+    before it are replayed, then the failed chunk one statement at a time,
+    in a transaction that is always rolled back. If the error does not
+    recur, it is reported on the first line of the chunk.
+    :param written: list of (query, statements) committed before the failure
+    :param failed: (query, statements) of the chunk that failed
+    :param error: Neo4jError of the failed chunk
+    """
+    query, chunk = failed
+    try:
+        with nb.transaction():
+            for replay_query, replay_chunk in written:
+                nb.get_data(replay_query, {"rows": [statement.row for statement in replay_chunk]})
+            for statement in chunk:
+                try:
+                    nb.get_data(query, {"rows": [statement.row]})
+                except neo4j.exceptions.Neo4jError as e:
+                    report.errors[statement.row["line"]] = e.message
+                    raise
+            raise _Replayed
+    except (neo4j.exceptions.Neo4jError, _Replayed):
+        pass
+    if not report.errors:
+        lines = [statement.row["line"] for statement in chunk]
+        report.errors[lines[0]] = f"{error.message} (lines {lines[0]}-{lines[-1]}, {len(lines)} statements)"
+
+
+def run_script(nb, text, parser=None, chunk_size=1000):
+    """
+    Run a script of NQL statements, one per line, in one transaction.
+
+    Compiled statements are grouped by handler and query, each group written
+    as `UNWIND` chunks of `chunk_size` rows in source order; groups of a lower
+    stage run first. All node statements therefore run before any connection,
+    which matches its nodes on the properties they have at the end of the
+    script, not at its own line. A statement identical to the previous one for
+    the same node is skipped. Nothing is written if any line fails to parse or
+    compile, or if the database rejects a chunk; the rejected statement is
+    then found with `_locate_error`. Read-only statements run through their
+    handler after the commit.
+    :param nb: NeuroBase
+    :param text: script
+    :param parser: NqlParser, default the shared one
+    :return: ScriptReport
+    """
+    parser = parser or NqlParser.get()
+    report = ScriptReport()
+    compiled = _compile_script(text, parser, report)
+    report.statements = len(compiled)
+    if report.errors:
+        return report
+
+    groups = dict()
+    previous = dict()
+    for handler, _, statement in compiled:
+        if statement is None:
+            continue
+        row = {k: v for k, v in statement.row.items() if k not in ("line", "properties", "now")}
+        signature = json.dumps(row, sort_keys=True, default=str)
+        target = (statement.query, statement.row.get("label", signature))
+        if target in previous and previous[target][0] == signature:
+            report.messages[statement.row["line"]] = f"Same as line {previous[target][1]}"
+            continue
+        previous[target] = (signature, statement.row["line"])
+        groups.setdefault((statement.stage, handler.__name__, statement.query), list()).append(statement)
+
+    chunks = [
+        (query, chunk)
+        for (_, _, query), statements in sorted(groups.items(), key=lambda item: item[0][0])
+        for chunk in ListUtils.chunks(statements, chunk_size)
+    ]
+    written = 0
+    try:
+        with nb.transaction():
+            for query, chunk in chunks:
+                records = nb.get_data(query, {"rows": [statement.row for statement in chunk]})
+                by_line = dict()
+                for record in records:
+                    by_line.setdefault(record["line"], list()).append(record)
+                for statement in chunk:
+                    message = statement.message(by_line.get(statement.row["line"], []))
+                    if message:
+                        report.messages[statement.row["line"]] = message
+                written += 1
+    except neo4j.exceptions.Neo4jError as e:
+        _locate_error(nb, chunks[:written], chunks[written], e, report)
+        return report
+    report.committed = True
+    OntologySnapshot.invalidate()
+
+    for handler, tree, statement in compiled:
+        if statement is None:
+            handler.handler(nb, tree)
+    return report
+
+
 def session():
     """
     NQL CLI session.
@@ -42,7 +201,7 @@ def session():
     """
     nql_history_path = os.getenv("NQL_HISTORY", os.path.expanduser("~/.nql_history"))
     s = PromptSession(history=FileHistory(nql_history_path))
-    parser = NqlParser()
+    parser = NqlParser.get()
 
     with NeuroBase() as nb:
         while True:
@@ -0,0 +1,164 @@
+"""
+Compile NQL statements to parameterized Cypher.
+
+Every statement compiles to an `UNWIND $rows AS row` query and one row of
+parameters. The query text depends only on the statement kind and the
+ontology label or relationship type, never on literal values, so Neo4j
+plans it once and statements of the same shape can run as one batch.
+"""
+
+from neuro.core import Moment, Node
+
+
+NODE_TYPES = ("node", "property", "relationship")
+CONNECTION_TYPES = {
+    "require_property": "REQUIRE_PROPERTY",
+    "set_property": "HAS_PROPERTY",
+    "set_subclass": "SUBCLASS_OF",
+}
+RELATIONSHIP_TYPES = {
+    "set_relationship": "HAS_RELATIONSHIP",
+    "require_relationship": "REQUIRE_RELATIONSHIP",
+}
+
+NODE_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (e:`{ontology_label}` {{label: row.label}})
+WHERE all(key IN keys(row.match) WHERE e[key] = row.match[key])
+WITH row, count(e) > 0 AS unchanged
+FOREACH (_ IN CASE WHEN unchanged THEN [] ELSE [1] END |
+    MERGE (o:`{ontology_label}` {{label: row.label}})
+    ON CREATE SET
+        o += row.properties,
+        o.created = datetime(row.now),
+        o.modified = datetime(row.now)
+    ON MATCH SET
+        o += row.properties,
+        o.modified = datetime(row.now)
+)
+RETURN row.line AS line, unchanged
+"""
+
+CONNECT_QUERY = """
+UNWIND $rows AS row
+MATCH (o {{label: row.source.label}})
+WHERE all(key IN keys(row.source) WHERE o[key] = row.source[key])
+MATCH (t {{label: row.target.label}})
+WHERE all(key IN keys(row.target) WHERE t[key] = row.target[key])
+OPTIONAL MATCH (o)-[e:`{relationship_type}`]->(t)
+WITH row, o, t, count(e) > 0 AS unchanged
+MERGE (o)-[:`{relationship_type}`]->(t)
+RETURN row.line AS line, unchanged
+"""
+
+SET_RELATIONSHIP_QUERY = """
+UNWIND $rows AS row
+MATCH (o:OntologyNode {{label: row.source.label}})
+WHERE all(key IN keys(row.source) WHERE o[key] = row.source[key])
+MATCH (r:OntologyRelationship {{label: row.relationship.label}})
+WHERE all(key IN keys(row.relationship) WHERE r[key] = row.relationship[key])
+MATCH (t:OntologyNode {{label: row.target.label}})
+WHERE all(key IN keys(row.target) WHERE t[key] = row.target[key])
+OPTIONAL MATCH p = (o)-[:`{relationship_type}`]->(r)-[:HAS_TARGET]->(t)
+WITH row, o, r, t, count(p) > 0 AS unchanged
+MERGE (o)-[:`{relationship_type}`]->(r)
+MERGE (r)-[:HAS_TARGET]->(t)
+RETURN row.line AS line, unchanged
+"""
+
+
+class CompiledStatement:
+    """
+    One NQL statement as Cypher. `query` reads its parameters from `row`;
+    statements with the same `query` can share one `UNWIND`. A batch runs
+    lower stages first, so nodes exist before the edges that refer to them.
+    """
+    def __init__(self, kind, query, row, unchanged_message, missing_message=None, stage=0):
+        self.kind = kind
+        self.query = query
+        self.row = row
+        self.stage = stage
+        self.unchanged_message = unchanged_message
+        self.missing_message = missing_message
+
+    def __repr__(self):
+        return f"CompiledStatement({self.kind}, line={self.row.get('line')})"
+
+    def message(self, records):
+        """
+        Interpret the records the query returned for this statement's row.
+        :return: str to report, or None if the statement took effect
+        """
+        if not records:
+            return self.missing_message
+        if any(record["unchanged"] for record in records):
+            return self.unchanged_message
+        return None
+
+
+def _properties(properties):
+    return {key.strip("`"): value for key, value in properties.items()}
+
+
+def _node_map(node):
+    return {"label": node["label"].strip("`"), **_properties(node["properties"])}
+
+
+def compile_statement(data, line=None, now=None):
+    """
+    Compile a transformed ontology statement.
+    :param data: output of `NqlTransformer`
+    :param line: line number of the statement, returned with its records
+    :param now: ISO timestamp for created and modified, default the current moment
+    :return: CompiledStatement
+    :raises ValueError: if the statement does not write to the ontology or lacks a node
+    """
+    ontology_type = data["type"]
+    if ontology_type in CONNECTION_TYPES or ontology_type in RELATIONSHIP_TYPES:
+        if not data.get("target_node"):
+            raise ValueError(f"Missing target for {ontology_type}")
+    if ontology_type in RELATIONSHIP_TYPES and not data.get("relationship_node"):
+        raise ValueError(f"Missing relationship for {ontology_type}")
+    if ontology_type in NODE_TYPES:
+        label = data["label"].strip("`")
+        properties = _properties(data["properties"])
+        return CompiledStatement(
+            ontology_type,
+            NODE_QUERY.format(ontology_label="Ontology" + ontology_type.title()),
+            {
+                "line": line,
+                "label": label,
+                "match": properties,
+                "properties": {
+                    "neuro.id": Node.generate_neuro_id(),
+                    "title": f".ontology {label}",
+                    **properties,
+                },
+                "now": now or Moment().to_iso_z(),
+            },
+            "Nothing to add.",
+        )
+    if ontology_type in CONNECTION_TYPES:
+        return CompiledStatement(
+            ontology_type,
+            CONNECT_QUERY.format(relationship_type=CONNECTION_TYPES[ontology_type]),
+            {"line": line, "source": _node_map(data), "target": _node_map(data["target_node"])},
+            "Property already set.",
+            "Incorrect ontology nodes given.",
+            stage=1,
+        )
+    if ontology_type in RELATIONSHIP_TYPES:
+        return CompiledStatement(
+            ontology_type,
+            SET_RELATIONSHIP_QUERY.format(relationship_type=RELATIONSHIP_TYPES[ontology_type]),
+            {
+                "line": line,
+                "source": _node_map(data),
+                "relationship": _node_map(data["relationship_node"]),
+                "target": _node_map(data["target_node"]),
+            },
+            "Relationship already set.",
+            "Incorrect ontology nodes given.",
+            stage=1,
+        )
+    raise ValueError(f"Action not supported: {ontology_type}")
@@ -1,15 +1,65 @@
+import importlib.util
+import json
+import logging
+import os
+import threading
+
 from lark import Transformer, Lark, Tree, Token
+from lark.exceptions import GrammarError, LexError
 from lark.reconstruct import Reconstructor
 
-from neuro.utils import internal_utils
+from neuro.utils import exceptions, internal_utils
 
 
 class NqlParser(Lark):
-    def __init__(self, maybe_placeholders=True):
+    """
+    Parser of the NQL grammar in `nql-grammar.lark`.
+
+    Building one compiles the grammar, so use the shared instances of `get`.
+    """
+    _instances = dict()
+    _lock = threading.Lock()
+
+    def __init__(self, maybe_placeholders=True, parser="earley", cache=False, strict=False):
         nql_grammar_path = internal_utils.get_path("assets") / "nql-grammar.lark"
         with open(nql_grammar_path, "r") as f:
             nql_grammar = f.read()
-        super().__init__(nql_grammar, maybe_placeholders=maybe_placeholders)
+        super().__init__(nql_grammar, maybe_placeholders=maybe_placeholders,
+                         parser=parser, cache=cache, strict=strict)
+
+    @classmethod
+    def get(cls, maybe_placeholders=True):
+        """Return the process-wide parser for these options, building it on first use."""
+        with cls._lock:
+            if maybe_placeholders not in cls._instances:
+                cls._instances[maybe_placeholders] = cls._build(maybe_placeholders)
+            return cls._instances[maybe_placeholders]
+
+    @classmethod
+    def _build(cls, maybe_placeholders):
+        """
+        Build an LALR parser where the grammar allows, with the compiled grammar
+        cached under `NF_CACHE`, and an Earley parser otherwise. Conflicts are
+        only tolerated where Earley would resolve them the same way: with
+        `interegular` installed, strict mode also rejects terminal collisions.
+        Set `NQL_PARSER=earley` to skip the attempt.
+        """
+        if os.getenv("NQL_PARSER", "lalr") == "lalr":
+            try:
+                return cls(maybe_placeholders, parser="lalr", cache=cls._cache_path(maybe_placeholders),
+                           strict=importlib.util.find_spec("interegular") is not None)
+            except (GrammarError, LexError) as e:
+                logging.info(f"NQL grammar is not LALR(1), using Earley: {e}")
+        return cls(maybe_placeholders)
+
+    @staticmethod
+    def _cache_path(maybe_placeholders):
+        """Cache file under `NF_CACHE`, or True for Lark's temporary directory."""
+        try:
+            path = internal_utils.get_path("cache", create_if_missing=True)
+        except (KeyError, exceptions.InternalError, exceptions.InvalidPath, OSError):
+            return True
+        return str(path / f"nql-grammar-{'placeholders' if maybe_placeholders else 'plain'}.lark.cache")
 
 
 class NqlTransformer(Transformer):
@@ -49,7 +99,10 @@ class NqlTransformer(Transformer):
     @staticmethod
     def pair(items):
         key = str(items[0])
-        val = str(items[1]).strip('"')
+        try:
+            val = json.loads(items[1])
+        except ValueError:
+            val = str(items[1])[1:-1]
         return key, val
 
     @staticmethod
@@ -62,11 +115,12 @@ class NqlTransformer(Transformer):
 
 class NqlReconstructor(Reconstructor):
     def __init__(self, maybe_placeholders=False):
-        parser = NqlParser(maybe_placeholders=maybe_placeholders)
-        super().__init__(parser)
+        super().__init__(NqlParser.get(maybe_placeholders=maybe_placeholders))
 
 
 class NqlGenerator:
+    _reconstructor = None
+
     @staticmethod
     def properties(properties_dict):
         properties_tree = Tree(Token('RULE', 'properties'), [])
@@ -83,5 +137,8 @@ class NqlGenerator:
         return properties_tree
 
     def properties_string(self, properties):
+        # Building a reconstructor compiles the grammar; share one.
+        if NqlGenerator._reconstructor is None:
+            NqlGenerator._reconstructor = NqlReconstructor()
         properties_tree = self.properties(properties)
-        return NqlReconstructor().reconstruct(properties_tree)
+        return NqlGenerator._reconstructor.reconstruct(properties_tree)
@@ -1,8 +1,7 @@
 import json
 import os
 
-from neuro.base import nfx
-from neuro.base.schema import Metaproperties, Metarelationships, OntologyNodeInfo, Violations
+from neuro.base.schema import OntologyNodeInfo, OntologySnapshot, Violations
 from neuro.utils import terminal_components
 
 
@@ -44,6 +43,7 @@ class Ontology:
         DETACH DELETE n
         """
         self._nb.run_query(query)
+        OntologySnapshot.invalidate()
 
     def is_valid_node(self, node):
         """Validate a node against the ontology."""
@@ -60,7 +60,8 @@ class Ontology:
 
         Fetches every node whose label is a subclass (via SUBCLASS_OF) of any
         root ontology type (OntologyNode, OntologyRelationship, OntologyProperty),
-        together with all relationships between them.
+        together with all relationships between them. Records are streamed
+        into the file; returns a dict with the number of nodes and relationships.
         """
         ontology_objects = json.loads(os.environ["ONTOLOGY_OBJECTS"])
         node_query = f"""
@@ -71,26 +72,21 @@ class Ontology:
         WHERE type.label IN labels(n) AND n.`neuro.id` IS NOT NULL
         RETURN DISTINCT n.`neuro.id` as nid, labels(n) as labels, properties(n) as properties
         """
-        nodes = self._nb.get_data(node_query)
-        ids = [n["nid"] for n in nodes]
-
-        rel_query = """
-        MATCH (a)-[r]->(b)
-        WHERE a.`neuro.id` IN $ids AND b.`neuro.id` IN $ids
-        RETURN a.`neuro.id` as from, b.`neuro.id` as to,
-               type(r) as type, properties(r) as properties
-        """
-        relationships = self._nb.get_data(rel_query, {"ids": ids})
-
-        return nfx.write(path, nodes, relationships, name=name, description=description, version=version)
+        return self._nb.nodes.export_nfx(
+            path, name=name, description=description, version=version, query=node_query
+        )
 
 
 class ObjectValidator:
-    """Validates an object to be inserted into NeuroBase."""
+    """Validates an object to be inserted into NeuroBase.
+
+    Ontology lookups are served from the process-wide `OntologySnapshot`.
+    """
 
-    def __init__(self, nb, o):
+    def __init__(self, nb, o, snapshot=None):
         self.nb = nb
         self.object = o
+        self.snapshot = snapshot or OntologySnapshot.get(nb)
         self.violations = Violations()
 
     def get_violations(self, validate_relationships=False):
@@ -101,17 +97,11 @@ class ObjectValidator:
         return self.violations
 
     def validate_label(self, label):
-        query = """
-        MATCH (n:OntologyNode {label: $label})
-        RETURN n.label as label;
-        """
-        ontology_node = self.nb.get_data(query, parameters={"label": label})
-        if not ontology_node:
+        count = self.snapshot.count_label(label)
+        if not count:
             self.violations.undefined_labels.append(label)
-        elif len(ontology_node) > 1:
+        elif count > 1:
             raise ValueError(f"Multiple ontology nodes found with label: {label}")
-        else:
-            pass
 
     def validate_labels(self):
         for label in self.object.labels:
@@ -121,7 +111,7 @@ class ObjectValidator:
         for label in self.object.labels:
             if label in self.violations.undefined_labels:
                 continue
-            metaproperties = Metaproperties.from_ontology(self.nb, label)
+            metaproperties = self.snapshot.metaproperties(label)
             self.violations = metaproperties.validate_properties(self.object.properties, self.violations)
 
     def validate_relationships(self):
@@ -131,6 +121,5 @@ class ObjectValidator:
         for label in self.object.labels:
             if label in self.violations.undefined_labels:
                 continue
-            metarelationships = Metarelationships.from_ontology(self.nb, label)
+            metarelationships = self.snapshot.metarelationships(label)
             self.violations = metarelationships.validate_relationships(self.nb, neuro_id, self.violations)
-
@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 
 import neo4j
 
@@ -117,9 +118,13 @@ class Metaproperties(UserDict):
             p.label as property,
             root.label as deep_node
         """
-        data = nb.get_data(query)
+        return cls.from_records(node_label, nb.get_data(query))
+
+    @classmethod
+    def from_records(cls, node_label, records):
+        """Build Metaproperties from records shaped like the `from_ontology` query rows."""
         metaproperties = cls(node_label)
-        for mp in data:
+        for mp in records:
             metaproperties[mp["property"]] = Metaproperty(mp)
         return metaproperties
 
@@ -227,9 +232,13 @@ class Metarelationships(UserDict):
                r.target as target, r.relationship_type as relationship_type,
                r.direction as direction
         """
-        data = nb.get_data(query)
+        return cls.from_records(node_label, nb.get_data(query))
+
+    @classmethod
+    def from_records(cls, node_label, records):
+        """Build Metarelationships from records shaped like the `from_ontology` query rows."""
         metarelationships = cls(node_label)
-        for record in data:
+        for record in records:
             mr = Metarelationship(record)
             key = record["relationship"] + ":" + record["direction"]
             # Skip duplicate incoming entry for self-referential relationships
@@ -278,6 +287,262 @@ class Metarelationships(UserDict):
         return violations
 
 
+class OntologySnapshot:
+    """In-memory, compiled view of the whole ontology graph.
+
+    Loaded with two queries; the subclass closure, metaproperties and
+    metarelationships of every OntologyNode label are then computed in
+    process, so validation costs no further database round-trips.
+
+    A process-wide snapshot is served by `get()` and rebuilt whenever the
+    ontology version counter has been bumped with `invalidate()`.
+    """
+
+    _version = 0
+    _cache: dict = {}
+    _lock = threading.Lock()
+
+    def __init__(self, nodes, relationships, version=None):
+        """
+        :param nodes: dict of node id -> {"labels": [...], "properties": {...}}
+        :param relationships: list of {"source", "type", "target"} node id triples
+        :param version: ontology version the snapshot was built at
+        """
+        self.version = OntologySnapshot._version if version is None else version
+        self.nodes = nodes
+        self.relationships = relationships
+        self._outgoing = {node_id: [] for node_id in nodes}
+        self._incoming = {node_id: [] for node_id in nodes}
+        for rel in relationships:
+            self._outgoing[rel["source"]].append((rel["type"], rel["target"]))
+            self._incoming[rel["target"]].append((rel["type"], rel["source"]))
+        self._ancestors = {}
+        self._depths = {}
+        self.metaproperties_by_label = {}
+        self.metarelationships_by_label = {}
+        self._compile()
+
+    def __repr__(self):
+        return f"<OntologySnapshot version={self.version} nodes={len(self.nodes)} labels={len(self.labels)}>"
+
+    NODE_QUERY = """
+    MATCH (root:OntologyNode)
+    WHERE root.label IN $roots
+    MATCH (type)-[:SUBCLASS_OF*0..]->(root)
+    MATCH (n)
+    WHERE type.label IN labels(n)
+    RETURN DISTINCT elementId(n) as id, labels(n) as labels, properties(n) as properties
+    """
+
+    RELATIONSHIP_QUERY = """
+    MATCH (a)-[r]->(b)
+    WHERE elementId(a) IN $ids AND elementId(b) IN $ids
+    RETURN elementId(a) as source, type(r) as type, elementId(b) as target
+    """
+
+    @staticmethod
+    def _node_parameters():
+        return {"roots": list(json.loads(os.environ["ONTOLOGY_OBJECTS"]))}
+
+    @staticmethod
+    def _nodes(records):
+        return {record["id"]: {"labels": record["labels"], "properties": record["properties"]}
+                for record in records}
+
+    @classmethod
+    def load(cls, nb):
+        """Fetch all ontology instances and the relationships between them."""
+        version = cls._version
+        nodes = cls._nodes(nb.get_data(cls.NODE_QUERY, cls._node_parameters()))
+        relationships = nb.get_data(cls.RELATIONSHIP_QUERY, {"ids": list(nodes)})
+        return cls(nodes, relationships, version=version)
+
+    @classmethod
+    async def aload(cls, anb):
+        """Async counterpart of `load` for an `AsyncNeuroBase`."""
+        version = cls._version
+        nodes = cls._nodes(await anb.get_data(cls.NODE_QUERY, cls._node_parameters()))
+        relationships = await anb.get_data(cls.RELATIONSHIP_QUERY, {"ids": list(nodes)})
+        return cls(nodes, relationships, version=version)
+
+    @classmethod
+    def get(cls, nb):
+        """Return the process-wide snapshot for `nb`, reloading it if the ontology changed."""
+        key = getattr(nb, "uri", None)
+        with cls._lock:
+            snapshot = cls._cache.get(key)
+            if snapshot is None or snapshot.version != cls._version:
+                snapshot = cls.load(nb)
+                cls._cache[key] = snapshot
+            return snapshot
+
+    @classmethod
+    async def aget(cls, anb):
+        """Async counterpart of `get`; shares the process-wide cache."""
+        key = getattr(anb, "uri", None)
+        with cls._lock:
+            snapshot = cls._cache.get(key)
+        if snapshot is None or snapshot.version != cls._version:
+            snapshot = await cls.aload(anb)
+            with cls._lock:
+                if snapshot.version == cls._version:
+                    cls._cache[key] = snapshot
+        return snapshot
+
+    @classmethod
+    def invalidate(cls):
+        """Bump the ontology version so that cached snapshots are rebuilt on next use."""
+        with cls._lock:
+            cls._version += 1
+            cls._cache.clear()
+
+    def _label(self, node_id):
+        return self.nodes[node_id]["properties"].get("label")
+
+    def _find(self, neo4j_label, label=None):
+        return [node_id for node_id, node in self.nodes.items()
+                if neo4j_label in node["labels"]
+                and (label is None or node["properties"].get("label") == label)]
+
+    def ancestors(self, node_id):
+        """Reflexive transitive closure of SUBCLASS_OF from `node_id`, in breadth-first order."""
+        if node_id not in self._ancestors:
+            closure = [node_id]
+            seen = {node_id}
+            for current in closure:
+                for rel_type, target in self._outgoing[current]:
+                    if rel_type == "SUBCLASS_OF" and target not in seen:
+                        seen.add(target)
+                        closure.append(target)
+            self._ancestors[node_id] = closure
+        return self._ancestors[node_id]
+
+    def depth(self, node_id):
+        """Length of the longest SUBCLASS_OF path from `node_id`; a cycle ends the path."""
+        if node_id not in self._depths:
+            self._depths[node_id] = 0
+            parents = [target for rel_type, target in self._outgoing[node_id] if rel_type == "SUBCLASS_OF"]
+            self._depths[node_id] = max((self.depth(parent) + 1 for parent in parents), default=0)
+        return self._depths[node_id]
+
+    def _subclass_labels(self, neo4j_label, root_label):
+        """Labels of `neo4j_label` nodes that are subclasses of the `root_label` node."""
+        roots = set(self._find(neo4j_label, root_label))
+        return {self._label(node_id) for node_id in self._find(neo4j_label)
+                if roots.intersection(self.ancestors(node_id))}
+
+    def _compile(self):
+        ontology_objects = json.loads(os.environ["ONTOLOGY_OBJECTS"])
+        self.labels = {}
+        for node_id in self._find("OntologyNode"):
+            self.labels.setdefault(self._label(node_id), []).append(node_id)
+
+        property_links = self._subclass_labels("OntologyRelationship", "HAS_PROPERTY")
+        relationship_links = self._subclass_labels("OntologyRelationship", "HAS_RELATIONSHIP")
+        property_roots = set(self._find("OntologyNode", "OntologyProperty"))
+        property_depths = dict()
+        for node_id in self._find("OntologyNode"):
+            if property_roots.intersection(self.ancestors(node_id)):
+                label = self._label(node_id)
+                property_depths[label] = max(property_depths.get(label, 0), self.depth(node_id))
+        property_types = set(property_depths)
+
+        for label, ion_ids in self.labels.items():
+            mp_records = []
+            mr_outgoing = []
+            mr_incoming = []
+            for ion in ion_ids:
+                lineage = self.ancestors(ion)
+                deep_nodes = [self._label(n) for n in lineage
+                              if "OntologyNode" in self.nodes[n]["labels"]
+                              and self._label(n) in ontology_objects] or [None]
+                for on in lineage:
+                    on_node = self.nodes[on]
+                    edges = self._outgoing[on] + self._incoming[on]
+                    for rel_type, p in edges:
+                        if rel_type not in property_links:
+                            continue
+                        p_node = self.nodes[p]
+                        # Most specific property type first, so it wins over generic ones.
+                        matching = sorted(property_types.intersection(p_node["labels"]),
+                                          key=lambda t: (-property_depths[t], t))
+                        for property_type in matching:
+                            mp_records.append({
+                                "node_object": on_node["properties"],
+                                "node": self._label(on),
+                                "property_object": p_node["properties"],
+                                "relationship_type": rel_type,
+                                "property_type": property_type,
+                                "property": p_node["properties"].get("label"),
+                                "deep_node": deep_nodes[0],
+                            })
+                    for link_type, orel in self._outgoing[on]:
+                        if link_type not in relationship_links:
+                            continue
+                        if "OntologyRelationship" not in self.nodes[orel]["labels"]:
+                            continue
+                        targets = [t for rel_type, t in self._outgoing[orel]
+                                   if rel_type == "HAS_TARGET" and "OntologyNode" in self.nodes[t]["labels"]]
+                        for target in targets or [None]:
+                            mr_outgoing.append({
+                                "source": self._label(on),
+                                "relationship": self._label(orel),
+                                "target": self._label(target) if target else None,
+                                "relationship_type": link_type,
+                                "direction": "outgoing",
+                            })
+                    for rel_type, irel in self._incoming[on]:
+                        if rel_type != "HAS_TARGET" or "OntologyRelationship" not in self.nodes[irel]["labels"]:
+                            continue
+                        for link_type, isource in self._incoming[irel]:
+                            if link_type not in relationship_links:
+                                continue
+                            if "OntologyNode" not in self.nodes[isource]["labels"]:
+                                continue
+                            mr_incoming.append({
+                                "source": self._label(isource),
+                                "relationship": self._label(irel),
+                                "target": self._label(on),
+                                "relationship_type": link_type,
+                                "direction": "incoming",
+                            })
+
+            mr_records = {}
+            for record in mr_outgoing + mr_incoming:
+                if record["relationship"] is not None:
+                    mr_records.setdefault(tuple(record.values()), record)
+            self.metaproperties_by_label[label] = Metaproperties.from_records(label, mp_records)
+            self.metarelationships_by_label[label] = Metarelationships.from_records(label, mr_records.values())
+
+    def instances(self, kind):
+        """
+        Instances of the ontology object `kind`: every node labelled with a
+        subclass of it, once per such subclass.
+        :return: lod with keys "label", "ontology_object_type", "labels" and "properties"
+        """
+        roots = set(self._find("OntologyNode", kind))
+        types = {self._label(node_id) for node_id in self.nodes
+                 if roots.intersection(self.ancestors(node_id))} - {None}
+        return [
+            {"label": node["properties"].get("label"), "ontology_object_type": object_type,
+             "labels": node["labels"], "properties": node["properties"]}
+            for node in self.nodes.values()
+            for object_type in sorted(types.intersection(node["labels"]))
+        ]
+
+    def count_label(self, label):
+        """Number of OntologyNode instances defining `label`."""
+        return len(self.labels.get(label, []))
+
+    def metaproperties(self, label):
+        """Metaproperties for `label`; empty if the label is not defined."""
+        return self.metaproperties_by_label.get(label) or Metaproperties(label)
+
+    def metarelationships(self, label):
+        """Metarelationships for `label`; empty if the label is not defined."""
+        return self.metarelationships_by_label.get(label) or Metarelationships(label)
+
+
 class OntologyNodeInfo:
     def __init__(self, nb, label):
         self.nb = nb
@@ -0,0 +1,77 @@
+"""
+Connected components of undirected graphs.
+"""
+
+
+class DisjointSet:
+    """
+    Union-find over hashable items, with union by size and path halving.
+
+    Edges can be absorbed one at a time as they are streamed, in near-linear
+    time overall; only the items and one parent pointer each are kept.
+    """
+
+    def __init__(self, items=()):
+        self.parent = dict()
+        self.size = dict()
+        self.count = 0
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        return item in self.parent
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+            self.count += 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """
+        Merge the components of `a` and `b`.
+        :return: True if they were separate
+        """
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.count -= 1
+        return True
+
+    def groups(self):
+        """
+        :return: list of components as lists of items, largest first
+        """
+        groups = dict()
+        for item in self.parent:
+            groups.setdefault(self.find(item), list()).append(item)
+        return sorted(groups.values(), key=len, reverse=True)
+
+
+def components(nodes, edges):
+    """
+    Connected components of the graph induced by `nodes`, ignoring direction.
+    Edges with an end outside `nodes` are skipped.
+    :param nodes: iterable of hashable items
+    :param edges: iterable of (source, target), consumed lazily
+    :return: DisjointSet
+    """
+    disjoint_set = DisjointSet(nodes)
+    for source, target in edges:
+        if source in disjoint_set and target in disjoint_set:
+            disjoint_set.union(source, target)
+    return disjoint_set
@@ -1,3 +1,6 @@
+import itertools
+
+
 class ListUtils:
     @staticmethod
     def represent(li, level=0, display=True):
@@ -10,3 +13,16 @@ class ListUtils:
             print(representation_string)
         else:
             return representation_string
+
+    @staticmethod
+    def chunks(li, size):
+        """
+        Yield successive lists of at most `size` elements from `li`.
+        :param li: iterable, consumed lazily
+        :param size: maximum chunk length
+        """
+        if size < 1:
+            raise ValueError(f"Chunk size must be positive, got {size}")
+        iterator = iter(li)
+        while chunk := list(itertools.islice(iterator, size)):
+            yield chunk
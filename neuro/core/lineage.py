@@ -0,0 +1,146 @@
+"""
+Ancestor chains of tiddlers along `neuro.primary`.
+"""
+
+
+class LineageIndex:
+    """
+    Index of `neuro.primary` chains, built once from a parent map.
+
+    Every title in scope is classified in a single linear pass with colour
+    marking. Its chain either reaches the root, runs into a cycle, breaks at
+    a tiddler without `neuro.primary`, or leaves the scope. Requested chains
+    are memoised and extended by the chains of their descendants.
+    """
+    ROOTED = "rooted"
+    CYCLE = "cycle"
+    BROKEN = "broken"
+    OUT_OF_SCOPE = "out-of-scope"
+
+    def __init__(self, parents, root):
+        """
+        :param parents: dict of title to its `neuro.primary`, None where missing; the keys are the scope
+        :param root:
+        """
+        self.root = root
+        self.parents = parents
+        self.status = dict()
+        self.end = dict()
+        self.cycles = list()
+        self._chains = {root: (root,)}
+        self._classify()
+
+    @classmethod
+    def from_fields(cls, tw_fields, root):
+        """
+        :param tw_fields: lod with keys "title" and, where set, "neuro.primary"
+        :param root:
+        """
+        return cls({tf["title"]: tf.get("neuro.primary") for tf in tw_fields}, root)
+
+    def _classify(self):
+        """
+        Walk up from every unvisited title. Titles on the current path are grey;
+        reaching a grey title closes a cycle, reaching a classified one
+        (black) settles the whole path with its outcome.
+        """
+        for start in self.parents:
+            path = list()
+            grey = dict()
+            current = start
+            while True:
+                if current in self.status:
+                    status, end = self.status[current], self.end[current]
+                    break
+                if current == self.root:
+                    if current in self.parents:
+                        path.append(current)
+                    status, end = self.ROOTED, current
+                    break
+                if current in grey:
+                    cycle = path[grey[current]:]
+                    for title in cycle:
+                        self.status[title], self.end[title] = self.CYCLE, current
+                    self.cycles.append(self._canonical(cycle))
+                    path = path[:grey[current]]
+                    status, end = self.CYCLE, current
+                    break
+                if current not in self.parents:
+                    status, end = self.OUT_OF_SCOPE, current
+                    break
+                grey[current] = len(path)
+                path.append(current)
+                if self.parents[current] is None:
+                    status, end = self.BROKEN, current
+                    break
+                current = self.parents[current]
+            for title in path:
+                self.status[title], self.end[title] = status, end
+
+    @staticmethod
+    def _canonical(cycle):
+        # Ancestor first, rotated to the smallest title so each cycle has one form.
+        cycle = cycle[::-1]
+        i = cycle.index(min(cycle))
+        return cycle[i:] + cycle[:i]
+
+    def chain(self, title):
+        """
+        Return the root-first chain ending at `title`, or an empty list if the
+        chain does not reach the root.
+        :param title:
+        :return: list
+        """
+        if title != self.root and self.status.get(title) != self.ROOTED:
+            return list()
+        pending = list()
+        current = title
+        while current not in self._chains:
+            pending.append(current)
+            current = self.parents[current]
+        # Only requested chains are kept; memoising every prefix would cost O(depth²).
+        chain = self._chains[current] + tuple(reversed(pending))
+        self._chains[title] = chain
+        return list(chain)
+
+    def walk(self, title, limit):
+        """
+        Return up to `limit` titles from `title` upwards along `neuro.primary`,
+        staying within scope. Terminates on cycles.
+        :param title:
+        :param limit:
+        :return: list, `title` first
+        """
+        walked = list()
+        current = title
+        while current in self.parents and len(walked) < limit:
+            walked.append(current)
+            current = self.parents[current]
+        return walked
+
+    def titles(self, status):
+        """
+        :param status: one of ROOTED, CYCLE, BROKEN, OUT_OF_SCOPE
+        :return: list of titles with that status
+        """
+        return [title for title, s in self.status.items() if s == status]
+
+    def out_of_scope(self):
+        """
+        Return the titles whose `neuro.primary` points outside the scope,
+        mapped to that parent. Their descendants are left out.
+        :return: dict
+        """
+        return {title: parent for title in self.titles(self.OUT_OF_SCOPE)
+                if (parent := self.parents.get(title)) == self.end[title]}
+
+    def broken(self):
+        """
+        Return the titles in scope without `neuro.primary`, other than the root,
+        mapped to the number of titles whose chain breaks there.
+        :return: dict
+        """
+        counts = {title: 0 for title in self.titles(self.BROKEN) if self.end[title] == title}
+        for title in self.titles(self.BROKEN):
+            counts[self.end[title]] += 1
+        return counts
@@ -0,0 +1,185 @@
+"""
+References between tiddlers: links, transclusions and tags.
+"""
+
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+
+from neuro.utils import exceptions, internal_utils
+
+
+LINK_PATTERN = re.compile(r"\[\[(.*?)(?:\|(.*?))?\]\]")
+EXTERNAL_LINK_PATTERN = re.compile(r"^(?:file|http|https|mailto|ftp|irc|news|data|skype):[^\s]+(?:/|\b)", re.IGNORECASE)
+TRANSCLUSION_PATTERN = re.compile(r"(?<!\{)\{\{([^{}|]*)(?:\|\|([^|{}]+))?(?:\|[^{}]+)?\}\}(?!\})")
+TEXT_REFERENCE_PATTERN = re.compile(r"!!|##")
+STRING_LIST_PATTERN = re.compile(r"\[\[(.*?)\]\]|(\S+)")
+
+
+def parse_string_list(value):
+    """
+    Parse a TiddlyWiki string list such as `a [[b c]]`. Lists pass through.
+    :param value: str or list
+    :return: list
+    """
+    if isinstance(value, list):
+        return value
+    return [m.group(1) if m.group(1) is not None else m.group(2) for m in STRING_LIST_PATTERN.finditer(value or "")]
+
+
+def extract(tw_fields):
+    """
+    Extract the titles a tiddler refers to.
+    Links are [[Title]] and [[text|Title]], external links excluded.
+    Transclusions are {{Title}}, {{Title!!field}}, {{Title##index}} and their ||template.
+    :param tw_fields: dict
+    :return: dict of kind to sorted titles
+    """
+    text = tw_fields.get("text", "")
+    links = set()
+    for match in LINK_PATTERN.finditer(text):
+        target = match.group(2) or match.group(1)
+        if target and not EXTERNAL_LINK_PATTERN.match(target):
+            links.add(target)
+    transclusions = set()
+    for match in TRANSCLUSION_PATTERN.finditer(text):
+        reference, template = match.group(1), match.group(2)
+        target = TEXT_REFERENCE_PATTERN.split(reference, maxsplit=1)[0].strip()
+        if target:
+            transclusions.add(target)
+        if template and template.strip():
+            transclusions.add(template.strip())
+    return {
+        "links": sorted(links),
+        "transclusions": sorted(transclusions),
+        "tags": sorted(set(parse_string_list(tw_fields.get("tags")))),
+    }
+
+
+class LinkIndex:
+    """
+    Forward and backward references between tiddlers.
+
+    Each indexed tiddler keeps its `modified` stamp with the titles it links,
+    transcludes and is tagged with. `stale` names the tiddlers whose stamp
+    changed, so a refresh only parses those again. With a `path` the forward
+    map persists as JSON; the backward maps are rebuilt on load.
+    """
+    FORMAT = 1
+    KINDS = ("links", "transclusions", "tags")
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = dict()
+        self.back = {kind: defaultdict(set) for kind in self.KINDS}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("format") == self.FORMAT:
+                    for tid_title, entry in data.get("tiddlers", {}).items():
+                        self._add(tid_title, entry)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable link index cache {path}: {e}")
+
+    @classmethod
+    def default(cls, name):
+        """Return the cache `name` under `NF_CACHE`, or an in-memory index if it is not configured."""
+        try:
+            return cls(internal_utils.get_path("cache", create_if_missing=True) / f"{name}.json")
+        except (KeyError, exceptions.InternalError, exceptions.InvalidPath, OSError):
+            return cls()
+
+    def __contains__(self, tid_title):
+        return tid_title in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _add(self, tid_title, entry):
+        self.entries[tid_title] = entry
+        for kind in self.KINDS:
+            for target in entry[kind]:
+                self.back[kind][target].add(tid_title)
+
+    def remove(self, tid_title):
+        entry = self.entries.pop(tid_title, None)
+        if entry is None:
+            return
+        for kind in self.KINDS:
+            for target in entry[kind]:
+                sources = self.back[kind][target]
+                sources.discard(tid_title)
+                if not sources:
+                    del self.back[kind][target]
+        self._dirty = True
+
+    def stale(self, stamps):
+        """
+        :param stamps: lod with keys "title" and "modified"
+        :return: titles that are not indexed or whose `modified` changed
+        """
+        return [
+            tf["title"] for tf in stamps
+            if tf["title"] not in self.entries or self.entries[tf["title"]]["modified"] != tf.get("modified")
+        ]
+
+    def update(self, tw_fields, titles=None):
+        """
+        Parse tiddlers into the index, replacing their previous references.
+        :param tw_fields: lod with "title", "modified", "text" and "tags"
+        :param titles: all current titles; indexed tiddlers not among them are forgotten
+        """
+        for tf in tw_fields:
+            self.remove(tf["title"])
+            self._add(tf["title"], {"modified": tf.get("modified"), **extract(tf)})
+            self._dirty = True
+        if titles is not None:
+            current = set(titles)
+            for tid_title in [t for t in self.entries if t not in current]:
+                self.remove(tid_title)
+
+    def references(self, tid_title, kinds=KINDS):
+        """
+        :return: set of titles that `tid_title` refers to
+        """
+        entry = self.entries.get(tid_title)
+        if entry is None:
+            return set()
+        return {target for kind in kinds for target in entry[kind]}
+
+    def backlinks(self, target, kinds=("links",)):
+        """
+        :return: sorted titles that refer to `target`
+        """
+        return sorted({source for kind in kinds for source in self.back[kind].get(target, ())})
+
+    def missing(self, titles=None, kinds=("links",)):
+        """
+        Referenced titles that do not exist. System titles are skipped, since
+        shadow tiddlers cannot be told apart from missing ones here.
+        :param titles: existing titles, default the indexed ones
+        :param kinds: reference kinds to follow; TiddlyWiki counts only links as missing
+        :return: dict of missing title to sorted sources
+        """
+        existing = self.entries if titles is None else titles
+        targets = {target for kind in kinds for target in self.back[kind]}
+        return {
+            target: self.backlinks(target, kinds) for target in sorted(targets)
+            if target not in existing and not target.startswith("$:/")
+        }
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"format": self.FORMAT, "tiddlers": self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logging.warning(f"Could not write link index cache {self.path}: {e}")
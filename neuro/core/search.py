@@ -0,0 +1,277 @@
+"""
+Full-text search over tiddler fields.
+"""
+
+import logging
+import math
+import os
+import re
+import sqlite3
+from array import array
+from collections import defaultdict
+
+from neuro.utils import exceptions, internal_utils
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+QUERY_PATTERN = re.compile(r"\"([^\"]*)\"|(\S+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    title TEXT UNIQUE NOT NULL,
+    modified TEXT,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    document INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term, document)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_document ON postings (document);
+"""
+
+
+def tokenize(text):
+    """
+    Split text into casefolded word tokens.
+    :param text:
+    :return: list of str
+    """
+    return [m.group().casefold() for m in TOKEN_PATTERN.finditer(text)]
+
+
+def parse_query(query):
+    """
+    Parse a query into clauses, all of which must match.
+    Words are terms, "quoted words" are phrases, and a trailing * makes a prefix.
+    :param query:
+    :return: list of (kind, tokens), kind one of "term", "phrase", "prefix"
+    """
+    clauses = list()
+    for match in QUERY_PATTERN.finditer(query):
+        phrase, word = match.groups()
+        if word is not None and word.endswith("*"):
+            tokens = tokenize(word[:-1])
+            if len(tokens) == 1:
+                clauses.append(("prefix", tokens))
+                continue
+        tokens = tokenize(phrase if phrase is not None else word)
+        if len(tokens) == 1:
+            clauses.append(("term", tokens))
+        elif tokens:
+            clauses.append(("phrase", tokens))
+    return clauses
+
+
+def match_spans(text, query):
+    """
+    Character spans of the tokens in `text` that a query term, phrase word or prefix matches.
+    :param text:
+    :param query:
+    :return: list of (start, end)
+    """
+    words = set()
+    prefixes = list()
+    for kind, tokens in parse_query(query):
+        if kind == "prefix":
+            prefixes.append(tokens[0])
+        else:
+            words.update(tokens)
+    spans = list()
+    for m in TOKEN_PATTERN.finditer(text):
+        token = m.group().casefold()
+        if token in words or token.startswith(tuple(prefixes)):
+            spans.append(m.span())
+    return spans
+
+
+def _positions(fields):
+    """
+    Token positions of every field value. Fields are separated by a gap of one
+    position, so phrases do not match across fields.
+    """
+    postings = defaultdict(list)
+    position = 0
+    length = 0
+    for value in fields.values():
+        tokens = tokenize(str(value))
+        for token in tokens:
+            postings[token].append(position)
+            position += 1
+        length += len(tokens)
+        position += 1
+    return postings, length
+
+
+class FullTextIndex:
+    """
+    Persistent inverted index of tiddler fields with positional postings.
+
+    Stored in SQLite, so a search reads only the postings of its own terms.
+    Each document keeps the tiddler's `modified` stamp; `stale` names the
+    tiddlers to index again. Results are ranked with BM25.
+    """
+    FILENAME = "fts.sqlite3"
+    FORMAT = "1"
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, path=None):
+        self.path = path
+        self._db = sqlite3.connect(str(path) if path else ":memory:")
+        row = None
+        try:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        except sqlite3.OperationalError:
+            pass
+        except sqlite3.DatabaseError as e:
+            logging.warning(f"Replacing unreadable full-text index {path}: {e}")
+            self._db.close()
+            os.remove(path)
+            self._db = sqlite3.connect(str(path))
+        if row is None or row[0] != self.FORMAT:
+            if row is not None:
+                logging.info(f"Rebuilding full-text index {path} of format {row[0]}")
+            self._db.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS documents; DROP TABLE IF EXISTS postings;")
+            self._db.executescript(SCHEMA)
+            with self._db:
+                self._db.execute("INSERT INTO meta VALUES ('format', ?)", (self.FORMAT,))
+
+    @classmethod
+    def default(cls, name=None):
+        """Return the index `name` under `NF_CACHE`, or an in-memory index if it is not configured."""
+        try:
+            path = internal_utils.get_path("cache", create_if_missing=True)
+        except (KeyError, exceptions.InternalError, exceptions.InvalidPath, OSError):
+            return cls()
+        return cls(path / (f"{name}.sqlite3" if name else cls.FILENAME))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def clear(self):
+        with self._db:
+            self._db.execute("DELETE FROM postings")
+            self._db.execute("DELETE FROM documents")
+
+    def stale(self, stamps):
+        """
+        :param stamps: lod with keys "title" and "modified"
+        :return: titles that are not indexed or whose `modified` changed
+        """
+        indexed = dict(self._db.execute("SELECT title, modified FROM documents"))
+        return [
+            tf["title"] for tf in stamps
+            if tf["title"] not in indexed or indexed[tf["title"]] != tf.get("modified")
+        ]
+
+    def _remove(self, tid_title):
+        row = self._db.execute("SELECT id FROM documents WHERE title = ?", (tid_title,)).fetchone()
+        if row:
+            self._db.execute("DELETE FROM postings WHERE document = ?", row)
+            self._db.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def update(self, fields_list, titles=None):
+        """
+        Index tiddlers, replacing their previous postings, in one transaction.
+        :param fields_list: iterable of tiddler fields with "title" and "modified"
+        :param titles: all current titles; indexed tiddlers not among them are removed
+        """
+        with self._db:
+            for fields in fields_list:
+                self._remove(fields["title"])
+                postings, length = _positions(fields)
+                cursor = self._db.execute(
+                    "INSERT INTO documents (title, modified, length) VALUES (?, ?, ?)",
+                    (fields["title"], fields.get("modified"), length))
+                self._db.executemany(
+                    "INSERT INTO postings VALUES (?, ?, ?)",
+                    ((term, cursor.lastrowid, array("I", positions).tobytes()) for term, positions in postings.items()))
+            if titles is not None:
+                current = set(titles)
+                removed = [t for (t,) in self._db.execute("SELECT title FROM documents") if t not in current]
+                for tid_title in removed:
+                    self._remove(tid_title)
+
+    def _postings(self, term):
+        rows = self._db.execute("SELECT document, positions FROM postings WHERE term = ?", (term,))
+        return {document: array("I", positions) for document, positions in rows}
+
+    def _frequencies(self, kind, tokens):
+        """Return {document: frequency} of one query clause."""
+        if kind == "term":
+            return {document: len(positions) for document, positions in self._postings(tokens[0]).items()}
+        if kind == "prefix":
+            frequencies = defaultdict(int)
+            rows = self._db.execute(
+                "SELECT document, positions FROM postings WHERE term >= ? AND term < ?",
+                (tokens[0], tokens[0] + "\U0010ffff"))
+            for document, positions in rows:
+                frequencies[document] += len(positions) // array("I").itemsize
+            return dict(frequencies)
+
+        postings = [self._postings(token) for token in tokens]
+        documents = set(postings[0]).intersection(*postings[1:])
+        frequencies = dict()
+        for document in documents:
+            following = [set(p[document]) for p in postings[1:]]
+            count = sum(
+                1 for start in postings[0][document]
+                if all(start + i + 1 in positions for i, positions in enumerate(following))
+            )
+            if count:
+                frequencies[document] = count
+        return frequencies
+
+    def search(self, query, limit=20):
+        """
+        Rank the tiddlers matching every clause of `query` by BM25.
+        :param query: see `parse_query`
+        :param limit: maximum number of results
+        :return: list of (title, score), best first
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return list()
+        frequencies = list()
+        for kind, tokens in clauses:
+            clause_frequencies = self._frequencies(kind, tokens)
+            if not clause_frequencies:
+                return list()
+            frequencies.append(clause_frequencies)
+        documents = set(frequencies[0]).intersection(*frequencies[1:])
+        if not documents:
+            return list()
+
+        total, average_length = self._db.execute("SELECT COUNT(*), AVG(length) FROM documents").fetchone()
+        average_length = average_length or 1
+        lengths = dict()
+        ids = sorted(documents)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT id, title, length FROM documents WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            lengths.update({document: (tid_title, length) for document, tid_title, length in rows})
+
+        scores = defaultdict(float)
+        for clause_frequencies in frequencies:
+            df = len(clause_frequencies)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for document in documents:
+                tf = clause_frequencies[document]
+                norm = self.K1 * (1 - self.B + self.B * lengths[document][1] / average_length)
+                scores[document] += idf * tf * (self.K1 + 1) / (tf + norm)
+        ranked = sorted(documents, key=lambda d: (-scores[d], lengths[d][0]))
+        return [(lengths[d][0], scores[d]) for d in ranked[:limit]]
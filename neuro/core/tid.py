@@ -3,6 +3,7 @@ Object associated with TiddlyWiki5 and related data.
 """
 import json
 import logging
+import mmap
 import os
 import re
 from pathlib import Path
@@ -11,6 +12,7 @@ import subprocess
 
 from bs4 import BeautifulSoup as Soup
 from bs4.element import Tag
+from lxml import etree
 
 from neuro.core import Node, Moment
 from neuro.core.file.text import TextHtml
@@ -234,10 +236,18 @@ class TiddlerList(list[Tiddler]):
     """
     A collection of Tiddler instances. This class exhibits the functionality of
     list and dict data types.
+
+    Titles and uuids are unique. They are tracked in `tiddler_index` and
+    `uuid_index`, which every mutating list method keeps in sync, so duplicate
+    detection and lookups do not scan the list. Renaming a tiddler after it
+    was added is not tracked.
     """
+    CONFLICT_MESSAGE = "TiddlerList object already contains Tiddler with {}: {}"
+
     def __init__(self, tiddler_list=None, *args):
         super().__init__(*args)
         self.tiddler_index = dict()
+        self.uuid_index = dict()
         if tiddler_list is not None:
             self.extend(tiddler_list)
 
@@ -257,6 +267,78 @@ class TiddlerList(list[Tiddler]):
     def __contains__(self, tid_title):
         return tid_title in self.tiddler_index
 
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._from_unique(super().__getitem__(key))
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        old = super().__getitem__(key) if isinstance(key, slice) else [super().__getitem__(key)]
+        new = list(value) if isinstance(key, slice) else [value]
+        for tiddler in old:
+            self._unindex(tiddler)
+        accepted = []
+        try:
+            for tiddler in new:
+                if not self._admit(tiddler):
+                    raise ValueError(f"Cannot set {tiddler!s}: invalid or duplicate tiddler")
+                self._index(tiddler)
+                accepted.append(tiddler)
+            # Extended slices reject a length mismatch only here; restore the indexes then too.
+            super().__setitem__(key, new if isinstance(key, slice) else value)
+        except ValueError:
+            for tiddler in accepted:
+                self._unindex(tiddler)
+            for tiddler in old:
+                self._index(tiddler)
+            raise
+
+    def __delitem__(self, key):
+        removed = super().__getitem__(key) if isinstance(key, slice) else [super().__getitem__(key)]
+        for tiddler in removed:
+            self._unindex(tiddler)
+        super().__delitem__(key)
+
+    def __iadd__(self, tiddler_list):
+        self.extend(tiddler_list)
+        return self
+
+    def __reduce__(self):
+        # Rebuild the indexes from the items on copy, deepcopy and unpickling.
+        return self.__class__, (list(self),)
+
+    @classmethod
+    def _from_unique(cls, tiddlers):
+        """Build a TiddlerList from tiddlers known to be unique, skipping conflict checks."""
+        tiddler_list = cls()
+        for tiddler in tiddlers:
+            tiddler_list._index(tiddler)
+        list.extend(tiddler_list, tiddlers)
+        return tiddler_list
+
+    def _admit(self, tiddler):
+        """Check that `tiddler` can be added without a type, title or uuid conflict."""
+        if not isinstance(tiddler, Tiddler):
+            logging.error(f"Cannot append object of type {type(tiddler)}")
+            return False
+        if tiddler.title in self.tiddler_index:
+            logging.warning(self.CONFLICT_MESSAGE.format("title", tiddler.title))
+            return False
+        if tiddler.uuid and tiddler.uuid in self.uuid_index:
+            logging.warning(self.CONFLICT_MESSAGE.format("uuid", tiddler.uuid))
+            return False
+        return True
+
+    def _index(self, tiddler):
+        self.tiddler_index[tiddler.title] = tiddler
+        if tiddler.uuid:
+            self.uuid_index[tiddler.uuid] = tiddler
+
+    def _unindex(self, tiddler):
+        self.tiddler_index.pop(tiddler.title, None)
+        if tiddler.uuid:
+            self.uuid_index.pop(tiddler.uuid, None)
+
     @classmethod
     def from_json(cls, json_path):
         """
@@ -264,31 +346,14 @@ class TiddlerList(list[Tiddler]):
         :param json_path:
         :return:
         """
-        tiddler_list = cls()
         with open(json_path) as f:
             json_object = json.load(f)
-        for fields in json_object:
-            tiddler = Tiddler.from_fields(fields)
-            tiddler_list.append(tiddler)
-        return tiddler_list
+        return cls(Tiddler.from_fields(fields) for fields in json_object)
 
     def append(self, tiddler: Tiddler):
-        if not isinstance(tiddler, Tiddler):
-            logging.error(f"Cannot append object of type {type(tiddler)}")
-            return
-
-        # Checking for conflicts
-        conflict_message = "TiddlerList object already contains Tiddler with {}: {}"
-        if tiddler.title in [t.title for t in self]:
-            logging.warning(conflict_message.format("title", tiddler.title))
-            return
-        if tiddler.uuid and tiddler.uuid in [t.uuid for t in self]:
-            logging.warning(conflict_message.format("uuid", tiddler.uuid))
-            return
-
-        # Writing
-        self.tiddler_index[tiddler.title] = tiddler
-        super().append(tiddler)
+        if self._admit(tiddler):
+            self._index(tiddler)
+            super().append(tiddler)
 
     def chain(self, initial_tag=""):
         """
@@ -301,19 +366,42 @@ class TiddlerList(list[Tiddler]):
             tiddler.fields["neuro.primary"] = current_tag
             current_tag = tiddler.title
 
+    def clear(self):
+        self.tiddler_index.clear()
+        self.uuid_index.clear()
+        super().clear()
+
     def display(self):
         print(self.__repr__())
 
     def extend(self, tiddler_list: list[Tiddler]):
+        """
+        Append many tiddlers at once. Conflicts are checked against the indexes
+        and within the batch; conflicting tiddlers are skipped as in `append`.
+        """
+        accepted = []
         for tiddler in tiddler_list:
-            self.append(tiddler)
+            if self._admit(tiddler):
+                self._index(tiddler)
+                accepted.append(tiddler)
+        super().extend(accepted)
+
+    def insert(self, index, tiddler: Tiddler):
+        if self._admit(tiddler):
+            self._index(tiddler)
+            super().insert(index, tiddler)
+
+    def pop(self, index=-1):
+        tiddler = super().pop(index)
+        self._unindex(tiddler)
+        return tiddler
 
     def remove(self, tid_title):
         if tid_title not in self:
             raise ValueError(f"Tiddler {tid_title} not found.")
 
         tiddler = self.tiddler_index[tid_title]
-        del self.tiddler_index[tid_title]
+        self._unindex(tiddler)
         super().remove(tiddler)
 
     def write(self, dir_path):
@@ -338,13 +426,57 @@ class TiddlywikiHtml(TextHtml):
     def __contains__(self, tid_title):
         return self.tiddler_list.__contains__(tid_title)
 
+    STORE_MARKER = b'class="tiddlywiki-tiddler-store"'
+    STORE_AREA_MARKER = b'id="storeArea"'
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a TiddlyWiki HTML file of any version, choosing the fast reader
+        for its store format.
+        :param path: path to the HTML file
+        :return: TiddlywikiHtml
+        """
+        if cls._store_blocks(path) is not None:
+            return cls.from_html(path)
+        return cls.from_html_legacy(path)
+
+    @classmethod
+    def _store_blocks(cls, path):
+        """
+        Return the raw JSON of every tiddler store block in the file, found by
+        a byte-level scan of the memory-mapped file, or None if there is none.
+        TiddlyWiki escapes `<` inside the store, so a block ends at the first
+        `</script>`.
+        """
+        with open(path, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                blocks = []
+                position = mm.find(cls.STORE_MARKER)
+                while position != -1:
+                    start = mm.find(b">", position) + 1
+                    end = mm.find(b"</script>", start)
+                    if not start or end == -1:
+                        raise exceptions.InternalError(f"Unterminated tiddler store in {path}")
+                    blocks.append(mm[start:end])
+                    position = mm.find(cls.STORE_MARKER, end)
+        return blocks or None
+
     @classmethod
     def from_html_legacy(cls, html):
         """
         For HTML files up to and including TiddlyWiki v5.1.23.
+        A file path is read with a streaming lxml parser that stops after the
+        store area; markup and soups go through BeautifulSoup.
         :param html:
         :return:
         """
+        if isinstance(html, (str, os.PathLike)) and os.path.isfile(html):
+            tw = cls(html)
+            tw.tiddler_list.extend(cls._iter_store_area(html))
+            return tw
         if isinstance(html, str):
             with open(html) as f:
                 tw_soup = Soup(f, "html.parser")
@@ -366,22 +498,52 @@ class TiddlywikiHtml(TextHtml):
 
         return tw
 
+    @staticmethod
+    def _iter_store_area(path):
+        """
+        Yield the tiddlers of a legacy `storeArea` div, parsing the file
+        incrementally and discarding each element once it is read.
+        """
+        depth = 0
+        events = etree.iterparse(str(path), events=("start", "end"), html=True, tag="div", huge_tree=True)
+        for event, element in events:
+            if event == "start":
+                if depth or element.get("id") == "storeArea":
+                    depth += 1
+                continue
+            if not depth:
+                element.clear()
+                continue
+            depth -= 1
+            if depth == 1:
+                fields = dict(element.attrib)
+                fields["text"] = "".join(element.itertext())
+                if "title" in fields:
+                    yield Tiddler(fields["title"], fields)
+                else:
+                    logging.error(f"No title in storeArea div: {fields}")
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+            elif depth == 0:
+                return
+
     @classmethod
     def from_html(cls, html):
         """
         “For HTML files starting from TiddlyWiki v5.2.0 and later.”
-        :param html:
+        The JSON tiddler stores are located with a byte-level scan, without
+        parsing the HTML.
+        :param html: path to the HTML file
         :return:
         """
-        with open(html) as f:
-            tw_soup = Soup(f, "html.parser")
+        blocks = cls._store_blocks(html)
+        if blocks is None:
+            raise AttributeError(f"No tiddlywiki-tiddler-store in {html}")
 
         tw = cls(html)
-
-        store_area_json = tw_soup.find('script', class_='tiddlywiki-tiddler-store').text
-        for fields in json.loads(store_area_json):
-            tiddler = Tiddler.from_fields(fields)
-            tw.tiddler_list.append(tiddler)
+        for block in blocks:
+            tw.tiddler_list.extend(Tiddler.from_fields(fields) for fields in json.loads(block))
 
         return tw
 
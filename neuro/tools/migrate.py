@@ -3,8 +3,10 @@ NeuroWiki migration tools
 """
 
 import json
+import os
 import shutil
 
+import neo4j
 import tqdm
 
 from neuro.core import Moment, Node
@@ -67,11 +69,12 @@ def migrate_wf_to_neo4j(wf_path, port=8222, **kwargs):
                 "[all[tiddlers]!is[system]] [is[system]has[neuro.id]]",
                 port=port, **kwargs
             )
-            for tid_title in tqdm.tqdm(tid_titles):
-                fields = tw_get.fields(tid_title, port=port, **kwargs)
-                del fields["revision"]
-                node = Node(labels=["Tiddler"], uuid=fields["neuro.id"], properties=fields)
-                nb.nodes.put(node)
+            with nb.session():
+                for tid_title in tqdm.tqdm(tid_titles):
+                    fields = tw_get.fields(tid_title, port=port, **kwargs)
+                    del fields["revision"]
+                    node = Node(labels=["Tiddler"], uuid=fields["neuro.id"], properties=fields)
+                    nb.nodes.put(node)
             print(f"Finished importing {len(tid_titles)} tiddlers")
 
 
@@ -88,16 +91,47 @@ def migrate_neo4j_to_wf(wf_path, port=8222, **kwargs):
     shutil.rmtree(wf_path, ignore_errors=True)
     wf = WikiFolder(wf_path, tw5=tw_path, port=port, **kwargs)
     with wf:
-        for fields in fields_list:
-            fields = prepare_object(fields)
-            tw_put.fields(fields, port=port, params={"preserve": "yes"})
+        report = tw_put.fields_batch(
+            (prepare_object(fields) for fields in fields_list),
+            port=port, params={"preserve": "yes"}
+        )
+        print(f"Finished putting {len(report.succeeded)} tiddlers, {len(report.failed)} failed")
+
+
+def write_json_list(json_path, items):
+    """
+    Write an iterable to a JSON array one item at a time, so that
+    the full list never has to be held in memory. The array is moved
+    into place when complete; a failure while iterating leaves no file.
+    """
+    part_path = f"{json_path}.part"
+    try:
+        with open(part_path, "w+") as f:
+            f.write("[")
+            for i, item in enumerate(items):
+                if i:
+                    f.write(", ")
+                json.dump(item, f)
+            f.write("]")
+    except BaseException:
+        os.remove(part_path)
+        raise
+    os.replace(part_path, json_path)
 
 
 def migrate_neo4j_to_json(json_path):
+    """
+    Write all tiddler fields from Neo4j to a JSON file.
+    :param json_path:
+    :return: True if the file was written
+    """
     with NeuroBase() as nb:
-        fields_list = nb.tiddlers.all_fields()
-    with open(json_path, "w+") as f:
-        json.dump(fields_list, f)
+        try:
+            write_json_list(json_path, nb.tiddlers.iter_fields())
+        except (neo4j.exceptions.Neo4jError, neo4j.exceptions.DriverError) as e:
+            print(f"Error reading from Neo4j: {e}")
+            return False
+    return True
 
 
 def migrate_wf_to_json(wf_path, json_path, port=8222, **kwargs):
@@ -109,9 +143,6 @@ def migrate_wf_to_json(wf_path, json_path, port=8222, **kwargs):
 
 
 def migrate_html_to_wf(html_path, wf_path, port=8222, **kwargs):
-    try:
-        ntw = TiddlywikiHtml().from_html(html_path)
-    except AttributeError:
-        ntw = TiddlywikiHtml().from_html_legacy(html_path)
+    ntw = TiddlywikiHtml.load(html_path)
 
     ntw.write_to_wf(wf_path, port=port, **kwargs)
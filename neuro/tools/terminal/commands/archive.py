@@ -1,7 +1,6 @@
 """
 Archive tiddlers.
 """
-import json
 import os
 import sys
 
@@ -28,7 +27,9 @@ def archive():
         os.makedirs(archive_path, exist_ok=True)
         json_path = f"{archive_path}/{moment_prog}.json"
 
-        migrate.migrate_neo4j_to_json(json_path)
+        if not migrate.migrate_neo4j_to_json(json_path):
+            print(f"{terminal_style.FAIL} Wiki not archived")
+            sys.exit(1)
         print(f"{terminal_style.SUCCESS} Wiki archived")
 
 
@@ -38,12 +39,10 @@ def archive_ontology():
     WHERE o:OntologyNode OR o:OntologyProperty OR o:OntologyRelationship
     RETURN o, r, t;   
     """
-    with NeuroBase() as nb:
-        data = nb.get_data(query)
     ontology_archive_path = (internal_utils.get_path('archive', create_if_missing=True)
                              / "ontology" / f"{time_utils.MOMENT_4}.json")
-    with open(ontology_archive_path, "w+") as f:
-        json.dump(data, f)
+    with NeuroBase() as nb:
+        migrate.write_json_list(ontology_archive_path, nb.stream(query))
 
     print(f"{terminal_style.SUCCESS} Ontology archived")
 
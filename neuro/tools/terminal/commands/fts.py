@@ -2,61 +2,127 @@
 Full-text search
 """
 
-import re
+import hashlib
 
 import click
+import neo4j
 
 from neuro.base import NeuroBase
 from neuro.core.data.dict import DictUtils
+from neuro.core.search import FullTextIndex, match_spans
 from neuro.tools.terminal.cli import pass_environment
 from neuro.utils import terminal_style
 
 
-@click.command("fts", short_help="full-text search")
-@click.argument("query", required=True)
-@pass_environment
-def cli(ctx, query):
-    with NeuroBase() as nb:
-        fields_list = nb.tiddlers.all_fields()
-    matches = dict()
-    for fields in fields_list:
-        title = fields["title"]
-        for key, value in fields.items():
-            if query in str(value):
-                if title not in matches:
-                    matches[title] = dict()
-                matches[title][key] = value
+SNIPPET_CONTEXT = 30
+
+
+def highlight(value, spans):
+    """
+    Wrap the spans of a value in the highlight style.
+    """
+    highlighted = str()
+    last = 0
+    for start, end in spans:
+        highlighted += value[last:start] + terminal_style.RED + value[start:end] + terminal_style.RESET
+        last = end
+    return highlighted + value[last:]
+
+
+def snippets(value, spans):
+    """
+    Highlighted excerpts of a long value around each match.
+    """
+    excerpts = list()
+    for start, end in spans:
+        excerpt_start = max(start - SNIPPET_CONTEXT, 0)
+        excerpt_end = min(end + SNIPPET_CONTEXT, len(value))
+        excerpts.append(highlight(value[excerpt_start:excerpt_end], [(start - excerpt_start, end - excerpt_start)]))
+    return excerpts
+
+
+def refresh(nb, index):
+    """
+    Index the tiddlers that are new or changed since the last search, and
+    forget the removed ones.
+    """
+    stamps = nb.tiddlers.stamps()
+    stale = index.stale(stamps)
+    if stale:
+        print(f"Indexing {len(stale)} tiddlers")
+        index.update(nb.tiddlers.iter_fields_by_title(stale), titles=[s["title"] for s in stamps])
+    elif len(index) != len(stamps):
+        index.update([], titles=[s["title"] for s in stamps])
+
 
+def render(results, query):
+    """
+    Print ranked tiddlers with the matching fields highlighted.
+    :param results: list of (fields, score), best first
+    :param query:
+    """
     styled_matches = dict()
-    for key, value in matches.items():
-        key = terminal_style.BOLD + key + terminal_style.RESET
-        styled_matches[key] = dict()
-        for k, v in value.items():
-            v = str(v).replace("\n", " ")
-            if k == "text":
-                styled_matches[key]["text"] = list()
-                for match in re.finditer(query, v):
-                    if match.start() < 10:
-                        start = 0
-                    else:
-                        start = match.start() - 10
-                    if match.end() > len(v) - 10:
-                        end = len(v)
-                    else:
-                        end = match.end() + 10
-                    styled_matches[key]["text"].append(str(
-                        v[start:match.start()]
-                        + terminal_style.RED
-                        + v[match.start():match.end()]
-                        + terminal_style.RESET
-                        + v[match.end():end]))
+    for fields, score in results:
+        styled_title = f"{terminal_style.BOLD}{fields['title']}{terminal_style.RESET} ({score:.2f})"
+        styled_matches[styled_title] = dict()
+        for key, value in fields.items():
+            value = str(value).replace("\n", " ")
+            spans = match_spans(value, query)
+            if not spans:
+                continue
+            if key == "text":
+                styled_matches[styled_title]["text"] = snippets(value, spans)
             else:
-                styled_matches[key][k] = v.replace(query, str(
-                    terminal_style.RED
-                    + query
-                    + terminal_style.RESET))
+                styled_matches[styled_title][key] = highlight(value, spans)
+
+    DictUtils.represent(styled_matches, sort=False)
+
+
+def search_local(nb, query, skip, limit, rebuild):
+    name = "fts-" + hashlib.sha1(str(nb.uri).encode()).hexdigest()[:16]
+    with FullTextIndex.default(name) as index:
+        if rebuild:
+            index.clear()
+        refresh(nb, index)
+        ranked = index.search(query, skip + limit)[skip:]
+    fields_by_title = {fields["title"]: fields for fields in nb.tiddlers.iter_fields_by_title(t for t, _ in ranked)}
+    return [(fields_by_title[title], score) for title, score in ranked if title in fields_by_title]
+
+
+def search_server(nb, query, skip, limit, rebuild):
+    if rebuild:
+        nb.drop_fulltext_index()
+    state = nb.ensure_fulltext_index()
+    if state != "existing":
+        print(f"Full-text index {state}")
+    try:
+        records = nb.fulltext_search(query, skip=skip, limit=limit)
+    except neo4j.exceptions.ClientError as e:
+        print(f"{terminal_style.FAIL} Invalid query: {e.message}")
+        return list()
+    return [(record["properties"], record["score"]) for record in records]
 
-    if styled_matches:
-        DictUtils.represent(styled_matches)
+
+@click.command("fts", short_help="full-text search")
+@click.argument("query", required=True)
+@click.option("-n", "--limit", default=20, show_default=True, help="maximum number of results")
+@click.option("--skip", default=0, show_default=True, help="number of results to skip")
+@click.option("--rebuild", is_flag=True, help="rebuild the index from scratch")
+@click.option("--server", is_flag=True, help="search the Neo4j full-text index on the server")
+@pass_environment
+def cli(ctx, query, limit, skip, rebuild, server):
+    """
+    Search tiddlers for QUERY. All words must match; use "quoted words" for a
+    phrase and a trailing * for a prefix. Results are ranked by BM25.
+
+    With --server, QUERY is Lucene syntax, run against a Neo4j full-text index
+    over the tiddler title, text, caption and neuro.role, so no text is moved to
+    the client beyond the requested page.
+    """
+    search = search_server if server else search_local
+    with NeuroBase() as nb:
+        results = search(nb, query, skip, limit, rebuild)
+    if results:
+        render(results, query)
     else:
         print("No matches found")
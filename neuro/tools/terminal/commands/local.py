@@ -16,8 +16,11 @@ from neuro.utils import terminal_components, terminal_style
 
 
 def integrate_local(tid_title):
-    tw_filter = f"[title[{tid_title}]]"
-    lineage = tw_get.lineage(tw_filter=tw_filter)[tid_title]
+    index = tw_get.lineage_index()
+    lineage = index.chain(tid_title)
+    if not lineage:
+        print(f"{terminal_style.FAIL} {tid_title}: lineage is {index.status.get(tid_title, 'missing')}")
+        return
     print(f"{terminal_style.BOLD}Lineage{terminal_style.RESET}: {" ➜  ".join(lineage[1:])}\n")
     tiddler_list_filter = " ".join(f"[[{element}]]" for element in lineage)
     tiddler_list = tw_get.tiddler_list(tw_filter=tiddler_list_filter)
@@ -94,11 +97,15 @@ def integrate_system_files(port, verbose=True):
     if update_tids:
         width = min([max([len(tiddler.title) for tiddler in tiddler_list_to_update]), 24])
         with tqdm.tqdm(total=len(tiddler_list_to_update)) as pbar:
-            for tiddler in tiddler_list_to_update:
-                pbar.set_description(tiddler.title.ljust(width)[:width])
-                tw_put.tiddler(tiddler, port=port)
+
+            def advance(title, _):
+                pbar.set_description(title.ljust(width)[:width])
                 pbar.update(1)
+
+            report = tw_put.tiddler_list(tiddler_list_to_update, port=port, callback=advance)
             pbar.set_description("")
+        for title in report.failed:
+            print(f"Could not update {terminal_style.BOLD}{title}{terminal_style.RESET}")
 
 
 def check_local_integration(port, verbose=True):
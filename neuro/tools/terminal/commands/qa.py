@@ -4,16 +4,22 @@ Quality assurance.
 Before a wiki is archived, certain criteria must be satisfied.
 """
 
+import itertools
 import os
 import json
+import re
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 import pyperclip
 from rich.progress import BarColumn, Progress, TaskProgressColumn, TextColumn, TimeRemainingColumn
 
-from neuro.core.tid import TiddlerList
+from neuro.core.tid import Tiddler
 from neuro.core.data.dict import DictUtils
+from neuro.core.lineage import LineageIndex
+from neuro.core.links import LinkIndex
 from neuro.tools.tw5api import tw_actions, tw_del, tw_get, tw_put
 from neuro.tools.terminal.cli import pass_environment
 from neuro.utils import exceptions, network_utils, terminal_components, terminal_style
@@ -32,54 +38,208 @@ def _progress():
     )
 
 
+LINEAGE_ROOT = "$:/plugins/neuroforest/front/tags/Contents"
+SNAPSHOT_FILTER = "[!is[system]]"
+
+
+class Snapshot:
+    """
+    All non-system tiddler fields, text included, read once.
+
+    `fields` maps titles to fields. `system` maps the titles of system
+    tiddlers to their tags, neuro.id and neuro.role alone. `tags` and `nids`
+    map a tag and a neuro.id to the titles that carry it, system tiddlers
+    included. `links` is the `LinkIndex` of the non-system tiddlers.
+    `missing` lists the missing non-system titles as TiddlyWiki reports
+    them, default those `links` finds. The snapshot is read-only, so checks
+    may analyse it concurrently.
+    """
+    SYSTEM_FIELDS = ["title", "tags", "neuro.id", "neuro.role"]
+    MISSING_FILTER = "[all[missing]!is[system]]"
+
+    def __init__(self, tw_fields, system_fields=(), missing=None):
+        self.fields = {tf["title"]: tf for tf in tw_fields}
+        self.system = {tf["title"]: tf for tf in system_fields}
+        tags = defaultdict(list)
+        nids = defaultdict(list)
+        for tid_title, tf in itertools.chain(self.fields.items(), self.system.items()):
+            for tag in tf.get("tags", []):
+                tags[tag].append(tid_title)
+            if "neuro.id" in tf:
+                nids[tf["neuro.id"]].append(tid_title)
+        self.tags = dict(tags)
+        self.nids = dict(nids)
+        self.links = LinkIndex()
+        self.links.update(self.fields.values())
+        self.missing = list(self.links.missing()) if missing is None else list(missing)
+
+    def __getitem__(self, tid_title):
+        """
+        Fields of a tiddler, system tiddlers included.
+        """
+        if tid_title in self.fields:
+            return self.fields[tid_title]
+        return self.system[tid_title]
+
+    def without(self, tid_titles):
+        """
+        :return: the snapshot without the given tiddlers
+        """
+        tid_titles = set(tid_titles)
+        if not tid_titles:
+            return self
+        def orphaned(tid_title):
+            # Linked only from tiddlers left out; titles linked in forms
+            # the LinkIndex does not know are kept.
+            backlinks = self.links.backlinks(tid_title)
+            return backlinks and tid_titles.issuperset(backlinks)
+
+        missing = [tid_title for tid_title in self.missing if not orphaned(tid_title)]
+        return Snapshot(
+            (tf for tid_title, tf in self.fields.items() if tid_title not in tid_titles),
+            (tf for tid_title, tf in self.system.items() if tid_title not in tid_titles),
+            missing,
+        )
+
+    @classmethod
+    def fetch(cls, port, chunk_size=500):
+        tw_fields = tw_get.fields_list(SNAPSHOT_FILTER, chunk_size, port=port)
+        system_fields = tw_get.tw_fields(cls.SYSTEM_FIELDS, "[is[system]]", port=port)
+        missing = tw_get.filter_output(cls.MISSING_FILTER, port=port)
+        return cls(tw_fields, system_fields, missing)
+
+
+class Writes:
+    """
+    Changes staged by the checks against a snapshot and sent together by `commit`.
+    """
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.updates = dict()
+        self.deletes = dict()
+
+    def __len__(self):
+        return len(self.updates) + len(self.deletes)
+
+    def update(self, tid_title, changes):
+        self.updates.setdefault(tid_title, dict()).update(changes)
+
+    def delete(self, tid_title):
+        self.deletes[tid_title] = None
+
+    def fields(self, tid_title):
+        """
+        Fields of a tiddler with the staged changes applied. Do not mutate.
+        """
+        fields = self.snapshot[tid_title]
+        if tid_title in self.updates:
+            fields = {**fields, **self.updates[tid_title]}
+        return fields
+
+    @staticmethod
+    def _put_fields(fields):
+        # Tiddler assigns a neuro.id where it is still missing.
+        tiddler = Tiddler.from_fields(dict(fields))
+        tiddler.fields["title"] = tiddler.title
+        return tiddler.fields
+
+    def commit(self, port):
+        """
+        Delete, then put all changed tiddlers in batches. System tiddlers are
+        only partly in the snapshot, so their full fields are read first.
+        :return: tw_put.PutReport
+        """
+        for tid_title in self.deletes:
+            tw_del.tiddler(tid_title, port=port)
+        put_titles = [t for t in self.updates if t not in self.deletes]
+        system = [t for t in put_titles if t not in self.snapshot.fields]
+        system_fields = {tf["title"]: tf for tf in tw_get.fields_by_title(system, port=port)}
+        put_titles = [t for t in put_titles if t in self.snapshot.fields or t in system_fields]
+        if not put_titles:
+            return tw_put.PutReport()
+
+        def put_fields(tid_title):
+            fields = system_fields.get(tid_title) or self.snapshot.fields[tid_title]
+            return self._put_fields({**fields, **self.updates[tid_title]})
+
+        with _progress() as progress:
+            task = progress.add_task("Writing", total=len(put_titles))
+
+            def advance(title, _):
+                progress.update(task, description=f"Writing: {_truncate(title).ljust(32)}")
+                progress.advance(task)
+
+            report = tw_put.fields_batch(
+                (put_fields(t) for t in put_titles), port=port, callback=advance)
+            progress.update(task, description="Writing".ljust(32))
+        return report
+
+
 class QACheck(ABC):
     name: str
 
     def __init__(self, port):
         self.port = port
 
+    def exclude(self, snapshot: Snapshot) -> list:
+        """Titles to leave out of the snapshot the checks analyse, such as tiddlers to be deleted."""
+        return []
+
     @abstractmethod
-    def run(self) -> bool: ...
+    def analyse(self, snapshot: Snapshot) -> None:
+        """Read the snapshot without side effects; runs concurrently with the other checks."""
+
+    @abstractmethod
+    def resolve(self, writes: Writes) -> bool:
+        """Report findings and stage fixes; runs in check order."""
+
+    def run(self) -> bool:
+        """Run this check on its own snapshot and write its fixes."""
+        return QAEngine(self.port, [self]).run()
 
 
 class GhostTiddlers(QACheck):
     name = "Ghost Tiddlers"
 
-    def run(self) -> bool:
-        tid_titles = tw_get.tid_titles("[search:title[Draft of ']!has[draft.of]]", port=self.port)
-        for tid_title in tid_titles:
-            tw_del.tiddler(tid_title, port=self.port)
-            print(f"Removed {tid_title}")
+    def exclude(self, snapshot):
+        self.ghosts = [
+            tid_title for tid_title, tf in snapshot.fields.items()
+            if "draft of '" in tid_title.lower() and "draft.of" not in tf
+        ]
+        return self.ghosts
+
+    def analyse(self, snapshot):
+        pass
+
+    def resolve(self, writes):
+        for tid_title in self.ghosts:
+            writes.delete(tid_title)
+            print(f"Removing {tid_title}")
         return True
 
 
 class ObjectSets(QACheck):
     name = "Object Sets"
 
-    def run(self) -> bool:
-        update_list = TiddlerList()
+    def analyse(self, snapshot):
+        self.models = None
         object_sets_raw = os.getenv("OBJECT_SETS")
         if not object_sets_raw:
+            return
+        regexp_pattern = re.compile(r"^\S+\s\S+$")
+        suffixes = tuple(f" {object_set}" for object_set in json.loads(object_sets_raw))
+        self.models = [
+            tid_title for tid_title, tf in snapshot.fields.items()
+            if tid_title.startswith(".") and tid_title.endswith(suffixes)
+            and "neuro.role" not in tf and regexp_pattern.search(tid_title)
+        ]
+
+    def resolve(self, writes):
+        if self.models is None:
             print(f"{terminal_style.FAIL} OBJECT_SETS environment variable is not set")
             return False
-        for object_set in json.loads(object_sets_raw):
-            regexp_pattern = r"^\S+\s\S+$"
-            tiddler_list = tw_get.tiddler_list(
-                f"[prefix[.]suffix[ {object_set}]!has[neuro.role]regexp[{regexp_pattern}]]",
-                port=self.port,
-            )
-            update_list.extend(tiddler_list)
-
-        if update_list:
-            with _progress() as progress:
-                task = progress.add_task("Object sets", total=len(update_list))
-                for tiddler in update_list:
-                    progress.update(task, description=f"Object sets: {_truncate(tiddler.title).ljust(32)}")
-                    tiddler.add_fields({"neuro.role": "model"})
-                    tw_put.tiddler(tiddler, port=self.port)
-                    progress.advance(task)
-                progress.update(task, description="Object sets".ljust(32))
-
+        for tid_title in self.models:
+            writes.update(tid_title, {"neuro.role": "model"})
         print(f"{terminal_style.SUCCESS} Object sets")
         return True
 
@@ -87,28 +247,25 @@ class ObjectSets(QACheck):
 class Roles(QACheck):
     name = "Roles"
 
-    def run(self) -> bool:
-        role_pairs = dict()
+    def analyse(self, snapshot):
+        self.role_pairs = None
         role_dict_raw = os.getenv("ROLE_DICT")
         if not role_dict_raw:
-            print(f"{terminal_style.FAIL} ROLE_DICT environment variable is not set")
-            return False
+            return
+        self.role_pairs = dict()
         for tid_tag, role in json.loads(role_dict_raw).items():
-            tiddler_list = tw_get.tiddler_list(f"[tag[{tid_tag}]!has[neuro.role]]", port=self.port)
-            for tiddler in tiddler_list:
-                role_pairs[tiddler.title] = role
-
-        if role_pairs:
-            with _progress() as progress:
-                task = progress.add_task("Roles", total=len(role_pairs))
-                for tid_title, role in role_pairs.items():
-                    progress.update(task, description=f"Roles: {_truncate(tid_title).ljust(32)}")
-                    tiddler = tw_get.tiddler(tid_title, port=self.port)
-                    tiddler.add_fields({"neuro.role": role})
-                    tw_put.tiddler(tiddler, port=self.port)
-                    progress.advance(task)
-                progress.update(task, description="Roles".ljust(32))
+            for tid_title in snapshot.tags.get(tid_tag, []):
+                if "neuro.role" not in snapshot[tid_title]:
+                    self.role_pairs[tid_title] = role
 
+    def resolve(self, writes):
+        if self.role_pairs is None:
+            print(f"{terminal_style.FAIL} ROLE_DICT environment variable is not set")
+            return False
+        for tid_title, role in self.role_pairs.items():
+            # A role staged by an earlier check takes precedence.
+            if "neuro.role" not in writes.fields(tid_title):
+                writes.update(tid_title, {"neuro.role": role})
         print(f"{terminal_style.SUCCESS} Roles")
         return True
 
@@ -120,38 +277,36 @@ class ValidateTags(QACheck):
         super().__init__(port)
         self.interactive = interactive
 
-    def run(self) -> bool:
-        validated = True
-        tfs = tw_get.tw_fields(["title", "tags"], "[!is[system]]", port=self.port)
-        transformed_index = {tf["title"]: tf for tf in tfs}
-
-        no_tags = []
-        for tid_title, tf in transformed_index.items():
-            invalid_tags = []
+    def analyse(self, snapshot):
+        self.invalid_tags = dict()
+        self.no_tags = []
+        for tid_title, tf in snapshot.fields.items():
             if "tags" not in tf or not tf["tags"]:
                 if " #" not in tid_title and "Draft of " not in tid_title:
-                    no_tags.append(tid_title)
+                    self.no_tags.append(tid_title)
                 continue
 
-            for tag in tf["tags"]:
-                if tag.startswith("$:/"):
-                    continue
-                elif tag not in transformed_index:
-                    invalid_tags.append(tag)
-
+            invalid_tags = [
+                tag for tag in tf["tags"]
+                if not tag.startswith("$:/") and tag not in snapshot.fields
+            ]
             if invalid_tags:
-                validated = False
-                if self.interactive:
-                    print(f"{terminal_style.YELLOW}{terminal_style.BOLD}{tid_title}{terminal_style.RESET} has invalid tags:")
-                    tw_actions.open_tiddler(tid_title)
-                    for tag in invalid_tags:
-                        print(f"    - {tag}")
-                    input()
-                else:
-                    print(f"{terminal_style.YELLOW}{terminal_style.BOLD}{tid_title}{terminal_style.RESET} has invalid tags {' | '.join(invalid_tags)}")
+                self.invalid_tags[tid_title] = invalid_tags
+
+    def resolve(self, writes):
+        validated = not self.invalid_tags and not self.no_tags
+        for tid_title, invalid_tags in self.invalid_tags.items():
+            if self.interactive:
+                print(f"{terminal_style.YELLOW}{terminal_style.BOLD}{tid_title}{terminal_style.RESET} has invalid tags:")
+                tw_actions.open_tiddler(tid_title)
+                for tag in invalid_tags:
+                    print(f"    - {tag}")
+                input()
+            else:
+                print(f"{terminal_style.YELLOW}{terminal_style.BOLD}{tid_title}{terminal_style.RESET} has invalid tags {' | '.join(invalid_tags)}")
 
+        no_tags = self.no_tags
         if no_tags:
-            validated = False
             if self.interactive:
                 for tid_title in no_tags:
                     print(f"{terminal_style.YELLOW}{terminal_style.BOLD}{tid_title}{terminal_style.RESET} has no tags")
@@ -181,13 +336,19 @@ class MissingTiddlers(QACheck):
         super().__init__(port)
         self.interactive = interactive
 
-    def run(self) -> bool:
-        validated = True
-        missing_tiddlers = tw_get.filter_output("[all[missing]!is[system]]", port=self.port)
-        if missing_tiddlers:
-            validated = False
-        for missing_tiddler in missing_tiddlers:
-            backlinks = tw_get.filter_output(f"[[{missing_tiddler}]backlinks[]]", port=self.port)
+    def analyse(self, snapshot):
+        # TiddlyWiki decides what is missing; the snapshot only knows the
+        # backlinks of [[...]] links, so other link forms are asked for.
+        self.backlinks = {tid_title: snapshot.links.backlinks(tid_title) for tid_title in snapshot.missing}
+        unknown = [tid_title for tid_title, backlinks in self.backlinks.items() if not backlinks]
+        if unknown:
+            backlink_filters = {f"[[{tid_title}]backlinks[]]": tid_title for tid_title in unknown}
+            for tw_filter, backlinks in tw_get.gather_filters(list(backlink_filters), port=self.port).items():
+                self.backlinks[backlink_filters[tw_filter]] = backlinks
+
+    def resolve(self, writes):
+        validated = not self.backlinks
+        for backlinks in self.backlinks.values():
             for backlink in backlinks:
                 print(f"{terminal_style.YELLOW}{terminal_style.BOLD}{backlink}{terminal_style.RESET} has a broken link")
                 if self.interactive:
@@ -226,9 +387,8 @@ class Primary(QACheck):
         for key in self.sorting_bin:
             self.sorting_bin[key] = []
 
-    def _analyse(self):
+    def _sort(self, tw_fields):
         self._reset_bins()
-        tw_fields = tw_get.tw_fields(["title", "neuro.primary", "tags"], "[!is[system]]", port=self.port)
         for tf in tw_fields:
             tags = tf.get("tags", [])
 
@@ -248,60 +408,45 @@ class Primary(QACheck):
                     key = "primary≠tag" if len(tags) == 1 else "primary∉tags"
                 self.sorting_bin[key].append(tf)
 
+    def _represent_bins(self):
         if self.verbose:
             counter = {key: len(val) for key, val in self.sorting_bin.items()}
             print("")
             print("-" * 30)
             DictUtils.represent(counter)
 
-    def _verify_lineage(self):
-        lineage_root = "$:/plugins/neuroforest/front/tags/Contents"
-        lineage = tw_get.lineage(lineage_root, port=self.port)
-        cycles = []
-        for tid_title, lineage_item in lineage.items():
-            if not lineage_item:
-                pass
-            elif len(lineage_item) >= 20:
-                cycle = []
-                for tt in lineage_item:
-                    if tt not in cycle:
-                        cycle.append(tt)
-                if set(cycle) not in [set(c) for c in cycles]:
-                    cycles.append(cycle)
+    def analyse(self, snapshot):
+        self.validated = True
+        self.lineage_integrity = True
+        self._sort(snapshot.fields.values())
+
+    def _verify_lineage(self, tw_fields):
+        index = LineageIndex.from_fields(tw_fields, LINEAGE_ROOT)
+
+        for tid_title, parent in index.out_of_scope().items():
+            if not parent.startswith("$:/"):
                 self.lineage_integrity = False
-            elif lineage_item[0] != lineage_root:
-                if not lineage_item[0].startswith("$:/"):
-                    self.lineage_integrity = False
-                    print(f"Lineage problem for tiddler {terminal_style.YELLOW}{terminal_style.BOLD}{tid_title}{terminal_style.RESET}:")
-                    print(" - ".join(lineage_item))
+                print(f"Lineage problem for tiddler {terminal_style.YELLOW}{terminal_style.BOLD}{tid_title}{terminal_style.RESET}:")
+                print(f"    neuro.primary {parent} is missing")
 
-        if cycles:
+        if index.cycles:
+            self.lineage_integrity = False
             print("Cycles found:")
-            for cycle in cycles:
+            for cycle in index.cycles:
                 print("    " + " - ".join(cycle))
 
-    def _resolve_simple(self):
+    def _resolve_simple(self, writes):
         simple_tfs = self.sorting_bin["primary≠tag"] + self.sorting_bin["¬∃primary∃tag"]
-        if not simple_tfs:
-            return
-
-        with _progress() as progress:
-            task = progress.add_task("Primary corrections", total=len(simple_tfs))
-            for tf in simple_tfs:
-                title = tf["title"]
-                progress.update(task, description=f"Primary: {_truncate(title).ljust(32)}")
-                tiddler = tw_get.tiddler(title, port=self.port)
-                tiddler.fields["neuro.primary"] = tf["tags"][0]
-                if self.verbose:
-                    if "neuro.primary" in tf:
-                        progress.print(f"  Resolved simple error: {title}")
-                    else:
-                        progress.print(f"  Added primary: {title}")
-                tw_put.tiddler(tiddler, port=self.port)
-                progress.advance(task)
-            progress.update(task, description="Primary".ljust(32))
+        for tf in simple_tfs:
+            title = tf["title"]
+            writes.update(title, {"neuro.primary": tf["tags"][0]})
+            if self.verbose:
+                if "neuro.primary" in tf:
+                    print(f"  Resolved simple error: {title}")
+                else:
+                    print(f"  Added primary: {title}")
 
-    def _resolve_complex(self):
+    def _resolve_complex(self, writes):
         complex_tfs = self.sorting_bin["primary∉tags"] + self.sorting_bin["¬∃primary∃tags"]
         if complex_tfs and not self.interactive:
             self.validated = False
@@ -320,22 +465,20 @@ class Primary(QACheck):
             chose_title = terminal_components.selector(tid_tags)
 
             if chose_title:
-                tiddler = tw_get.tiddler(tid_title, port=self.port)
-                tiddler.fields["neuro.primary"] = chose_title
-                tw_put.tiddler(tiddler, port=self.port)
+                writes.update(tid_title, {"neuro.primary": chose_title})
             else:
                 self.validated = False
 
-    def run(self) -> bool:
-        self.validated = True
-        self.lineage_integrity = True
-        self._analyse()
-        self._resolve_simple()
-        self._resolve_complex()
+    def resolve(self, writes):
+        self._represent_bins()
+        self._resolve_simple(writes)
+        self._resolve_complex(writes)
 
-        # Re-analyse and verify lineage after corrections
-        self._analyse()
-        self._verify_lineage()
+        # Re-sort and verify lineage with the staged corrections applied
+        tw_fields = [writes.fields(tid_title) for tid_title in writes.snapshot.fields]
+        self._sort(tw_fields)
+        self._represent_bins()
+        self._verify_lineage(tw_fields)
 
         if self.sorting_bin["∃primary¬∃tag"]:
             self.validated = False
@@ -365,37 +508,24 @@ class NeuroIDs(QACheck):
         super().__init__(port)
         self.verbose = verbose
 
-    def run(self) -> bool:
-        resolved = True
+    def analyse(self, snapshot):
+        self.unidentified = [tid_title for tid_title, tf in snapshot.fields.items() if "neuro.id" not in tf]
+        self.duplicates = {nid: titles for nid, titles in snapshot.nids.items() if len(titles) > 1}
+        self.variable_length = not all(len(nid) == 36 for nid in snapshot.nids)
 
-        unidentified = tw_get.tiddler_list("[!is[system]!has[neuro.id]]", port=self.port)
-        if unidentified:
-            with _progress() as progress:
-                task = progress.add_task("Adding neuro.id", total=len(unidentified))
-                for tiddler in unidentified:
-                    progress.update(task, description=f"neuro.id: {_truncate(tiddler.title).ljust(32)}")
-                    tw_put.tiddler(tiddler, port=self.port)
-                    progress.advance(task)
-                progress.update(task, description="neuro.id".ljust(32))
-
-        all_nids = tw_get.filter_output("[has[neuro.id]get[neuro.id]]", port=self.port)
-        seen = set()
-        duplicates = set()
-        for nid in all_nids:
-            if nid in seen:
-                duplicates.add(nid)
-            else:
-                seen.add(nid)
+    def resolve(self, writes):
+        resolved = True
+        for tid_title in self.unidentified:
+            writes.update(tid_title, dict())
 
-        if duplicates:
+        if self.duplicates:
             resolved = False
             if self.verbose:
                 print("The following neuro.id conflicts were found")
-                for i, nid in enumerate(duplicates):
-                    tid_titles = tw_get.filter_output(f"[search:neuro.id:literal[{nid}]]", port=self.port)
+                for i, (nid, tid_titles) in enumerate(self.duplicates.items()):
                     print(f"{i + 1}) {nid}:\n\t{'\n\t'.join(tid_titles)}")
 
-        if not all(len(nid) == 36 for nid in seen):
+        if self.variable_length:
             resolved = False
             print("neuro.id length variability detected")
 
@@ -407,6 +537,36 @@ class NeuroIDs(QACheck):
         return resolved
 
 
+class QAEngine:
+    """
+    Run checks against a single snapshot of the wiki: the read-only `analyse`
+    phases in parallel, the `resolve` phases in check order, then every
+    staged write in one batch, also when a `resolve` raises. Tiddlers excluded by any check, such as those
+    staged for deletion, are left out of the snapshot before analysis.
+    """
+    def __init__(self, port, checks):
+        self.port = port
+        self.checks = checks
+
+    def run(self) -> bool:
+        snapshot = Snapshot.fetch(self.port)
+        snapshot = snapshot.without(itertools.chain.from_iterable(check.exclude(snapshot) for check in self.checks))
+        with ThreadPoolExecutor(max_workers=len(self.checks)) as executor:
+            for future in [executor.submit(check.analyse, snapshot) for check in self.checks]:
+                future.result()
+
+        writes = Writes(snapshot)
+        try:
+            results = [check.resolve(writes) for check in self.checks]
+        finally:
+            # Fixes staged before a check raised are still written.
+            report = writes.commit(self.port)
+        if not report:
+            print(f"{terminal_style.FAIL} Failed to write {', '.join(report.failed)}")
+            return False
+        return all(results)
+
+
 @click.command("qa", short_help="quality assurance")
 @click.option("-i", "--interactive", is_flag=True)
 @click.option("--port", default=os.getenv("PORT"))
@@ -428,7 +588,6 @@ def cli(ctx, interactive, port, verbose):
         print(f"{terminal_style.FAIL} Service not running on {host}:{port}")
         raise SystemExit(1)
 
-    results = [check.run() for check in checks]
-    if not all(results):
+    if not QAEngine(port, checks).run():
         raise SystemExit(1)
     return True
@@ -13,13 +13,20 @@ from neuro.base import nql
 @click.command("", short_help="query NeuroBase")
 @click.option("-c", "--cypher", is_flag=True, default=False)
 @click.option("-n", "--nql-query", is_flag=True, default=False)
+@click.option("-f", "--file", "script", type=click.File("r"), help="run an NQL script in one transaction")
 @click.argument("query", required=False)
 @pass_environment
-def cli(ctx, cypher, nql_query, query):
+def cli(ctx, cypher, nql_query, script, query):
     if cypher:
         with NeuroBase() as nb:
             data = nb.get_data(query)
         print(data)
+    elif nql_query and script:
+        with NeuroBase() as nb:
+            report = nql.run_script(nb, script.read())
+        print(report)
+        if not report:
+            raise SystemExit(1)
     elif nql_query:
         nql.session()
     else:
@@ -0,0 +1,37 @@
+"""
+Ensure the NeuroBase schema.
+"""
+
+import click
+from rich.console import Console
+
+from neuro.base import NeuroBase
+from neuro.tools.terminal.cli import pass_environment
+from neuro.utils import terminal_style
+
+
+STATE_STYLE = {
+    "existing": terminal_style.SKIP,
+    "created": terminal_style.SUCCESS,
+    "indexed": terminal_style.WARN,
+    "index created": terminal_style.WARN,
+}
+
+
+@click.command("schema", short_help="ensure constraints and indexes")
+@click.option("-q", "--quiet", is_flag=True, help="only report changes")
+@pass_environment
+def cli(ctx, quiet):
+    """
+    Create a uniqueness constraint on `neuro.id` for every ontology label, on
+    OntologyNode.label and on OntologyMetadata `neuro.id`. Where values are not
+    unique, a range index is created instead.
+    """
+    with NeuroBase() as nb, Console().status("Ensuring schema...", spinner="dots"):
+        states = nb.ensure_schema()
+    for (label, key), state in states.items():
+        if quiet and state == "existing":
+            continue
+        print(f"{STATE_STYLE[state]} {terminal_style.BOLD}{label}{terminal_style.RESET}.{key}: {state}")
+    created = sum(state != "existing" for state in states.values())
+    print(f"{terminal_style.SUCCESS} Schema: {len(states)} targets, {created} changed")
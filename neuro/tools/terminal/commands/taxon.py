@@ -158,25 +158,28 @@ def cli(ctx, taxon_name, overwrite, local, yes, port):
     tiddler_list.chain()
 
     # Add missing taxa to NeuroWiki
-    changes = False
+    put_list = TiddlerList()
     for tiddler in tiddler_list:
         if overwrite and yes:
-            tw_put.tiddler(tiddler, port=port)
-            changes = True
+            put_list.append(tiddler)
         elif yes and not tw_get.is_tiddler(tiddler.title, port=port):
-            tw_put.tiddler(tiddler, port=port)
-            changes = True
+            put_list.append(tiddler)
         elif overwrite or not tw_get.is_tiddler(tiddler.title, port=port):
             tiddler = add_translations(tiddler)
             if terminal_components.bool_prompt(f"Put tiddler \"{tiddler.title}\"?"):
-                tw_put.tiddler(tiddler, port=port)
-                changes = True
+                put_list.append(tiddler)
+    changes = bool(put_list)
+    if put_list:
+        report = tw_put.tiddler_list(put_list, port=port)
+        for title in report.failed:
+            print(f"{terminal_style.FAIL} {title}: put failed")
 
     # Establish local filesystem architecture
     if yes:
         return
     current_path = local
     added = False
+    local_list = TiddlerList()
     for tiddler in tiddler_list:
         if tiddler.fields["neuro.role"] in OBLIGATORY_TAXA:
             name = tiddler.title.split(" ", 1)[1].replace(" ", "_")
@@ -192,14 +195,16 @@ def cli(ctx, taxon_name, overwrite, local, yes, port):
                 if terminal_components.bool_prompt(f"Establish subpath \"{subpath}\"?"):
                     os.mkdir(current_path)
                     tiddler.fields["local"] = f"file://{current_path}"
-                    tw_put.tiddler(tiddler, port=port)
+                    local_list.append(tiddler)
                 else:
                     break
             else:
                 if "local" not in tiddler.fields:
                     tiddler.fields["local"] = f"file://{current_path}"
-                    tw_put.tiddler(tiddler, port=port)
+                    local_list.append(tiddler)
                     added = True
+    if local_list:
+        tw_put.tiddler_list(local_list, port=port)
 
     if not changes:
         print("No additions to NeuroWiki.")
@@ -2,10 +2,15 @@
 Locally running TiddlyWiki API.
 """
 
+import asyncio
+import functools
 import json
 import logging
 import os
+import threading
+import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -15,8 +20,79 @@ from neuro.utils import network_utils, exceptions
 from neuro.core.data.dict import DictUtils
 
 
+POOL_SIZE = 10
+PROBE_TTL = 5.0
+
+_sessions = dict()
+_pool_sizes = dict()
+_probes = dict()
+_lock = threading.Lock()
+
+
+def get_session(host, port, pool_size=None):
+    """
+    Return the shared keep-alive session for a TiddlyWiki server, creating it on first use.
+    The connection pool holds `pool_size` connections, default TW5_POOL_SIZE or 10.
+    A shared session grows its pool to the largest size requested so far.
+    :param host:
+    :param port:
+    :param pool_size:
+    :return: requests.Session
+    """
+    key = (host, str(port))
+    pool_size = int(pool_size or os.getenv("TW5_POOL_SIZE", POOL_SIZE))
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            _sessions[key] = session
+        if pool_size > _pool_sizes.get(key, 0):
+            # Requests in flight keep the adapter they started on.
+            retry = Retry(total=3, backoff_factor=0.5, connect=0, status_forcelist=[502, 503, 504])
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+            session.mount("http://", adapter)
+            _pool_sizes[key] = pool_size
+        return session
+
+
+def is_alive(host, port):
+    """
+    Check that the server accepts connections. A successful probe is trusted
+    for TW5_PROBE_TTL seconds (default 5); 0 probes on every call.
+    :param host:
+    :param port:
+    :return: bool
+    """
+    key = (host, str(port))
+    ttl = float(os.getenv("TW5_PROBE_TTL", PROBE_TTL))
+    checked = _probes.get(key)
+    if checked is not None and time.monotonic() - checked < ttl:
+        return True
+    if not network_utils.is_port_in_use(port, host):
+        _probes.pop(key, None)
+        return False
+    _probes[key] = time.monotonic()
+    return True
+
+
+def close_sessions():
+    """
+    Close all shared sessions and forget cached probes.
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _pool_sizes.clear()
+        _probes.clear()
+
+
 class API:
-    def __init__(self, port=None, host=None, **kwargs):
+    """
+    Client for one TiddlyWiki server. Instances are cheap: they share the
+    per-(host, port) session and connection pool from `get_session`.
+    """
+    def __init__(self, port=None, host=None, pool_size=None, **kwargs):
         self.port = port or os.getenv("PORT")
         self.host = host or os.getenv("HOST")
         if self.port is None:
@@ -32,17 +108,16 @@ class API:
         self.url = f"http://{self.host}:{self.port}"
         self.response = requests.Response()
         self.parsed_response = dict()
-        self.session = requests.Session()
-        retry = Retry(total=3, backoff_factor=0.5, connect=0, status_forcelist=[502, 503, 504])
-        self.session.mount("http://", HTTPAdapter(max_retries=retry))
+        self.session = get_session(self.host, self.port, pool_size)
 
     def __enter__(self):
-        if not network_utils.is_port_in_use(self.port, self.host):
+        if not is_alive(self.host, self.port):
             raise exceptions.NoAPI(f"Service not running on {self.host}:{self.port}")
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        pass
+        if exc_type is not None and issubclass(exc_type, (exceptions.NoAPI, requests.ConnectionError)):
+            _probes.pop((self.host, str(self.port)), None)
 
     def delete(self, path, **kwargs):
         full_url = self.url + urllib.parse.quote(path)
@@ -107,3 +182,63 @@ class API:
 
         return self.response
 
+
+
+class AsyncAPI:
+    """
+    Asyncio client for one TiddlyWiki server.
+
+    Each request runs the blocking `API` call on a worker thread over the shared
+    keep-alive session, so responses are parsed exactly as in `API`. At most
+    `concurrency` requests are in flight, default TW5_POOL_SIZE or 10.
+
+        async with AsyncAPI(port=port) as api:
+            outputs = await asyncio.gather(*(api.filter(f) for f in filters))
+    """
+    def __init__(self, port=None, host=None, concurrency=None, **kwargs):
+        self.concurrency = int(concurrency or os.getenv("TW5_POOL_SIZE", POOL_SIZE))
+        api = API(port=port, host=host, pool_size=self.concurrency)
+        self.port = api.port
+        self.host = api.host
+        self.url = api.url
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._executor = None
+
+    async def __aenter__(self):
+        if not await asyncio.to_thread(is_alive, self.host, self.port):
+            raise exceptions.NoAPI(f"Service not running on {self.host}:{self.port}")
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="tw5api")
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        if exc_type is not None and issubclass(exc_type, (exceptions.NoAPI, requests.ConnectionError)):
+            _probes.pop((self.host, str(self.port)), None)
+
+    async def _call(self, method, path, **kwargs):
+        if self._executor is None:
+            raise exceptions.InternalError("AsyncAPI must be used as an async context manager")
+        # A fresh API per request: API keeps the last response on the instance.
+        api = API(port=self.port, host=self.host)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(getattr(api, method), path, **kwargs))
+
+    async def delete(self, path, **kwargs):
+        return await self._call("delete", path, **kwargs)
+
+    async def get(self, path, **kwargs):
+        return await self._call("get", path, **kwargs)
+
+    async def put(self, path, **kwargs):
+        return await self._call("put", path, **kwargs)
+
+    async def filter(self, tw_filter):
+        """
+        Return the output of `tw_filter` from /neuro/filter.
+        :param tw_filter:
+        :return: list of strings
+        """
+        response = await self.get("/neuro/filter", params={"filter": tw_filter})
+        return response["parsed"]
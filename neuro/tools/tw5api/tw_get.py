@@ -2,13 +2,24 @@
 GET wrapper.
 """
 
+import asyncio
+import hashlib
 import logging
+import urllib.parse
 
+from neuro.core.data.list import ListUtils
+from neuro.core.lineage import LineageIndex
+from neuro.core.links import LinkIndex
 from neuro.core.tid import Tiddler, TiddlerList
 from neuro.tools.tw5api import tw_api
 from neuro.utils import exceptions
 
 
+# URL-encoded length of a title filter sent in one GET, well below the 16 KB
+# request header limit of the Node.js server.
+MAX_FILTER_LENGTH = 8000
+
+
 def all_fields(**kwargs):
     """
     Return a list of tiddler fields, except 'text'.
@@ -27,6 +38,40 @@ def filter_output(tw_filter, **kwargs):
         return response["parsed"]
 
 
+def gather_fields(tid_titles, concurrency=None, **kwargs):
+    """
+    Fetch the fields of many tiddlers with concurrent requests.
+    :param tid_titles:
+    :param concurrency: requests in flight, default TW5_POOL_SIZE
+    :return: dict of title to fields; missing tiddlers are left out
+    """
+    async def gather():
+        async with tw_api.AsyncAPI(concurrency=concurrency, **kwargs) as api:
+            return await asyncio.gather(*(api.get(f"/neuro/tiddlers/{t}") for t in tid_titles))
+
+    result = dict()
+    for tid_title, response in zip(tid_titles, asyncio.run(gather())):
+        if response["status_code"] == 200:
+            result[tid_title] = response["parsed"]
+        elif response["status_code"] != 404:
+            raise exceptions.UnhandledStatusCode(response["status_code"])
+    return result
+
+
+def gather_filters(tw_filters, concurrency=None, **kwargs):
+    """
+    Run many filters with concurrent requests.
+    :param tw_filters:
+    :param concurrency: requests in flight, default TW5_POOL_SIZE
+    :return: dict of filter to output
+    """
+    async def gather():
+        async with tw_api.AsyncAPI(concurrency=concurrency, **kwargs) as api:
+            return await asyncio.gather(*(api.filter(f) for f in tw_filters))
+
+    return dict(zip(tw_filters, asyncio.run(gather())))
+
+
 def info(**kwargs):
     with tw_api.API(**kwargs) as api:
         response = api.get("/neuro/info")
@@ -50,10 +95,44 @@ def is_tiddler(tid_title, **kwargs):
         return False
 
 
+def link_index(tw_filter="[!is[system]]", index=None, chunk_size=500, **kwargs):
+    """
+    Return a `LinkIndex` of the tiddlers matched by `tw_filter`, refreshed incrementally.
+    Only titles and `modified` stamps are fetched for the whole filter; the full
+    fields are fetched for new and changed tiddlers alone. By default the index
+    is cached under NF_CACHE per wiki and filter.
+    :param tw_filter:
+    :param index: LinkIndex to refresh instead of the cached one
+    :param chunk_size: maximum number of tiddlers per request
+    :return: LinkIndex
+    """
+    if index is None:
+        try:
+            wiki_key = info(**kwargs).get("local-path")
+        except exceptions.UnhandledStatusCode:
+            wiki_key = None
+        with tw_api.API(**kwargs) as api:
+            wiki_key = wiki_key or api.url
+        digest = hashlib.sha1(f"{wiki_key}\n{tw_filter}".encode()).hexdigest()[:16]
+        index = LinkIndex.default(f"links-{digest}")
+
+    stamps = tw_fields(["title", "modified"], tw_filter, **kwargs)
+    stale = index.stale(stamps)
+    if stale:
+        logging.getLogger(__name__).info(f"Indexing links of {len(stale)} tiddlers")
+        index.update(fields_by_title(stale, chunk_size, **kwargs))
+    index.update([], titles=[tf["title"] for tf in stamps])
+    index.save()
+    return index
+
+
 def lineage(root="$:/plugins/neuroforest/front/tags/Contents", tw_filter="[!is[system]]",
             scope_filter="[!is[system]]", limit=20, **kwargs):
     """
     Get lineage of all tiddlers included by the filter.
+    Chains that reach the root are returned in full unless they exceed `limit`
+    ancestors; chains caught in a cycle are cut at `limit`. Broken and
+    out-of-scope chains are left out.
     :param root: the root returned lineages
     :param tw_filter: get lineage for these objects
     :param scope_filter: include these objects in the lineage
@@ -62,48 +141,40 @@ def lineage(root="$:/plugins/neuroforest/front/tags/Contents", tw_filter="[!is[s
     :rtype: dict
     """
     query_fields = tw_fields(["title", "neuro.primary"], tw_filter, **kwargs)
-    scope_fields = tw_fields(["title", "neuro.primary"], scope_filter, **kwargs)
-    query = dict()
-    for i in query_fields:
-        query[i["title"]] = i
-    scope = dict()
-    for i in scope_fields:
-        scope[i["title"]] = i
+    index = lineage_index(root, scope_filter, **kwargs)
 
     lineage_dict = dict()
-    for tid_title, tf in query.items():
-        lineage_item = list()
+    for tf in query_fields:
+        tid_title = tf["title"]
         if "neuro.primary" not in tf:
             logging.getLogger(__name__).info(f"Lineage chain broken at {tid_title}")
             continue
-
-        current_tid_title = tid_title
-        count = 0
-        while True:
-            if current_tid_title == root:
-                lineage_item.insert(0, current_tid_title)
-                break
-            elif current_tid_title not in scope:
-                logging.getLogger(__name__).info(f"Out of scope {current_tid_title}")
-                lineage_item = list()
-                break
-            elif count >= limit:
-                break
-            else:
-                if "neuro.primary" in scope[current_tid_title]:
-                    lineage_item.insert(0, current_tid_title)
-                    current_tid_title = scope[current_tid_title]["neuro.primary"]
-                    count += 1
-                else:
-                    logging.getLogger(__name__).info(f"Out of scope {current_tid_title}")
-                    lineage_item = list()
-                    break
-        if lineage_item:
-            lineage_dict[tid_title] = lineage_item
+        status = LineageIndex.ROOTED if tid_title == root else index.status.get(tid_title)
+        if status == LineageIndex.ROOTED:
+            lineage_item = index.chain(tid_title)
+            if len(lineage_item) > limit + 1:
+                lineage_item = lineage_item[-limit:]
+        elif status == LineageIndex.CYCLE:
+            lineage_item = index.walk(tid_title, limit)[::-1]
+        else:
+            logging.getLogger(__name__).info(f"Out of scope {index.end.get(tid_title, tid_title)}")
+            continue
+        lineage_dict[tid_title] = lineage_item
 
     return lineage_dict
 
 
+def lineage_index(root="$:/plugins/neuroforest/front/tags/Contents", scope_filter="[!is[system]]", **kwargs):
+    """
+    Build a `LineageIndex` of the tiddlers matched by `scope_filter` with a single request.
+    :param root:
+    :param scope_filter:
+    :return: LineageIndex
+    """
+    scope_fields = tw_fields(["title", "neuro.primary"], scope_filter, **kwargs)
+    return LineageIndex.from_fields(scope_fields, root)
+
+
 def tiddler(tid_title, **kwargs):
     t = fields(tid_title, **kwargs)
     if t:
@@ -113,15 +184,82 @@ def tiddler(tid_title, **kwargs):
         return Tiddler(tid_title)
 
 
-def tiddler_list(tw_filter, **kwargs):
-    titles = tw_fields(["title"], tw_filter=tw_filter, **kwargs)
-    tid_list = TiddlerList()
-    for t in titles:
-        tid_title = t["title"]
-        tid = tiddler(tid_title, **kwargs)
-        tid_list.append(tid)
+def tiddler_list(tw_filter, chunk_size=500, **kwargs):
+    """
+    Return a TiddlerList of the complete tiddlers, text included, matched by `tw_filter`.
+    The fields are fetched in bulk with `fields_list` instead of one request per tiddler.
+    :param tw_filter:
+    :param chunk_size: maximum number of tiddlers per request
+    :return: TiddlerList
+    """
+    return TiddlerList(Tiddler.from_fields(tf) for tf in fields_list(tw_filter, chunk_size, **kwargs))
+
+
+def fields_list(tw_filter, chunk_size=500, **kwargs):
+    """
+    Return all fields, text included, of the tiddlers matched by `tw_filter`.
+    Small result sets take a single /neuro/fields.json request. Larger ones are
+    split into chunks of `chunk_size` titles, each selected by a title filter.
+    Titles that cannot be written in a title filter are fetched one by one.
+    :param tw_filter:
+    :param chunk_size: maximum number of tiddlers per request
+    :return: lod, in filter order
+    """
+    titles = tid_titles(tw_filter, **kwargs)
+    if len(titles) <= chunk_size:
+        return tw_fields([], tw_filter, **kwargs)
+    return fields_by_title(titles, chunk_size, **kwargs)
+
 
-    return tid_list
+def fields_by_title(titles, chunk_size=500, **kwargs):
+    """
+    Return all fields, text included, of the tiddlers with the given titles,
+    at most `chunk_size` titles and `MAX_FILTER_LENGTH` URL-encoded filter
+    characters per request. Titles that cannot be written in a title
+    filter are fetched one by one; missing tiddlers are left out.
+    :param titles:
+    :param chunk_size: maximum number of tiddlers per request
+    :return: lod, in the order of `titles`
+    """
+    result = list()
+    literal = [t for t in titles if "]]" not in t]
+    for chunk_filter in title_filters(literal, chunk_size):
+        result.extend(tw_fields([], chunk_filter, **kwargs))
+    for tid_title in titles:
+        if "]]" in tid_title:
+            try:
+                result.append(fields(tid_title, **kwargs))
+            except exceptions.TiddlerDoesNotExist:
+                logging.getLogger(__name__).info(f"Tiddler removed during fetch: {tid_title}")
+
+    order = {tid_title: i for i, tid_title in enumerate(titles)}
+    result.sort(key=lambda tf: order.get(tf["title"], len(order)))
+    return result
+
+
+def title_filters(titles, chunk_size=500, max_length=MAX_FILTER_LENGTH):
+    """
+    Split titles into title filters of at most `chunk_size` titles and
+    `max_length` URL-encoded characters. A title too long on its own gets a
+    filter of its own.
+    :param titles: titles without "]]"
+    :param chunk_size:
+    :param max_length:
+    :return: generator of filters
+    """
+    for chunk in ListUtils.chunks(titles, chunk_size):
+        operands = list()
+        length = 0
+        for tid_title in chunk:
+            operand = f"[[{tid_title}]]"
+            operand_length = len(urllib.parse.quote_plus(operand)) + 1
+            if operands and length + operand_length > max_length:
+                yield " ".join(operands)
+                operands, length = list(), 0
+            operands.append(operand)
+            length += operand_length
+        if operands:
+            yield " ".join(operands)
 
 
 def server_status(**kwargs):
@@ -156,6 +294,7 @@ def fields(tid_title, **kwargs):
 def tw_fields(field_selection: list, tw_filter: str, **kwargs):
     """
     Filter tiddlers by `tw_filter` and extract `fields`.
+    An empty `field_selection` returns every field, including text.
     :param field_selection:
     :param tw_filter:
     :return: lod
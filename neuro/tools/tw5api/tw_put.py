@@ -4,11 +4,50 @@ PUT wrapper.
 
 import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from neuro.core import Tiddler, TiddlerList
+from neuro.core.data.list import ListUtils
 from neuro.tools.tw5api import tw_api
 
 
+BATCH_PATH = "/neuro/tiddlers"
+CHUNK_SIZE = 100
+
+_no_batch_route = set()
+
+
+class PutReport:
+    """
+    Per-title status codes of a batch put. Truthy when every tiddler was written.
+    """
+    SUCCESS = (200, 201, 204)
+
+    def __init__(self):
+        self.status = dict()
+
+    def add(self, title, status_code):
+        self.status[title] = status_code
+
+    @property
+    def succeeded(self):
+        return [title for title, code in self.status.items() if code in self.SUCCESS]
+
+    @property
+    def failed(self):
+        return {title: code for title, code in self.status.items() if code not in self.SUCCESS}
+
+    def __bool__(self):
+        return not self.failed
+
+    def __len__(self):
+        return len(self.status)
+
+    def __repr__(self):
+        return f"PutReport({len(self.succeeded)} put, {len(self.failed)} failed)"
+
+
 def fields(tw_fields, **kwargs):
     """
     Api tiddler is not even necessary.
@@ -33,6 +72,63 @@ def fields(tw_fields, **kwargs):
         return response
 
 
+def _batch_status(response, chunk):
+    """
+    Map the titles of a batch to status codes. The server may answer with
+    a JSON object of per-title codes; otherwise the response code applies to all.
+    """
+    status = {tw_fields["title"]: response.status_code for tw_fields in chunk}
+    if response.headers.get("Content-Type", "").startswith("application/json"):
+        try:
+            per_title = response.json()
+        except ValueError:
+            per_title = None
+        if isinstance(per_title, dict):
+            status.update({title: int(code) for title, code in per_title.items() if title in status})
+    return status
+
+
+def fields_batch(fields_list, chunk_size=CHUNK_SIZE, concurrency=None, callback=None, **kwargs):
+    """
+    Put many tiddlers, sending a JSON array of fields per request to `/neuro/tiddlers`.
+    Servers without the batch route get `concurrency` single puts in flight instead,
+    default TW5_POOL_SIZE; the fallback is remembered per server.
+    :param fields_list: iterable of dicts, each with obligatory key "title"
+    :param chunk_size: tiddlers per batch request
+    :param concurrency: in-flight single puts in the fallback
+    :param callback: called with (title, status_code) as each tiddler is settled
+    :return: PutReport
+    """
+    concurrency = int(concurrency or os.getenv("TW5_POOL_SIZE", tw_api.POOL_SIZE))
+    params = kwargs.get("params", dict())
+    report = PutReport()
+
+    def settle(title, status_code):
+        report.add(title, status_code)
+        if callback:
+            callback(title, status_code)
+
+    with tw_api.API(**kwargs) as api, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        server = (api.host, str(api.port))
+        for chunk in ListUtils.chunks(fields_list, chunk_size):
+            if server not in _no_batch_route:
+                response = api.put(BATCH_PATH, data=json.dumps(chunk), params=params)
+                if response.status_code not in (404, 405):
+                    for title, status_code in _batch_status(response, chunk).items():
+                        settle(title, status_code)
+                    continue
+                logging.info(f"No batch route on {api.host}:{api.port}, putting tiddlers one by one")
+                _no_batch_route.add(server)
+
+            futures = {executor.submit(fields, tw_fields, **kwargs): tw_fields["title"] for tw_fields in chunk}
+            for future in as_completed(futures):
+                settle(futures[future], future.result().status_code)
+
+    for title, status_code in report.failed.items():
+        logging.error(f"Failed to put '{title}': {status_code}")
+    return report
+
+
 def tiddler(tid: Tiddler, **kwargs):
     tid_fields = tid.fields
     tid_fields["title"] = tid.title
@@ -40,5 +136,12 @@ def tiddler(tid: Tiddler, **kwargs):
 
 
 def tiddler_list(tid_list: TiddlerList, **kwargs):
-    for tid in tid_list:
-        tiddler(tid, **kwargs)
+    """
+    Put all tiddlers of a list through `fields_batch`.
+    :return: PutReport
+    """
+    def tid_fields(tid):
+        tid.fields["title"] = tid.title
+        return tid.fields
+
+    return fields_batch((tid_fields(tid) for tid in tid_list), **kwargs)
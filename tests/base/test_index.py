@@ -0,0 +1,83 @@
+"""
+Unit tests for neuro.base.index — ontology file discovery.
+"""
+
+import json
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def ontology_dirs(tmp_path, monkeypatch):
+    assets = tmp_path / "assets"
+    (assets / "ontology").mkdir(parents=True)
+    (assets / "ontology" / "metaontology.nfx").write_text(json.dumps(
+        {"nid": str(uuid.uuid4()), "name": "Metaontology", "version": "1.0", "nodes": [], "relationships": []}
+    ))
+    monkeypatch.setenv("ASSETS", str(assets))
+    monkeypatch.setenv("NF_CACHE", str(tmp_path / "cache"))
+    ontologies = tmp_path / "ontologies"
+    ontologies.mkdir()
+    return ontologies
+
+
+def _write(path, nid, name, version, dependencies=()):
+    path.write_text(json.dumps({
+        "nid": nid, "name": name, "version": version, "dependencies": list(dependencies),
+        "nodes": [{"nid": str(uuid.uuid4()), "labels": ["X"]}], "relationships": [],
+    }))
+
+
+def test_index_resolves_and_caches(ontology_dirs, monkeypatch):
+    from neuro.base import index, nfx
+    base_nid, child_nid = str(uuid.uuid4()), str(uuid.uuid4())
+    _write(ontology_dirs / "base.nfx", base_nid, "Base", "1.0")
+    _write(ontology_dirs / "child.nfx", child_nid, "Child", "1.0", [f"{base_nid}@2.0"])
+
+    idx = index.OntologyIndex(ontology_dirs)
+    assert idx.resolve("Base") == ontology_dirs / "base.nfx"
+    assert idx.resolve(child_nid) == ontology_dirs / "child.nfx"
+    assert idx.check_dependency_versions(ontology_dirs / "child.nfx") == ["Base requires 2.0, found 1.0"]
+    assert len(idx.all_targets(exclude_nid=child_nid)) == 2
+
+    # A second scan is served from the cache without parsing any file.
+    monkeypatch.setattr(nfx, "read_header", lambda path: pytest.fail(f"parsed {path}"))
+    idx = index.OntologyIndex(ontology_dirs)
+    assert idx.header(ontology_dirs / "base.nfx")["version"] == "1.0"
+
+
+def test_index_cache_invalidated_on_change(ontology_dirs):
+    from neuro.base import index
+    nid = str(uuid.uuid4())
+    path = ontology_dirs / "base.nfx"
+    _write(path, nid, "Base", "1.0")
+    index.OntologyIndex(ontology_dirs)
+
+    _write(path, nid, "Base", "1.10")
+    assert index.OntologyIndex(ontology_dirs).header(path)["version"] == "1.10"
+
+    path.unlink()
+    index.OntologyIndex(ontology_dirs)
+    assert str(path) not in index.HeaderCache.default()._entries
+
+
+def test_import_layers(ontology_dirs):
+    from neuro.base import index
+    from neuro.utils.exceptions import NfxCycle
+    a, b, c, d = (str(uuid.uuid4()) for _ in range(4))
+    _write(ontology_dirs / "a.nfx", a, "A", "1.0")
+    _write(ontology_dirs / "b.nfx", b, "B", "1.0", [f"{a}@1.0"])
+    _write(ontology_dirs / "c.nfx", c, "C", "1.0", [f"{a}@1.0"])
+    _write(ontology_dirs / "d.nfx", d, "D", "1.0", [f"{b}@1.0", f"{c}@1.0", f"{uuid.uuid4()}@1.0"])
+
+    idx = index.OntologyIndex(ontology_dirs)
+    layers = idx.import_layers("D")
+    assert [[p.stem for p in layer] for layer in layers] == [["a"], ["b", "c"], ["d"]]
+    assert [[p.stem for p in layer] for layer in idx.import_layers("B", "A")] == [["a"], ["b"]]
+
+    _write(ontology_dirs / "a.nfx", a, "A", "1.1", [f"{d}@1.0"])
+    with pytest.raises(NfxCycle):
+        index.OntologyIndex(ontology_dirs).import_layers("D")
@@ -11,6 +11,39 @@ class TestImport:
     def test_import(self):
         from neuro.base.metaontology import Metaontology  # noqa: F401
 
+    @pytest.mark.unit
+    def test_import_all_skips_stored_versions(self, monkeypatch):
+        from pathlib import Path
+
+        from neuro.base.metaontology import Metaontology
+
+        class Index:
+            headers = {
+                Path("older.nfx"): {"nid": "a", "name": "Older", "version": "1.2"},
+                Path("same.nfx"): {"nid": "b", "name": "Same", "version": "1.10"},
+                Path("newer.nfx"): {"nid": "c", "name": "Newer", "version": "1.10"},
+                Path("new.nfx"): {"nid": "d", "name": "New", "version": "1.0"},
+            }
+
+            def import_layers(self, *targets):
+                return [list(self.headers)]
+
+            def header(self, path):
+                return self.headers[path]
+
+        class NeuroBase:
+            @staticmethod
+            def get_data(query):
+                return [{"nid": "a", "version": "1.10"}, {"nid": "b", "version": "1.10"},
+                        {"nid": "c", "version": "1.9"}]
+
+        imported = []
+        monkeypatch.setattr(Metaontology, "import_nfx", lambda self, path, index=None: imported.append(path.stem))
+        statuses = {}
+        Metaontology(NeuroBase()).import_all([], Index(), on_import=lambda name, imported: statuses.update({name: imported}))
+        assert sorted(imported) == ["new", "newer"]
+        assert statuses == {"Older": False, "Same": False, "Newer": True, "New": True}
+
 
 class TestMetaontology:
     def test_accessor(self, nb):
@@ -39,6 +72,7 @@ class TestOntologyValidator:
         assert not nb_meta.metaontology.is_ontology_valid()
         violations = nb_meta.metaontology.violations
         assert violations.disconnected
+        assert violations.detached == [["Orphan"]]
         violations.disconnected = False
         assert not violations
 
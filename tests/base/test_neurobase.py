@@ -2,8 +2,13 @@
 Integration tests for NeuroBase database availability.
 """
 
+import asyncio
+
+import neo4j
 import pytest
 
+from neuro.base import AsyncNeuroBase
+
 
 class TestNeuroBase:
     def test_connectivity(self, nb):
@@ -13,6 +18,119 @@ class TestNeuroBase:
         count = nb.count()
         assert isinstance(count, int)
 
+    def test_session_reuse(self, nb):
+        with nb.session() as session:
+            nb.run_query("CREATE (:SessionTest {name: 'a'})")
+            with nb.session() as inner:
+                assert inner is session
+            assert nb.count("SessionTest") == 1
+
+    def test_transaction_commit(self, nb):
+        with nb.transaction():
+            nb.run_query("CREATE (:TxTest)")
+            assert nb.count("TxTest") == 1
+        assert nb.count("TxTest") == 1
+
+    def test_transaction_rollback(self, nb):
+        with pytest.raises(RuntimeError):
+            with nb.transaction():
+                nb.run_query("CREATE (:TxTest)")
+                raise RuntimeError
+        assert nb.count("TxTest") == 0
+
+    def test_stream(self, nb):
+        nb.run_query("UNWIND range(1, 5) AS i CREATE (:StreamTest {i: i})")
+        query = "MATCH (n:StreamTest) RETURN n.i AS i ORDER BY i"
+        assert [r["i"] for r in nb.stream(query)] == [1, 2, 3, 4, 5]
+        assert [len(batch) for batch in nb.stream(query, batch_size=2)] == [2, 2, 1]
+
+    def test_execute_write(self, nb):
+        count = nb.execute_write(lambda tx: tx.run("CREATE (:TxTest) RETURN 1 AS one").single()["one"])
+        assert count == 1
+        assert nb.count("TxTest") == 1
+
+    def test_fulltext_search(self, nb):
+        nb.run_query("UNWIND range(1, 3) AS i CREATE (:FtsTest {title: 'Note ' + i, text: 'zebra ' + i})")
+        try:
+            assert nb.ensure_fulltext_index("fts_test", label="FtsTest", properties=("title", "text")) == "created"
+            assert nb.ensure_fulltext_index("fts_test", label="FtsTest", properties=("title", "text")) == "existing"
+            results = nb.fulltext_search("zebra", name="fts_test", limit=2)
+            assert len(results) == 2
+            assert all(r["properties"]["text"].startswith("zebra") for r in results)
+            assert len(nb.fulltext_search("zebra", name="fts_test", skip=2)) == 1
+        finally:
+            nb.drop_fulltext_index("fts_test")
+
+    def test_ensure_schema(self, nb):
+        nb.run_query("UNWIND [1, 1, 2] AS i CREATE (:SchemaDup {`neuro.id`: i})")
+        targets = [("SchemaTest", "neuro.id"), ("SchemaDup", "neuro.id")]
+        try:
+            assert nb.ensure_schema(targets) == {
+                ("SchemaTest", "neuro.id"): "created",
+                ("SchemaDup", "neuro.id"): "index created",
+            }
+            assert nb.ensure_schema(targets) == {
+                ("SchemaTest", "neuro.id"): "existing",
+                ("SchemaDup", "neuro.id"): "indexed",
+            }
+            nb.run_query("CREATE (:SchemaTest {`neuro.id`: 'a'})")
+            with pytest.raises(neo4j.exceptions.ConstraintError):
+                nb.run_query("CREATE (:SchemaTest {`neuro.id`: 'a'})")
+        finally:
+            nb.run_query("DROP CONSTRAINT unique_SchemaTest_neuro_id IF EXISTS")
+            nb.run_query("DROP INDEX index_SchemaDup_neuro_id IF EXISTS")
+
+    def test_schema_targets(self, nb_meta):
+        targets = nb_meta.schema_targets()
+        assert ("OntologyNode", "neuro.id") in targets
+        assert ("OntologyNode", "label") in targets
+        assert ("OntologyMetadata", "neuro.id") in targets
+
+
+@pytest.mark.unit
+class TestEnsureSchemaOnInit:
+    def test_failure_closes_driver(self, monkeypatch):
+        from neuro.base import NeuroBase
+
+        def fail(self):
+            raise neo4j.exceptions.ServiceUnavailable("down")
+
+        closed = []
+        uri = "bolt://127.0.0.1:1"
+        monkeypatch.setenv("NEO4J_ENSURE_SCHEMA", "1")
+        monkeypatch.setattr(NeuroBase, "_schema_ensured", set())
+        monkeypatch.setattr(NeuroBase, "ensure_schema", fail)
+        monkeypatch.setattr(NeuroBase, "close", lambda self: closed.append(self.uri))
+        with pytest.raises(neo4j.exceptions.ServiceUnavailable):
+            NeuroBase(neo4j_uri=uri, neo4j_user="neo4j", neo4j_password="pass")
+        assert closed == [uri]
+        assert uri not in NeuroBase._schema_ensured
+
+        monkeypatch.setattr(NeuroBase, "ensure_schema", lambda self: {("OntologyNode", "label"): "existing"})
+        NeuroBase(neo4j_uri=uri, neo4j_user="neo4j", neo4j_password="pass").driver.close()
+        assert NeuroBase._schema_ensured == {uri}
+
+
+class TestAsyncNeuroBase:
+    def test_transaction_and_stream(self, nb):
+        async def run():
+            async with AsyncNeuroBase() as anb:
+                async with anb.transaction():
+                    await anb.run_query("UNWIND range(1, 3) AS i CREATE (:AsyncTest {i: i})")
+                query = "MATCH (n:AsyncTest) RETURN n.i AS i ORDER BY i"
+                return await anb.count("AsyncTest"), [r["i"] async for r in anb.stream(query)]
+        assert asyncio.run(run()) == (3, [1, 2, 3])
+
+    def test_transaction_rollback(self, nb):
+        async def run():
+            async with AsyncNeuroBase() as anb:
+                with pytest.raises(RuntimeError):
+                    async with anb.transaction():
+                        await anb.run_query("CREATE (:AsyncTest)")
+                        raise RuntimeError
+                return await anb.count("AsyncTest")
+        assert asyncio.run(run()) == 0
+
 
 class TestOntology:
     def test_clear_preserves_data_nodes(self, nb_meta):
@@ -120,3 +120,117 @@ def test_validate_accepts_transitive_endpoint():
     result = validate(data, dependency_nids=dependency_node_nids(data, registry.get))
     assert result["unresolved"] == []
     assert result["foreign"] == []
+
+
+def test_group_relationships():
+    """Relationships are grouped by type and by whether endpoints are local."""
+    from neuro.base.nfx import group_relationships
+    relationships = [
+        {"from": LOCAL_1, "to": LOCAL_2, "type": "USES"},
+        {"from": LOCAL_2, "to": LOCAL_1, "type": "USES", "properties": {"w": 1}},
+        {"from": LOCAL_1, "to": DEP_1, "type": "USES"},
+        {"from": LOCAL_1, "to": LOCAL_2, "type": "RELATES"},
+    ]
+    groups = group_relationships(relationships, {LOCAL_1, LOCAL_2})
+    assert set(groups) == {("USES", True, True), ("USES", True, False), ("RELATES", True, True)}
+    assert groups[("USES", True, True)] == [
+        {"from": LOCAL_1, "to": LOCAL_2, "properties": {}},
+        {"from": LOCAL_2, "to": LOCAL_1, "properties": {"w": 1}},
+    ]
+    assert groups[("USES", True, False)][0]["to"] == DEP_1
+
+
+def _sample():
+    nodes = [
+        {"nid": LOCAL_1, "labels": ["A"], "properties": {"neuro.id": LOCAL_1, "name": "one", "n": 12345}},
+        {"nid": LOCAL_2, "labels": ["B"], "properties": {"neuro.id": LOCAL_2}},
+    ]
+    relationships = [
+        {"from": LOCAL_1, "to": LOCAL_2, "type": "USES", "properties": {}},
+        {"from": LOCAL_2, "to": LOCAL_1, "type": "USES", "properties": {"w": 1.5}},
+    ]
+    return nodes, relationships
+
+
+def test_writer_matches_write(tmp_path):
+    """NfxWriter produces the same file as write()."""
+    import copy
+    from neuro.base import nfx
+    nodes, relationships = _sample()
+    header = {"nid": DIRECT_NID, "name": "Sample", "version": "1.0", "dependencies": [f"{DEP_1}@1.0"]}
+    nfx.write(tmp_path / "a.nfx", copy.deepcopy(nodes), copy.deepcopy(relationships), **header)
+    with nfx.NfxWriter(tmp_path / "b.nfx", **header) as writer:
+        writer.nodes(iter(nodes))
+        writer.relationships(iter(relationships))
+    assert writer.counts == {"nodes": 2, "relationships": 2}
+    assert (tmp_path / "a.nfx").read_text() == (tmp_path / "b.nfx").read_text()
+
+
+def test_writer_out_of_order(tmp_path):
+    """Sections must be written in order; a failed writer leaves no file."""
+    from neuro.base import nfx
+    with pytest.raises(ValueError):
+        with nfx.NfxWriter(tmp_path / "c.nfx") as writer:
+            writer.relationships([])
+    assert not (tmp_path / "c.nfx").exists()
+
+
+def test_reader_streams_sections(tmp_path):
+    """NfxReader returns the header and records across chunk boundaries."""
+    from neuro.base import nfx
+    nodes, relationships = _sample()
+    path = tmp_path / "a.nfx"
+    data = nfx.write(path, nodes, relationships, name="Sample", version="1.0")
+    with nfx.NfxReader(path, chunk_size=7) as reader:
+        assert reader.header == {"name": "Sample", "version": "1.0"}
+        assert list(reader.nodes()) == data["nodes"]
+        assert list(reader.relationships()) == data["relationships"]
+    assert nfx.read_header(path) == {"name": "Sample", "version": "1.0"}
+
+
+def test_reader_out_of_order_sections(tmp_path):
+    """Relationships stored first are buffered; later metadata is collected."""
+    import json
+    from neuro.base import nfx
+    path = tmp_path / "a.nfx"
+    path.write_text(json.dumps({
+        "relationships": [{"from": LOCAL_1, "to": LOCAL_2, "type": "USES"}],
+        "name": "Late",
+        "nodes": [{"nid": LOCAL_1}, {"nid": LOCAL_2}],
+    }))
+    with nfx.NfxReader(path, chunk_size=5) as reader:
+        assert [n["nid"] for n in reader.nodes()] == [LOCAL_1, LOCAL_2]
+        assert len(list(reader.relationships())) == 1
+        assert reader.header == {"name": "Late"}
+
+
+def test_read_header_trailing_metadata(tmp_path):
+    """Metadata written after the sections is found when the leading header is incomplete."""
+    import json
+    from neuro.base import nfx
+    path = tmp_path / "a.nfx"
+    path.write_text(json.dumps({
+        "nid": DIRECT_NID,
+        "nodes": [{"nid": LOCAL_1}, {"nid": LOCAL_2}],
+        "relationships": [{"from": LOCAL_1, "to": LOCAL_2, "type": "USES"}],
+        "name": "Trailing",
+        "version": "2.0",
+    }))
+    assert nfx.read_header(path) == {"nid": DIRECT_NID, "name": "Trailing", "version": "2.0"}
+    assert nfx.read_header(path, required=("nid",)) == {"nid": DIRECT_NID}
+    with nfx.NfxReader(path, chunk_size=4) as reader:
+        assert next(iter(reader.nodes()))["nid"] == LOCAL_1
+        reader.skip_sections()
+        assert reader.header["version"] == "2.0"
+        assert list(reader.relationships()) == []
+
+
+def test_reader_skips_abandoned_section(tmp_path):
+    """Stopping early in nodes() still lets relationships() be read."""
+    from neuro.base import nfx
+    nodes, relationships = _sample()
+    path = tmp_path / "a.nfx"
+    nfx.write(path, nodes, relationships)
+    with nfx.NfxReader(path, chunk_size=3) as reader:
+        assert next(iter(reader.nodes()))["nid"] == LOCAL_1
+        assert [r["to"] for r in reader.relationships()] == [LOCAL_2, LOCAL_1]
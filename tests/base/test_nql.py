@@ -2,7 +2,233 @@
 Unit tests for the package neuro.base.nql
 """
 
+import contextlib
+
+import neo4j
+import pytest
+
+from neuro.base import nql
+from neuro.base.nql.compiler import compile_statement
+from neuro.base.nql.components import NqlParser
+
+
+GRAMMAR = """
+start: "node" label
+label: CNAME | ESCAPED_KEY
+ESCAPED_KEY: /`[^`]+`/
+%import common.CNAME
+%import common.WS
+%ignore WS
+"""
+
+ONTOLOGY_GRAMMAR = """
+?start: ontology
+ontology: ONT_TYPE ontology_node [relationship_node] ["to" ontology_node]
+ONT_TYPE: "node" | "property" | "set_subclass" | "info"
+ontology_node: label [properties]
+relationship_node: "-" label [properties] "->"
+label: CNAME | ESCAPED_KEY
+properties: "{" [pair ("," pair)*] "}"
+pair: property_key ":" ESCAPED_STRING
+property_key: CNAME | ESCAPED_KEY
+ESCAPED_KEY: /`[^`]+`/
+%import common.CNAME
+%import common.ESCAPED_STRING
+%import common.WS
+%ignore WS
+"""
+
 
 class TestNql:
     def test_nql(self):
         from neuro.base import nql  # noqa: F401
+
+
+def node_data(label, **properties):
+    return {"label": label, "properties": properties}
+
+
+@pytest.mark.unit
+class TestCompiler:
+    def test_node(self):
+        data = {"type": "node", **node_data("`Organism`", description="living")}
+        statement = compile_statement(data, line=3, now="2026-01-01T00:00:00.000Z")
+        assert "OntologyNode" in statement.query
+        assert "living" not in statement.query and "Organism" not in statement.query
+        assert statement.row["line"] == 3
+        assert statement.row["label"] == "Organism"
+        assert statement.row["match"] == {"description": "living"}
+        assert statement.row["properties"]["title"] == ".ontology Organism"
+        assert statement.row["properties"]["description"] == "living"
+        assert "neuro.id" in statement.row["properties"]
+
+    def test_same_shape_same_query(self):
+        a = compile_statement({"type": "property", **node_data("Mass")})
+        b = compile_statement({"type": "property", **node_data("Length", unit="m")})
+        assert a.query == b.query
+        assert "OntologyProperty" in a.query
+
+    def test_connect(self):
+        data = {
+            "type": "set_subclass", **node_data("Animal"),
+            "relationship_node": None, "target_node": node_data("`Organism`"),
+        }
+        statement = compile_statement(data)
+        assert "SUBCLASS_OF" in statement.query
+        assert statement.row["source"] == {"label": "Animal"}
+        assert statement.row["target"] == {"label": "Organism"}
+        assert statement.message([]) == "Incorrect ontology nodes given."
+        assert statement.message([{"line": None, "unchanged": True}]) == "Property already set."
+        assert statement.message([{"line": None, "unchanged": False}]) is None
+
+    def test_set_relationship(self):
+        data = {
+            "type": "require_relationship", **node_data("Animal"),
+            "relationship_node": node_data("EATS"), "target_node": node_data("Organism"),
+        }
+        statement = compile_statement(data)
+        assert "REQUIRE_RELATIONSHIP" in statement.query
+        assert statement.row["relationship"] == {"label": "EATS"}
+
+    def test_escaped_keys(self):
+        data = {"type": "node", **node_data("Organism", **{"`neuro.role`": "a \"quoted\" value"})}
+        statement = compile_statement(data)
+        assert statement.row["match"] == {"neuro.role": 'a "quoted" value'}
+        assert statement.row["properties"]["neuro.role"] == 'a "quoted" value'
+        data = {
+            "type": "set_subclass", **node_data("Animal", **{"`neuro.role`": "x"}),
+            "relationship_node": None, "target_node": node_data("Organism"),
+        }
+        assert compile_statement(data).row["source"] == {"label": "Animal", "neuro.role": "x"}
+
+    def test_unsupported(self):
+        with pytest.raises(ValueError, match="Action not supported"):
+            compile_statement({"type": "drop", **node_data("Animal")})
+
+
+@pytest.fixture
+def grammar(tmp_path, monkeypatch):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    monkeypatch.setenv("ASSETS", str(assets))
+    monkeypatch.setenv("NF_CACHE", str(tmp_path / "cache"))
+    monkeypatch.delenv("NQL_PARSER", raising=False)
+    monkeypatch.setattr(NqlParser, "_instances", dict())
+
+    def write(text):
+        (assets / "nql-grammar.lark").write_text(text)
+        return tmp_path / "cache"
+    return write
+
+
+@pytest.mark.unit
+class TestParser:
+    def test_shared_lalr(self, grammar):
+        cache = grammar(GRAMMAR)
+        parser = NqlParser.get()
+        assert parser.options.parser == "lalr"
+        assert NqlParser.get() is parser
+        assert NqlParser.get(maybe_placeholders=False) is not parser
+        assert list(cache.glob("nql-grammar-*.lark.cache"))
+        assert parser.parse("node `Organism`").children[0].children[0] == "`Organism`"
+
+    def test_cached_grammar(self, grammar, monkeypatch):
+        grammar(GRAMMAR)
+        NqlParser.get()
+        monkeypatch.setattr(NqlParser, "_instances", dict())
+        assert NqlParser.get().parse("node Animal")
+
+    def test_earley_fallback(self, grammar):
+        grammar('start: a | b\na: "x"\nb: "x"\n')
+        assert NqlParser.get().options.parser == "earley"
+
+    def test_forced_earley(self, grammar, monkeypatch):
+        grammar(GRAMMAR)
+        monkeypatch.setenv("NQL_PARSER", "earley")
+        assert NqlParser.get().options.parser == "earley"
+
+
+class FakeNeuroBase:
+    def __init__(self, unchanged=(), failing=()):
+        self.unchanged = set(unchanged)
+        self.failing = set(failing)
+        self.calls = list()
+        self.committed = False
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield
+        self.committed = True
+
+    def get_data(self, query, parameters):
+        self.calls.append((query, parameters["rows"]))
+        if self.failing.intersection(row["line"] for row in parameters["rows"]):
+            raise neo4j.exceptions.Neo4jError._hydrate_neo4j(
+                code="Neo.ClientError.Schema.ConstraintValidationFailed", message="Node already exists")
+        return [{"line": row["line"], "unchanged": row["line"] in self.unchanged} for row in parameters["rows"]]
+
+
+@pytest.mark.unit
+class TestScript:
+    SCRIPT = """
+    # organisms
+    set_subclass Animal to Organism
+    node Organism {description: "living"}
+    node Animal
+
+    node Organism {description: "living"}
+    """
+
+    def test_batches(self, grammar):
+        grammar(ONTOLOGY_GRAMMAR)
+        nb = FakeNeuroBase(unchanged={5})
+        report = nql.run_script(nb, self.SCRIPT)
+        assert report and nb.committed
+        assert report.statements == 4
+        assert len(nb.calls) == 2
+        (node_query, node_rows), (connect_query, connect_rows) = nb.calls
+        assert "OntologyNode" in node_query and "SUBCLASS_OF" in connect_query
+        assert [row["line"] for row in node_rows] == [4, 5]
+        assert [row["line"] for row in connect_rows] == [3]
+        assert report.messages == {5: "Nothing to add.", 7: "Same as line 4"}
+
+    def test_repeat_after_change(self, grammar):
+        grammar(ONTOLOGY_GRAMMAR)
+        nb = FakeNeuroBase()
+        script = 'node X {a: "1"}\nnode X {a: "2"}\nnode X {a: "1"}\nnode X {a: "1"}'
+        report = nql.run_script(nb, script)
+        [(_, rows)] = nb.calls
+        assert [row["line"] for row in rows] == [1, 2, 3]
+        assert report.messages == {4: "Same as line 3"}
+
+    def test_chunks(self, grammar):
+        grammar(ONTOLOGY_GRAMMAR)
+        nb = FakeNeuroBase()
+        assert nql.run_script(nb, "node A\nnode B\nnode C", chunk_size=2)
+        assert [len(rows) for _, rows in nb.calls] == [2, 1]
+
+    def test_escaped_properties(self, grammar):
+        grammar(ONTOLOGY_GRAMMAR)
+        nb = FakeNeuroBase()
+        assert nql.run_script(nb, 'node Organism {`neuro.role`: "a \\"quoted\\" \\\\ value"}')
+        [(_, [row])] = nb.calls
+        assert row["match"] == {"neuro.role": 'a "quoted" \\ value'}
+
+    def test_database_error_by_line(self, grammar):
+        grammar(ONTOLOGY_GRAMMAR)
+        nb = FakeNeuroBase(failing={3})
+        report = nql.run_script(nb, "node A\nnode B\nnode C\nnode D\nset_subclass A to B", chunk_size=2)
+        assert not report and not nb.committed
+        assert report.errors == {3: "Node already exists"}
+        # The batch, then the replay of the first chunk and line 3 alone.
+        assert [[row["line"] for row in rows] for _, rows in nb.calls] == [[1, 2], [3, 4], [1, 2], [3]]
+
+    def test_errors_by_line(self, grammar):
+        grammar(ONTOLOGY_GRAMMAR)
+        nb = FakeNeuroBase()
+        report = nql.run_script(nb, "node A\nnode {\nnode B\nset_subclass A")
+        assert not report
+        assert sorted(report.errors) == [2, 4]
+        assert report.errors[2].startswith("Syntax Error")
+        assert report.errors[4] == "Missing target for set_subclass"
+        assert not nb.calls
@@ -124,3 +124,109 @@ class TestMetarelationship:
                                "relationship_type": "REQUIRE_RELATIONSHIP"})
         assert mr.is_required()
         assert not self.mr.is_required()
+
+
+def _snapshot_graph():
+    """A minimal ontology graph in the shape returned by `OntologySnapshot.load`."""
+    nodes = {}
+    relationships = []
+
+    def node(key, labels, label):
+        nodes[key] = {"labels": labels, "properties": {"label": label}}
+
+    def rel(source, rel_type, target):
+        relationships.append({"source": source, "type": rel_type, "target": target})
+
+    for key in ("OntologyNode", "OntologyProperty", "Node", "Uuid", "String", "Taxon", "Gene", "Genome"):
+        node(key, ["OntologyNode"], key)
+    for key in ("HAS_PROPERTY", "REQUIRE_PROPERTY", "HAS_RELATIONSHIP", "PARENT_OF", "HAS_GENE"):
+        node(key, ["OntologyRelationship"], key)
+    node("neuro.id", ["OntologyProperty", "Uuid"], "neuro.id")
+    node("name", ["OntologyProperty", "String"], "name")
+
+    rel("OntologyProperty", "SUBCLASS_OF", "OntologyNode")
+    rel("Node", "SUBCLASS_OF", "OntologyNode")
+    rel("Uuid", "SUBCLASS_OF", "OntologyProperty")
+    rel("String", "SUBCLASS_OF", "OntologyProperty")
+    rel("Taxon", "SUBCLASS_OF", "Node")
+    rel("Gene", "SUBCLASS_OF", "Node")
+    rel("Genome", "SUBCLASS_OF", "Node")
+    rel("REQUIRE_PROPERTY", "SUBCLASS_OF", "HAS_PROPERTY")
+    rel("Node", "REQUIRE_PROPERTY", "neuro.id")
+    rel("Taxon", "HAS_PROPERTY", "name")
+    rel("Taxon", "HAS_RELATIONSHIP", "PARENT_OF")
+    rel("PARENT_OF", "HAS_TARGET", "Taxon")
+    rel("Genome", "HAS_RELATIONSHIP", "HAS_GENE")
+    rel("HAS_GENE", "HAS_TARGET", "Gene")
+    return nodes, relationships
+
+
+class TestOntologySnapshot:
+    @pytest.fixture
+    def snapshot(self, monkeypatch):
+        from neuro.base.schema import OntologySnapshot
+        monkeypatch.setenv("ONTOLOGY_OBJECTS", '["OntologyNode", "OntologyRelationship", "OntologyProperty"]')
+        return OntologySnapshot(*_snapshot_graph())
+
+    def test_count_label(self, snapshot):
+        assert snapshot.count_label("Taxon") == 1
+        assert snapshot.count_label("Bogus") == 0
+
+    def test_metaproperties_inherited(self, snapshot):
+        mp = snapshot.metaproperties("Taxon")
+        assert set(mp) == {"neuro.id", "name"}
+        assert mp["neuro.id"].is_required()
+        assert mp["neuro.id"].property_type == "Uuid"
+        assert mp["neuro.id"].deep_node == "OntologyNode"
+        assert not mp["name"].is_required()
+
+    def test_metaproperties_validate(self, snapshot):
+        v = snapshot.metaproperties("Gene").validate_properties({"bogus": "x"})
+        assert v.undefined_properties == ["bogus"]
+        assert [p.label for p in v.missing_properties] == ["neuro.id"]
+
+    def test_instances(self, snapshot):
+        instances = snapshot.instances("OntologyProperty")
+        assert sorted((i["label"], i["ontology_object_type"]) for i in instances) == [
+            ("name", "OntologyProperty"), ("name", "String"),
+            ("neuro.id", "OntologyProperty"), ("neuro.id", "Uuid"),
+        ]
+        nodes = {i["label"] for i in snapshot.instances("OntologyNode") if i["ontology_object_type"] == "OntologyNode"}
+        assert {"Taxon", "Gene", "Uuid"} <= nodes
+        assert "PARENT_OF" not in nodes
+        assert snapshot.instances("Bogus") == []
+
+    def test_depth(self, snapshot):
+        assert snapshot.depth("OntologyNode") == 0
+        assert snapshot.depth("Taxon") == 2
+        assert snapshot.depth("REQUIRE_PROPERTY") == 1
+
+    def test_property_type_by_depth(self, monkeypatch):
+        from neuro.base.schema import OntologySnapshot
+        monkeypatch.setenv("ONTOLOGY_OBJECTS", '["OntologyNode", "OntologyRelationship", "OntologyProperty"]')
+        nodes, relationships = _snapshot_graph()
+        # Markup has more ancestors through its extra parents, Text the longer chain.
+        subclasses = [("Rich", "OntologyProperty"), ("Formatted", "OntologyProperty"), ("Markup", "String"),
+                      ("Markup", "Rich"), ("Markup", "Formatted"), ("Plain", "String"), ("Text", "Plain")]
+        for source, target in subclasses:
+            nodes[source] = {"labels": ["OntologyNode"], "properties": {"label": source}}
+            relationships.append({"source": source, "type": "SUBCLASS_OF", "target": target})
+        nodes["description"] = {"labels": ["OntologyProperty", "Markup", "Text"], "properties": {"label": "description"}}
+        relationships.append({"source": "Taxon", "type": "HAS_PROPERTY", "target": "description"})
+        snapshot = OntologySnapshot(nodes, relationships)
+        assert len(snapshot.ancestors("Markup")) > len(snapshot.ancestors("Text"))
+        assert snapshot.depth("Text") > snapshot.depth("Markup")
+        assert snapshot.metaproperties("Taxon")["description"].property_type == "Text"
+
+    def test_metarelationships(self, snapshot):
+        assert set(snapshot.metarelationships("Taxon")) == {"PARENT_OF:outgoing"}
+        assert set(snapshot.metarelationships("Genome")) == {"HAS_GENE:outgoing"}
+        mrs = snapshot.metarelationships("Gene")
+        assert set(mrs) == {"HAS_GENE:incoming"}
+        assert mrs["HAS_GENE:incoming"].source == "Genome"
+
+    def test_invalidate(self):
+        from neuro.base.schema import OntologySnapshot
+        version = OntologySnapshot._version
+        OntologySnapshot.invalidate()
+        assert OntologySnapshot._version == version + 1
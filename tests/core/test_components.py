@@ -0,0 +1,44 @@
+"""
+Unit tests of the module neuro.core.components
+"""
+
+import pytest
+
+from neuro.core.components import DisjointSet, components
+
+
+pytestmark = pytest.mark.unit
+
+
+def test_union_find():
+    disjoint_set = DisjointSet("abcde")
+    assert disjoint_set.count == 5
+    assert disjoint_set.union("a", "b")
+    assert disjoint_set.union("c", "b")
+    assert not disjoint_set.union("a", "c")
+    assert disjoint_set.find("a") == disjoint_set.find("c")
+    assert disjoint_set.find("d") != disjoint_set.find("a")
+    assert disjoint_set.count == 3
+    assert len(disjoint_set) == 5
+
+
+def test_groups_largest_first():
+    disjoint_set = components("abcdef", [("a", "b"), ("b", "c"), ("e", "d")])
+    assert [sorted(group) for group in disjoint_set.groups()] == [["a", "b", "c"], ["d", "e"], ["f"]]
+
+
+def test_edges_outside_nodes_skipped():
+    disjoint_set = components(["a", "b"], iter([("a", "x"), ("x", "b")]))
+    assert disjoint_set.count == 2
+    assert "x" not in disjoint_set
+
+
+def test_long_chain():
+    n = 100000
+    disjoint_set = components(range(n), ((i, i + 1) for i in range(n - 1)))
+    assert disjoint_set.count == 1
+    assert len(disjoint_set.groups()[0]) == n
+
+
+def test_empty():
+    assert components([], []).groups() == []
@@ -0,0 +1,21 @@
+"""
+Unit tests of the module neuro.core.data.list
+"""
+
+import pytest
+
+from neuro.core.data.list import ListUtils
+
+
+pytestmark = pytest.mark.unit
+
+
+class TestListUtils:
+    def test_chunks(self):
+        assert list(ListUtils.chunks([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+        assert list(ListUtils.chunks([], 3)) == []
+        assert list(ListUtils.chunks(iter(range(3)), 2)) == [[0, 1], [2]]
+
+    def test_chunks_invalid_size(self):
+        with pytest.raises(ValueError):
+            list(ListUtils.chunks([1], 0))
@@ -0,0 +1,58 @@
+"""
+Unit tests of the module neuro.core.lineage
+"""
+
+import pytest
+
+from neuro.core.lineage import LineageIndex
+
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture()
+def index():
+    parents = {
+        "a": "root",
+        "b": "a",
+        "c": "b",
+        "d": "missing",
+        "e": "d",
+        "f": None,
+        "g": "f",
+        "x": "y",
+        "y": "z",
+        "z": "x",
+        "w": "x",
+    }
+    return LineageIndex(parents, "root")
+
+
+def test_status(index):
+    assert index.titles(LineageIndex.ROOTED) == ["a", "b", "c"]
+    assert sorted(index.titles(LineageIndex.CYCLE)) == ["w", "x", "y", "z"]
+    assert index.broken() == {"f": 2}
+    assert index.out_of_scope() == {"d": "missing"}
+    assert index.end["e"] == "missing"
+    assert index.cycles == [["x", "z", "y"]]
+
+
+def test_chain(index):
+    assert index.chain("c") == ["root", "a", "b", "c"]
+    assert index.chain("b") == ["root", "a", "b"]
+    assert index.chain("root") == ["root"]
+    assert index.chain("e") == []
+    assert index.chain("w") == []
+
+
+def test_walk(index):
+    assert index.walk("w", 5) == ["w", "x", "y", "z", "x"]
+    assert index.walk("e", 5) == ["e", "d"]
+
+
+def test_deep_chain():
+    depth = 10000
+    parents = {f"n{i}": f"n{i - 1}" if i else "root" for i in range(depth)}
+    index = LineageIndex(parents, "root")
+    assert len(index.chain(f"n{depth - 1}")) == depth + 1
+    assert not index.cycles
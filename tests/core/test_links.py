@@ -0,0 +1,53 @@
+"""
+Unit tests of the module neuro.core.links
+"""
+
+import pytest
+
+from neuro.core.links import LinkIndex, extract, parse_string_list
+
+
+pytestmark = pytest.mark.unit
+
+
+def test_parse_string_list():
+    assert parse_string_list("a [[b c]] d") == ["a", "b c", "d"]
+    assert parse_string_list(["a b"]) == ["a b"]
+    assert parse_string_list(None) == []
+
+
+def test_extract():
+    text = (
+        "[[Plain]] [[label|Target]] [[site|https://example.org]] "
+        "{{Transcluded}} {{Field!!caption}} {{Data##key}} {{||Template}} {{{ [tag[x]] }}}"
+    )
+    references = extract({"title": "t", "text": text, "tags": "Tag [[Two Words]]"})
+    assert references["links"] == ["Plain", "Target"]
+    assert references["transclusions"] == ["Data", "Field", "Template", "Transcluded"]
+    assert references["tags"] == ["Tag", "Two Words"]
+
+
+def test_incremental(tmp_path):
+    path = tmp_path / "links.json"
+    index = LinkIndex(path)
+    index.update([
+        {"title": "A", "modified": "1", "text": "[[B]] [[Missing]]"},
+        {"title": "B", "modified": "1", "text": "{{A}}", "tags": ["A"]},
+    ])
+    assert index.backlinks("B") == ["A"]
+    assert index.backlinks("A", kinds=LinkIndex.KINDS) == ["B"]
+    assert index.missing() == {"Missing": ["A"]}
+    index.save()
+
+    reloaded = LinkIndex(path)
+    assert reloaded.references("B") == {"A"}
+    stamps = [{"title": "A", "modified": "2"}, {"title": "B", "modified": "1"}, {"title": "C", "modified": "1"}]
+    assert reloaded.stale(stamps) == ["A", "C"]
+    reloaded.update([
+        {"title": "A", "modified": "2", "text": "[[C]]"},
+        {"title": "C", "modified": "1", "text": ""},
+    ], titles=["A", "C"])
+    assert "B" not in reloaded
+    assert reloaded.missing() == {}
+    assert reloaded.backlinks("A", kinds=LinkIndex.KINDS) == []
+    assert reloaded.backlinks("C") == ["A"]
@@ -0,0 +1,67 @@
+"""
+Unit tests of the module neuro.core.search
+"""
+
+import pytest
+
+from neuro.core.search import FullTextIndex, match_spans, parse_query
+
+
+pytestmark = pytest.mark.unit
+
+TIDDLERS = [
+    {"title": "Fox", "modified": "1", "text": "The quick brown fox jumps over the lazy dog."},
+    {"title": "Dog", "modified": "1", "text": "A dog, a dog and another dog sleep.", "tags": ["Animals"]},
+    {"title": "Quick", "modified": "1", "text": "Brown bread is quick to bake."},
+]
+
+
+@pytest.fixture()
+def index(tmp_path):
+    with FullTextIndex(tmp_path / "fts.sqlite3") as index:
+        index.update(TIDDLERS)
+        yield index
+
+
+def test_parse_query():
+    assert parse_query('"Brown Fox" jump* dog') == [
+        ("phrase", ["brown", "fox"]), ("prefix", ["jump"]), ("term", ["dog"])]
+    assert parse_query("well-known") == [("phrase", ["well", "known"])]
+
+
+def test_ranking(index):
+    titles = [title for title, _ in index.search("dog")]
+    assert titles == ["Dog", "Fox"]
+    assert sorted(title for title, _ in index.search("brown quick")) == ["Fox", "Quick"]
+    assert [title for title, _ in index.search("dog", limit=1)] == ["Dog"]
+    assert index.search("dog cat") == []
+
+
+def test_phrase_and_prefix(index):
+    assert [title for title, _ in index.search('"quick brown"')] == ["Fox"]
+    assert [title for title, _ in index.search('"brown quick"')] == []
+    assert sorted(title for title, _ in index.search("bak* brown")) == ["Quick"]
+    assert [title for title, _ in index.search("anim*")] == ["Dog"]
+    # Phrases do not span fields.
+    assert index.search('"sleep animals"') == []
+
+
+def test_incremental(tmp_path, index):
+    stamps = [{"title": "Fox", "modified": "2"}, {"title": "Quick", "modified": "1"}, {"title": "New", "modified": "1"}]
+    assert index.stale(stamps) == ["Fox", "New"]
+    index.update([
+        {"title": "Fox", "modified": "2", "text": "A red fox."},
+        {"title": "New", "modified": "1", "text": "Brand new."},
+    ], titles=[s["title"] for s in stamps])
+    index.close()
+
+    with FullTextIndex(tmp_path / "fts.sqlite3") as reopened:
+        assert len(reopened) == 3
+        assert reopened.stale(stamps) == []
+        assert reopened.search("dog") == []
+        assert [title for title, _ in reopened.search("red")] == ["Fox"]
+
+
+def test_match_spans():
+    text = "Quick brown foxes"
+    assert [text[s:e] for s, e in match_spans(text, 'fox* "QUICK brown"')] == ["Quick", "brown", "foxes"]
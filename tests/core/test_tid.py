@@ -138,6 +138,119 @@ class TestTiddlerList:
         tiddler_list[1].fields["text"] = "Positive."
         assert tiddler_list.tiddler_index["test2"].fields["text"] == "Positive."
 
+    def test_duplicates(self):
+        from neuro.core.tid import Tiddler, TiddlerList
+        tiddler_1 = Tiddler("test1")
+        tiddler_list = TiddlerList([tiddler_1, Tiddler("test2"), Tiddler("test1")])
+        assert [t.title for t in tiddler_list] == ["test1", "test2"]
+
+        tiddler_list.append(Tiddler("other", uuid=tiddler_1.uuid))
+        tiddler_list.insert(0, Tiddler("test2"))
+        assert len(tiddler_list) == 2
+
+        tiddler_list.insert(0, Tiddler("test0"))
+        assert tiddler_list[0].title == "test0"
+        assert tiddler_list.uuid_index[tiddler_1.uuid] is tiddler_1
+
+    def test_index_maintenance(self):
+        from neuro.core.tid import Tiddler, TiddlerList
+        tiddler_list = TiddlerList([Tiddler(f"test{i}") for i in range(5)])
+
+        head = tiddler_list[:2]
+        assert isinstance(head, TiddlerList)
+        assert "test1" in head and "test2" not in head
+
+        tiddler_list[0] = Tiddler("new0")
+        assert "new0" in tiddler_list and "test0" not in tiddler_list
+        with pytest.raises(ValueError):
+            tiddler_list[1] = Tiddler("test2")
+        assert "test1" in tiddler_list
+
+        tiddler_list[1:3] = [Tiddler("test2"), Tiddler("new1")]
+        assert [t.title for t in tiddler_list] == ["new0", "test2", "new1", "test3", "test4"]
+
+        del tiddler_list[-2:]
+        assert tiddler_list.pop().title == "new1"
+        assert set(tiddler_list.tiddler_index) == {"new0", "test2"}
+        assert len(tiddler_list.uuid_index) == 2
+
+    def test_extended_slice_mismatch(self):
+        from neuro.core.tid import Tiddler, TiddlerList
+        tiddler_list = TiddlerList([Tiddler(f"test{i}") for i in range(4)])
+        with pytest.raises(ValueError):
+            tiddler_list[::2] = [Tiddler("new0")]
+        assert [t.title for t in tiddler_list] == ["test0", "test1", "test2", "test3"]
+        assert set(tiddler_list.tiddler_index) == {"test0", "test1", "test2", "test3"}
+        assert "new0" not in tiddler_list
+
+        tiddler_list[::2] = [Tiddler("new0"), Tiddler("new2")]
+        assert [t.title for t in tiddler_list] == ["new0", "test1", "new2", "test3"]
+        assert set(tiddler_list.tiddler_index) == {"new0", "test1", "new2", "test3"}
+        assert len(tiddler_list.uuid_index) == 4
+
+    def test_copy(self):
+        import copy
+        import pickle
+        from neuro.core.tid import Tiddler, TiddlerList
+        tiddler_list = TiddlerList([Tiddler("test0"), Tiddler("test1")])
+
+        shallow = copy.copy(tiddler_list)
+        assert isinstance(shallow, TiddlerList)
+        assert [t.title for t in shallow] == ["test0", "test1"]
+        assert shallow[0] is tiddler_list[0]
+        shallow.append(Tiddler("test2"))
+        assert "test2" in shallow and "test2" not in tiddler_list
+
+        deep = copy.deepcopy(tiddler_list)
+        assert [t.title for t in deep] == ["test0", "test1"]
+        assert deep[0] is not tiddler_list[0]
+        assert deep.tiddler_index["test0"] is deep[0]
+        assert set(deep.uuid_index) == set(tiddler_list.uuid_index)
+
+        unpickled = pickle.loads(pickle.dumps(tiddler_list))
+        assert "test1" in unpickled and len(unpickled) == 2
+
+
+@pytest.mark.unit
+class TestTiddlywikiHtmlLoader:
+    FIELDS = [
+        {"title": "First", "text": "One </b> & <i>", "tags": "a [[b c]]"},
+        {"title": "Second", "text": "Two"},
+    ]
+
+    def test_store(self, tmp_path):
+        from neuro.core.tid import TiddlywikiHtml
+        store = json.dumps(self.FIELDS).replace("<", "\\u003C")
+        html_path = tmp_path / "tw.html"
+        html_path.write_text(
+            "<html><body><div id=\"storeArea\" style=\"display:none;\"></div>"
+            f"<script class=\"tiddlywiki-tiddler-store\" type=\"application/json\">{store}</script>"
+            "<script class=\"tiddlywiki-tiddler-store\" type=\"application/json\">"
+            "[{\"title\": \"Third\"}, {\"title\": \"First\"}]</script></body></html>"
+        )
+        tw = TiddlywikiHtml.load(str(html_path))
+        assert [t.title for t in tw.tiddler_list] == ["First", "Second", "Third"]
+        assert tw.tiddler_list.tiddler_index["First"].fields["text"] == "One </b> & <i>"
+
+    def test_legacy(self, tmp_path):
+        from bs4 import BeautifulSoup as Soup
+        from neuro.core.tid import Tiddler, TiddlywikiHtml
+        divs = "".join(
+            f"<div title=\"{f['title']}\">\n<pre>{f['text'].replace('&', '&amp;').replace('<', '&lt;')}</pre>\n</div>"
+            for f in self.FIELDS
+        )
+        html = f"<html><body><div id=\"storeArea\">{divs}</div><div title=\"Outside\"></div></body></html>"
+        html_path = tmp_path / "tw.html"
+        html_path.write_text(html)
+
+        tw = TiddlywikiHtml.load(str(html_path))
+        store_area = Soup(html, "html.parser").find(id="storeArea")
+        assert [t.title for t in tw.tiddler_list] == ["First", "Second"]
+        for div in store_area.find_all("div", recursive=False):
+            tiddler = Tiddler.from_html(div)
+            fields = tw.tiddler_list.tiddler_index[tiddler.title].fields
+            assert fields["text"] == tiddler.fields["text"]
+
 
 @pytest.mark.integration
 class TestNeuroTW:
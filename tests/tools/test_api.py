@@ -114,6 +114,14 @@ class TestTwGet:
         tiddler = tw_get.tiddler("test", **kwargs)
         assert "created" in tiddler.fields
 
+    def test_get_tiddler_list(self, wf_universal):
+        from neuro.tools.tw5api import tw_get
+        tiddler_list = tw_get.tiddler_list("[!is[system]]", **kwargs)
+        assert len(tiddler_list) == 9
+        assert tiddler_list.tiddler_index["test"] == tw_get.tiddler("test", **kwargs)
+        chunked = tw_get.tiddler_list("[!is[system]]", chunk_size=2, **kwargs)
+        assert [t.title for t in chunked] == [t.title for t in tiddler_list]
+
     def test_get_fields(self, wf_universal):
         from neuro.tools.tw5api import tw_get
         fields = tw_get.fields("test", **kwargs)
@@ -165,3 +173,12 @@ class TestTwPut:
         tw_put.tiddler(nt1, **kwargs)
         nt2 = tw_get.tiddler("test", **kwargs)
         assert nt1 == nt2
+
+    def test_put_tiddler_list(self, wf):
+        from neuro.tools.tw5api import tw_get, tw_put
+        from neuro.core import Tiddler, TiddlerList
+        text = f"text{time.time()}"
+        tid_list = TiddlerList([Tiddler(f"Batch Put {i}", fields={"text": text}) for i in range(5)])
+        report = tw_put.tiddler_list(tid_list, chunk_size=2, **kwargs)
+        assert report and len(report.succeeded) == 5
+        assert all(tw_get.fields(f"Batch Put {i}", **kwargs)["text"] == text for i in range(5))
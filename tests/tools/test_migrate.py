@@ -5,9 +5,7 @@ Unit tests for the module neuro.tools.migrate
 import pytest
 
 
-pytestmark = pytest.mark.integration
-
-
+@pytest.mark.integration
 def test_migrate_html_to_wf(test_file):
     from neuro.tools import migrate
     input_legacy_html = test_file.get("input/wikis/tw5-legacy.html")
@@ -19,3 +17,20 @@ def test_migrate_html_to_wf(test_file):
     assert test_file.get("output/wf-migrate-legacy/tiddlers/Test.tid")
     assert test_file.get("output/wf-migrate/tiddlers/Test-1.tid")
 
+
+@pytest.mark.unit
+def test_write_json_list(tmp_path):
+    import json
+    from neuro.tools import migrate
+
+    path = tmp_path / "archive.json"
+    migrate.write_json_list(path, iter([{"title": "a"}, {"title": "b"}]))
+    assert json.loads(path.read_text()) == [{"title": "a"}, {"title": "b"}]
+
+    def failing():
+        yield {"title": "c"}
+        raise ConnectionError
+
+    with pytest.raises(ConnectionError):
+        migrate.write_json_list(tmp_path / "partial.json", failing())
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["archive.json"]
@@ -0,0 +1,136 @@
+"""
+Tests for the snapshot QA engine in neuro.tools.terminal.commands.qa.
+No TW5 server is needed, but importing the command requires a configured environment.
+"""
+
+import pytest
+
+
+pytestmark = pytest.mark.integration
+
+NID = "9bd40ef6-2ec5-4952-abc2-57dd34df847b"
+
+FIELDS = [
+    {"title": "Root", "tags": ["Tag"], "neuro.id": NID, "text": "[[Missing]] and [[label|Tag]]"},
+    {"title": "Tag", "tags": ["Root"], "neuro.primary": "Root", "text": "[[web|https://example.org]]"},
+    {"title": "Child", "tags": ["Tag"], "neuro.id": NID},
+    {"title": "Draft of 'Child'", "tags": ["Tag"], "text": "[[Drafted]]"},
+]
+
+
+@pytest.fixture()
+def qa():
+    from neuro.tools.terminal.commands import qa
+    return qa
+
+
+@pytest.fixture()
+def snapshot(qa):
+    return qa.Snapshot([dict(tf) for tf in FIELDS], [
+        {"title": "$:/system", "neuro.id": "short"},
+        {"title": "$:/tagged", "tags": ["Tag"]},
+    ])
+
+
+def test_snapshot_indexes(snapshot):
+    assert snapshot.tags["Tag"] == ["Root", "Child", "Draft of 'Child'", "$:/tagged"]
+    assert snapshot.nids[NID] == ["Root", "Child"]
+    assert snapshot.nids["short"] == ["$:/system"]
+    assert snapshot.links.backlinks("Tag") == ["Root"]
+    assert snapshot.links.missing() == {"Drafted": ["Draft of 'Child'"], "Missing": ["Root"]}
+    assert snapshot.missing == ["Drafted", "Missing"]
+    assert snapshot["$:/tagged"] is snapshot.system["$:/tagged"]
+
+
+def test_snapshot_without(snapshot):
+    pruned = snapshot.without(["Draft of 'Child'", "$:/tagged"])
+    assert "Draft of 'Child'" not in pruned.fields
+    assert pruned.tags["Tag"] == ["Root", "Child"]
+    assert pruned.nids["short"] == ["$:/system"]
+    assert pruned.missing == ["Missing"]
+    assert snapshot.without([]) is snapshot
+
+
+def test_writes(qa, snapshot):
+    writes = qa.Writes(snapshot)
+    writes.update("Child", {"neuro.primary": "Tag"})
+    writes.update("Child", {"neuro.role": "model"})
+    assert writes.fields("Child")["neuro.primary"] == "Tag"
+    assert "neuro.primary" not in snapshot.fields["Child"]
+    assert writes.fields("Root") is snapshot.fields["Root"]
+
+
+@pytest.fixture()
+def server(qa, snapshot, monkeypatch):
+    puts, deletes = [], []
+    monkeypatch.setattr(qa.Snapshot, "fetch", classmethod(lambda cls, port: snapshot))
+    monkeypatch.setattr(qa.tw_del, "tiddler", lambda title, port: deletes.append(title))
+
+    def fields_batch(fields_list, callback=None, **kwargs):
+        report = qa.tw_put.PutReport()
+        for fields in fields_list:
+            puts.append(fields)
+            report.add(fields["title"], 204)
+        return report
+
+    monkeypatch.setattr(qa.tw_put, "fields_batch", fields_batch)
+    monkeypatch.setattr(qa.tw_get, "fields_by_title", lambda titles, port: [
+        {"title": "$:/tagged", "tags": ["Tag"], "text": "full"} for title in titles if title == "$:/tagged"])
+    monkeypatch.setenv("ROLE_DICT", '{"Tag": "model"}')
+    return puts, deletes
+
+
+def test_engine(qa, server):
+    puts, deletes = server
+    checks = [qa.GhostTiddlers(8080), qa.Roles(8080), qa.Primary(8080), qa.NeuroIDs(8080)]
+    assert not qa.QAEngine(8080, checks).run()
+    assert deletes == ["Draft of 'Child'"]
+    assert "Draft of 'Child'" not in checks[1].role_pairs
+    by_title = {fields["title"]: fields for fields in puts}
+    assert "Draft of 'Child'" not in by_title
+    assert by_title["$:/tagged"]["neuro.role"] == "model"
+    assert by_title["$:/tagged"]["text"] == "full"
+    assert by_title["Child"]["neuro.primary"] == "Tag"
+    assert by_title["Root"]["neuro.primary"] == "Tag"
+    assert "neuro.id" in by_title["Tag"]
+    assert checks[3].duplicates == {NID: ["Root", "Child"]}
+
+
+def test_missing_from_server(qa, monkeypatch):
+    snapshot = qa.Snapshot([dict(tf) for tf in FIELDS], missing=["Missing", "Widget"])
+    assert snapshot.without(["Root"]).missing == ["Widget"]
+    monkeypatch.setattr(qa.tw_get, "gather_filters", lambda filters, port: {f: ["Child"] for f in filters})
+    check = qa.MissingTiddlers(8080)
+    check.analyse(snapshot)
+    assert check.backlinks == {"Missing": ["Root"], "Widget": ["Child"]}
+    assert not check.resolve(None)
+
+
+def test_engine_writes_before_error(qa, server):
+    puts, deletes = server
+
+    class Failing(qa.QACheck):
+        name = "Failing"
+
+        def analyse(self, snapshot):
+            pass
+
+        def resolve(self, writes):
+            raise qa.exceptions.InternalError("Automated corrections")
+
+    checks = [qa.GhostTiddlers(8080), qa.Roles(8080), Failing(8080), qa.NeuroIDs(8080)]
+    with pytest.raises(qa.exceptions.InternalError):
+        qa.QAEngine(8080, checks).run()
+    assert deletes == ["Draft of 'Child'"]
+    assert [fields["title"] for fields in puts] == ["Root", "Child", "$:/tagged"]
+
+
+def test_snapshot_fetch_paged(qa, monkeypatch):
+    calls = []
+    monkeypatch.setattr(qa.tw_get, "fields_list", lambda tw_filter, chunk_size, port: calls.append(chunk_size) or FIELDS)
+    monkeypatch.setattr(qa.tw_get, "tw_fields", lambda fields, tw_filter, port: [{"title": "$:/tagged", "tags": ["Tag"]}])
+    monkeypatch.setattr(qa.tw_get, "filter_output", lambda tw_filter, port: ["Widget"])
+    snapshot = qa.Snapshot.fetch(8080, chunk_size=2)
+    assert snapshot.missing == ["Widget"]
+    assert calls == [2]
+    assert snapshot.tags["Tag"][-1] == "$:/tagged"
@@ -0,0 +1,114 @@
+"""
+Unit tests for neuro.tools.tw5api.tw_api — shared sessions and probe cache.
+"""
+
+import pytest
+
+from neuro.tools.tw5api import tw_api
+
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    tw_api.close_sessions()
+    yield
+    tw_api.close_sessions()
+
+
+def test_session_shared_per_server():
+    a = tw_api.API(port=8001, host="127.0.0.1")
+    b = tw_api.API(port="8001", host="127.0.0.1")
+    c = tw_api.API(port=8002, host="127.0.0.1")
+    assert a.session is b.session
+    assert a.session is not c.session
+
+
+def test_session_pool_grows():
+    def pool_size(session):
+        return session.get_adapter("http://127.0.0.1:8001")._pool_maxsize
+
+    session = tw_api.get_session("127.0.0.1", 8001, pool_size=4)
+    assert pool_size(session) == 4
+    assert tw_api.get_session("127.0.0.1", 8001, pool_size=16) is session
+    assert pool_size(session) == 16
+    tw_api.get_session("127.0.0.1", 8001, pool_size=2)
+    assert pool_size(session) == 16
+
+
+def test_probe_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tw_api.network_utils, "is_port_in_use", lambda port, host: calls.append(port) or True)
+    for _ in range(3):
+        with tw_api.API(port=8001, host="127.0.0.1"):
+            pass
+    assert len(calls) == 1
+
+    monkeypatch.setenv("TW5_PROBE_TTL", "0")
+    tw_api.is_alive("127.0.0.1", 8001)
+    assert len(calls) == 2
+
+
+def test_failed_probe_not_cached(monkeypatch):
+    monkeypatch.setattr(tw_api.network_utils, "is_port_in_use", lambda port, host: False)
+    with pytest.raises(tw_api.exceptions.NoAPI):
+        with tw_api.API(port=8001, host="127.0.0.1"):
+            pass
+    monkeypatch.setattr(tw_api.network_utils, "is_port_in_use", lambda port, host: True)
+    assert tw_api.is_alive("127.0.0.1", 8001)
+
+
+def test_async_api_concurrency(monkeypatch):
+    import asyncio
+    import json
+    import threading
+    import time
+
+    import requests
+    from neuro.tools.tw5api import tw_get
+
+    monkeypatch.setattr(tw_api.network_utils, "is_port_in_use", lambda port, host: True)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def get(url, params=None):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        response = requests.Response()
+        title = requests.utils.unquote(url.rsplit("/", 1)[1])
+        response.status_code = 404 if title == "missing" else 200
+        response.headers["Content-type"] = "application/json"
+        response._content = json.dumps({"title": title} if not params else [params["filter"]]).encode()
+        return response
+
+    monkeypatch.setattr(tw_api.get_session("127.0.0.1", 8001), "get", get)
+    titles = [f"t{i}" for i in range(12)] + ["missing"]
+    fields = tw_get.gather_fields(titles, concurrency=4, port=8001, host="127.0.0.1")
+    assert list(fields) == titles[:-1]
+    assert fields["t3"] == {"title": "t3"}
+    assert 1 < state["peak"] <= 4
+
+    assert tw_get.gather_filters(["[tag[a]]", "[tag[b]]"], port=8001, host="127.0.0.1") == {
+        "[tag[a]]": ["[tag[a]]"], "[tag[b]]": ["[tag[b]]"]}
+
+    with pytest.raises(tw_api.exceptions.InternalError):
+        asyncio.run(tw_api.AsyncAPI(port=8001, host="127.0.0.1").filter("[tag[a]]"))
+
+
+def test_title_filters_length():
+    from urllib.parse import quote_plus
+
+    from neuro.tools.tw5api import tw_get
+
+    titles = [f"Ärger über {'x' * 40} {i}" for i in range(500)] + ["y" * 9000]
+    filters = list(tw_get.title_filters(titles, chunk_size=300, max_length=8000))
+    assert len(filters) > 2
+    assert all(len(quote_plus(f)) <= 8000 for f in filters[:-1])
+    assert filters[-1] == f"[[{'y' * 9000}]]"
+    assert " ".join(filters) == " ".join(f"[[{t}]]" for t in titles)
+    assert [len(f.split("]] [[")) for f in tw_get.title_filters(["a", "b", "c"], chunk_size=2)] == [2, 1]
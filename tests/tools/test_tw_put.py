@@ -0,0 +1,69 @@
+"""
+Unit tests for neuro.tools.tw5api.tw_put — batch puts and the single-put fallback.
+"""
+
+import json
+
+import pytest
+import requests
+
+from neuro.tools.tw5api import tw_api, tw_put
+
+
+pytestmark = pytest.mark.unit
+
+kwargs = {"port": 8001, "host": "127.0.0.1"}
+
+
+@pytest.fixture()
+def server(monkeypatch):
+    """Record puts against a fake server; `batch` toggles the batch route."""
+    tw_api.close_sessions()
+    tw_put._no_batch_route.clear()
+    monkeypatch.setattr(tw_api.network_utils, "is_port_in_use", lambda port, host: True)
+    state = {"batch": True, "requests": [], "reject": set()}
+
+    def put(url, data=None, headers=None, params=None):
+        response = requests.Response()
+        path = requests.utils.unquote(url.split(":8001", 1)[1])
+        state["requests"].append(path)
+        if path == tw_put.BATCH_PATH:
+            if not state["batch"]:
+                response.status_code = 405
+                return response
+            titles = [f["title"] for f in json.loads(data)]
+            response.status_code = 200
+            response.headers["Content-Type"] = "application/json"
+            response._content = json.dumps(
+                {t: 400 if t in state["reject"] else 204 for t in titles}).encode()
+        else:
+            title = json.loads(data)["title"]
+            response.status_code = 400 if title in state["reject"] else 204
+        return response
+
+    monkeypatch.setattr(tw_api.get_session("127.0.0.1", 8001), "put", put)
+    yield state
+    tw_api.close_sessions()
+
+
+def test_batch(server):
+    server["reject"].add("t3")
+    seen = []
+    fields_list = ({"title": f"t{i}"} for i in range(5))
+    report = tw_put.fields_batch(fields_list, chunk_size=2, callback=lambda t, s: seen.append(t), **kwargs)
+    assert server["requests"] == [tw_put.BATCH_PATH] * 3
+    assert report.succeeded == ["t0", "t1", "t2", "t4"]
+    assert report.failed == {"t3": 400}
+    assert not report
+    assert sorted(seen) == [f"t{i}" for i in range(5)]
+
+
+def test_fallback(server):
+    from neuro.core.tid import Tiddler, TiddlerList
+    server["batch"] = False
+    tid_list = TiddlerList([Tiddler(f"t{i}") for i in range(5)])
+    report = tw_put.tiddler_list(tid_list, chunk_size=2, concurrency=3, **kwargs)
+    assert report and len(report) == 5
+    # The missing route is probed once, then remembered.
+    assert server["requests"].count(tw_put.BATCH_PATH) == 1
+    assert sorted(server["requests"][1:]) == [f"/neuro/tiddlers/t{i}" for i in range(5)]